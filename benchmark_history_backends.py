@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+OI历史存储后端基准测试
+在临时目录中生成 450 个币种 × 30 天（每4小时一个样本）的数据，
+对比 columnar 列式文件、jsonl 追加日志和 SQLite 后端的写入、"币种最近N条"查询、单日读取、
+全部历史加载为内存索引和过期清理耗时，
+并测量冷数据层保存一年数据（默认365天）的压缩后占用
+
+用法:
+  python benchmark_history_backends.py --symbols 450 --days 30 --cold-days 365
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from oi_cold_storage import ColdHistoryTier
+from oi_history_index import OIHistoryIndex
+from oi_history_store import ColumnarHistoryStore, JsonlHistoryStore, SqliteHistoryStore, recent_days
+
+
+def _generate_collections(symbols: list, days: int, interval_hours: int) -> list:
+    """按采集批次生成记录：每批为 币种 -> OI记录"""
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - days * 86_400_000
+    step_ms = interval_hours * 3_600_000
+    # OI按随机游走变化，保留3位小数（与币安接口返回的精度一致）
+    levels = {symbol: random.uniform(1e3, 1e7) for symbol in symbols}
+    collections = []
+    for ts in range(start_ms + step_ms, now_ms, step_ms):
+        batch = {}
+        for symbol in symbols:
+            levels[symbol] *= random.uniform(0.97, 1.03)
+            batch[symbol] = {
+                'symbol': symbol + 'USDT',
+                'openInterest': round(levels[symbol], 3),
+                'timestamp': ts,
+                'collect_time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(ts / 1000)),
+            }
+        collections.append(batch)
+    return collections
+
+
+def _timeit(func, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def run_backend(name: str, store, data_dir: str, collections: list, symbols: list, latest_n: int,
+                days: int) -> dict:
+    results = {'backend': name}
+    # 历史数据批量写入（每次采集一批）
+    results['load_s'] = _timeit(lambda: [store.append(batch) for batch in collections])
+    if hasattr(store, 'wait_for_compaction'):
+        store.wait_for_compaction()
+        # 模拟跨天维护：压缩（或合并）所有已关闭的分区
+        store.run_maintenance()
+    # 单次采集追加
+    last_ts = max(r['timestamp'] for r in collections[-1].values())
+    extra = {s: {**r, 'timestamp': last_ts + 1000} for s, r in collections[-1].items()}
+    results['append_ms'] = _timeit(lambda: store.append(extra)) * 1000
+    # 所有币种的最近N条
+    results['latest_all_ms'] = _timeit(lambda: [store.latest_records(s, latest_n) for s in symbols]) * 1000
+    # 单个币种最近7天
+    sample = random.sample(symbols, min(20, len(symbols)))
+    results['history7d_ms'] = _timeit(lambda: [store.symbol_history(s, 7) for s in sample]) * 1000 / len(sample)
+    # 读取一整天
+    results['read_day_ms'] = _timeit(lambda: store.read_day(recent_days(2)[-1])) * 1000
+    # 全部历史加载为内存索引
+    results['index_ms'] = _timeit(lambda: OIHistoryIndex.from_store(store, days)) * 1000
+    # 索引上的单币种范围查询（二分查找，返回视图）
+    index = OIHistoryIndex.from_store(store, days)
+    range_start = last_ts - 3 * 86_400_000
+    results['range_us'] = _timeit(
+        lambda: [index.history(s, range_start, last_ts) for s in sample], repeat=20) * 1e6 / len(sample)
+    results['size_mb'] = _dir_size(data_dir) / 1e6
+    # 过期清理（保留最近10天）
+    store.max_history_days = 10
+    results['cleanup_ms'] = _timeit(store.cleanup) * 1000
+    return results
+
+
+def run_cold_tier(cold_dir: str, collections: list) -> dict:
+    """把所有采集批次按天写入冷数据层，测量写入、读取单日耗时和压缩后占用"""
+    by_day = {}
+    for batch in collections:
+        for symbol, record in batch.items():
+            day = time.strftime('%Y-%m-%d', time.localtime(record['timestamp'] / 1000))
+            by_day.setdefault(day, {}).setdefault(symbol, []).append(record)
+    tier = ColdHistoryTier(cold_dir, retention_days=len(by_day) + 1)
+    results = {'days': len(by_day)}
+    results['write_s'] = _timeit(lambda: [tier.write_day(day, data) for day, data in by_day.items()])
+    sample_day = sorted(by_day)[len(by_day) // 2]
+    results['read_day_ms'] = _timeit(lambda: tier.read_day(sample_day), repeat=5) * 1000
+    results['size_mb'] = tier.size_bytes() / 1e6
+    # 整个冷数据范围加载为内存索引后，原始数组与紧凑编码的内存占用
+    merged = {}
+    for data in by_day.values():
+        for symbol, records in data.items():
+            merged.setdefault(symbol, []).extend(records)
+    index = OIHistoryIndex()
+    for symbol, records in merged.items():
+        index._set_records(symbol, records)
+    results['array_mb'] = sum(index.timestamps[s].nbytes + index.values[s].nbytes for s in index.symbols) / 1e6
+    results['encode_ms'] = _timeit(index.encode) * 1000
+    encoded = index.encode()
+    results['encoded_mb'] = sum(len(blob) for blob in encoded.values()) / 1e6
+    results['decode_ms'] = _timeit(lambda: OIHistoryIndex.decode(encoded)) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OI历史存储后端基准测试')
+    parser.add_argument('--symbols', type=int, default=450, help='币种数量')
+    parser.add_argument('--days', type=int, default=30, help='历史天数')
+    parser.add_argument('--interval-hours', type=int, default=4, help='采集间隔（小时）')
+    parser.add_argument('--latest', type=int, default=10, help='"最近N条"查询的N')
+    parser.add_argument('--cold-days', type=int, default=365, help='冷数据层测试的天数，0=跳过')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    collections = _generate_collections(symbols, args.days, args.interval_hours)
+    total = sum(len(batch) for batch in collections)
+    print(f"{args.symbols} 个币种 × {args.days} 天，共 {len(collections)} 次采集、{total} 条记录")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        columnar_dir = os.path.join(tmp_dir, 'columnar')
+        rows.append(run_backend('columnar', ColumnarHistoryStore(columnar_dir, args.days + 1),
+                                columnar_dir, collections, symbols, args.latest, args.days))
+        jsonl_dir = os.path.join(tmp_dir, 'jsonl')
+        rows.append(run_backend('jsonl', JsonlHistoryStore(jsonl_dir, args.days + 1),
+                                jsonl_dir, collections, symbols, args.latest, args.days))
+        sqlite_dir = os.path.join(tmp_dir, 'sqlite')
+        store = SqliteHistoryStore(os.path.join(sqlite_dir, 'oi_history.db'), args.days + 1)
+        rows.append(run_backend('sqlite', store, sqlite_dir, collections, symbols, args.latest, args.days))
+        store.close()
+
+    print(f"{'后端':<10}{'全量写入(s)':>12}{'单次追加(ms)':>14}{'全部最近N条(ms)':>18}"
+          f"{'单币种7天(ms)':>16}{'读取单日(ms)':>14}{'加载索引(ms)':>14}{'范围查询(us)':>14}{'清理(ms)':>10}{'占用(MB)':>10}")
+    for r in rows:
+        print(f"{r['backend']:<10}{r['load_s']:>12.2f}{r['append_ms']:>14.1f}{r['latest_all_ms']:>18.1f}"
+              f"{r['history7d_ms']:>16.2f}{r['read_day_ms']:>14.1f}{r['index_ms']:>14.1f}{r['range_us']:>14.1f}"
+              f"{r['cleanup_ms']:>10.1f}{r['size_mb']:>10.2f}")
+
+    if args.cold_days > 0:
+        cold_collections = _generate_collections(symbols, args.cold_days, args.interval_hours)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            r = run_cold_tier(os.path.join(tmp_dir, 'cold'), cold_collections)
+        total = sum(len(batch) for batch in cold_collections)
+        print(f"\n冷数据层: {r['days']} 天、{total} 条记录，写入 {r['write_s']:.2f}s，"
+              f"读取单日 {r['read_day_ms']:.1f}ms，压缩后 {r['size_mb']:.2f}MB（{r['size_mb'] * 1e6 / total:.1f} 字节/条）")
+        print(f"内存索引: 原始数组 {r['array_mb']:.2f}MB，紧凑编码 {r['encoded_mb']:.2f}MB"
+              f"（{r['encoded_mb'] * 1e6 / total:.1f} 字节/条），编码 {r['encode_ms']:.0f}ms，解码 {r['decode_ms']:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+HTTP会话复用基准测试
+在本地启动一个 HTTPS 模拟服务，对比每次请求新建连接（requests.get）
+与共享 keep-alive 会话（http_client）在一个采集周期内的握手次数和耗时
+
+用法:
+  python benchmark_http_session.py --requests 102 --concurrency 20
+"""
+import argparse
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+import http_client
+from concurrent_fetcher import fetch_concurrently
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """模拟 /fapi/v1/openInterest 的响应"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = json.dumps({'symbol': 'BTCUSDT', 'openInterest': '88029.723', 'time': int(time.time() * 1000)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _CountingHTTPSServer(ThreadingHTTPServer):
+    """统计已完成TLS握手的连接数"""
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, handler, context):
+        super().__init__(address, handler)
+        self.context = context
+        self.handshakes = 0
+        self._count_lock = threading.Lock()
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        tls_sock = self.context.wrap_socket(sock, server_side=True)
+        with self._count_lock:
+            self.handshakes += 1
+        return tls_sock, addr
+
+
+def _make_certificate(tmp_dir: str) -> tuple:
+    cert_file = os.path.join(tmp_dir, 'cert.pem')
+    key_file = os.path.join(tmp_dir, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost',
+         '-keyout', key_file, '-out', cert_file],
+        check=True, capture_output=True,
+    )
+    return cert_file, key_file
+
+
+def _run_cycle(server, url, cert_file, total, concurrency, pooled):
+    server.handshakes = 0
+    if pooled:
+        http_client.close_sessions()
+        fetch = lambda _: http_client.http_get(url, verify=cert_file).status_code
+    else:
+        fetch = lambda _: requests.get(url, verify=cert_file, timeout=10).status_code
+    start = time.perf_counter()
+    statuses = fetch_concurrently(fetch, range(total), max_workers=concurrency, progress_every=total + 1)
+    elapsed = time.perf_counter() - start
+    assert all(status == 200 for status in statuses)
+    return elapsed, server.handshakes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP会话复用基准测试')
+    parser.add_argument('--requests', type=int, default=102, help='每个周期的请求数（默认: ticker + premiumIndex + 100个OI）')
+    parser.add_argument('--concurrency', type=int, default=20, help='并发数')
+    parser.add_argument('--rounds', type=int, default=3, help='重复轮数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert_file, key_file = _make_certificate(tmp_dir)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_file, key_file)
+        server = _CountingHTTPSServer(('localhost', 0), _StandInHandler, context)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"https://localhost:{server.server_address[1]}/fapi/v1/openInterest"
+
+        print(f"每周期请求数: {args.requests}，并发数: {args.concurrency}")
+        for label, pooled in (('requests.get (每次新建连接)', False), ('共享会话 (keep-alive)', True)):
+            timings = []
+            for _ in range(args.rounds):
+                elapsed, handshakes = _run_cycle(server, url, cert_file, args.requests, args.concurrency, pooled)
+                timings.append(elapsed)
+            best = min(timings)
+            print(f"{label:<28} 握手次数: {handshakes:>4}  最快耗时: {best*1000:>8.1f} ms  "
+                  f"平均每请求: {best/args.requests*1000:.2f} ms")
+
+        server.shutdown()
+        http_client.close_sessions()
+
+
+if __name__ == '__main__':
+    main()
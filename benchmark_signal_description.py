@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+信号描述生成基准测试
+用随机行情数据对比逐行 df.apply(_get_signal_description) 与按列向量化的
+_build_signal_descriptions 的耗时，并核对两者结果完全一致
+
+用法:
+  python benchmark_signal_description.py --rows 100 1000 10000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+
+def _generate_signals(analyzer, rows: int, seed: int = 0) -> pd.DataFrame:
+    """生成 calculate_signals 生成描述前的数据（指标和信号列已计算）"""
+    rng = np.random.default_rng(seed)
+    market_cap = 10 ** rng.uniform(7, 11, rows)
+    df = pd.DataFrame({
+        'symbol': [f"SYM{i}" for i in range(rows)],
+        'price': rng.uniform(0.01, 100, rows),
+        'quote_volume_24h': market_cap * rng.uniform(0.01, 1.0, rows),
+        'open_interest_value': market_cap * rng.uniform(0.01, 1.5, rows),
+        'market_cap_estimate': market_cap,
+        'funding_rate': rng.normal(0, 0.001, rows),
+        'price_change_percent_24h': rng.normal(0, 5, rows),
+        'oi_surge_ratio': np.where(rng.random(rows) < 0.1, np.nan, rng.uniform(0.5, 3.0, rows)),
+    })
+    df['oi_market_cap_ratio'] = df['open_interest_value'] / df['market_cap_estimate']
+    df['volume_market_cap_ratio'] = df['quote_volume_24h'] / df['market_cap_estimate']
+    df['oi_volume_ratio'] = df['open_interest_value'] / df['quote_volume_24h']
+    df['funding_rate_abs'] = abs(df['funding_rate'])
+    df['signal_strength'] = analyzer._calculate_signal_strength(df)
+    df['buy_signal'] = analyzer._generate_buy_signals(df)
+    df['sell_signal'] = analyzer._generate_sell_signals(df)
+    df['alert_signal'] = analyzer._generate_alert_signals(df)
+    return df
+
+
+def _timeit(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='信号描述生成基准测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000], help='行数')
+    parser.add_argument('--repeat', type=int, default=5, help='每种规模重复次数')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 分析器会在当前目录创建OI历史数据目录
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            from trading_signal_analyzer import TradingSignalAnalyzer
+            analyzer = TradingSignalAnalyzer()
+        finally:
+            os.chdir(cwd)
+
+        print(f"{'行数':>8}{'逐行apply(ms)':>16}{'向量化(ms)':>14}{'加速比':>10}{'结果一致':>10}")
+        for rows in args.rows:
+            df = _generate_signals(analyzer, rows)
+            expected = df.apply(analyzer._get_signal_description, axis=1)
+            actual = analyzer._build_signal_descriptions(df)
+            same = expected.equals(actual)
+            apply_ms = _timeit(lambda: df.apply(analyzer._get_signal_description, axis=1), args.repeat) * 1000
+            vector_ms = _timeit(lambda: analyzer._build_signal_descriptions(df), args.repeat) * 1000
+            print(f"{rows:>8}{apply_ms:>16.1f}{vector_ms:>14.2f}{apply_ms / vector_ms:>10.1f}{'是' if same else '否':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+币安合约API访问模块
+所有币安请求统一经过进程级令牌桶限速器，按接口权重扣减额度，
+并根据响应头 X-MBX-USED-WEIGHT-1m 校准剩余额度
+"""
+import logging
+import threading
+import time
+import requests
+from config import Config
+from http_client import http_get
+from response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+BINANCE_FUTURES_BASE_URL = 'https://fapi.binance.com'
+
+EXCHANGE_INFO_PATH = '/fapi/v1/exchangeInfo'
+TICKER_24HR_PATH = '/fapi/v1/ticker/24hr'
+PREMIUM_INDEX_PATH = '/fapi/v1/premiumIndex'
+OPEN_INTEREST_PATH = '/fapi/v1/openInterest'
+OPEN_INTEREST_HIST_PATH = '/futures/data/openInterestHist'
+
+# 接口权重：(指定symbol时的权重, 不指定symbol时的权重)
+ENDPOINT_WEIGHTS = {
+    EXCHANGE_INFO_PATH: (1, 1),
+    TICKER_24HR_PATH: (1, 40),
+    PREMIUM_INDEX_PATH: (1, 10),
+    OPEN_INTEREST_PATH: (1, 1),
+}
+
+# 全市场接口的缓存有效期（秒），未列出的接口不缓存
+ENDPOINT_CACHE_TTLS = {
+    EXCHANGE_INFO_PATH: 3600,
+    TICKER_24HR_PATH: 30,
+    PREMIUM_INDEX_PATH: 30,
+}
+
+USED_WEIGHT_HEADER = 'X-MBX-USED-WEIGHT-1m'
+
+
+def endpoint_weight(path: str, params: dict | None = None) -> int:
+    """获取接口的请求权重，未知接口按1计算"""
+    with_symbol, without_symbol = ENDPOINT_WEIGHTS.get(path, (1, 1))
+    if params and params.get('symbol'):
+        return with_symbol
+    return without_symbol
+
+
+class BinanceRateLimiter:
+    """币安请求权重令牌桶限速器（线程安全）"""
+
+    def __init__(self, weight_limit: int | None = None, safety_ratio: float | None = None,
+                 window_seconds: float = 60.0, used_weight_header: str | None = USED_WEIGHT_HEADER):
+        weight_limit = weight_limit or getattr(Config, 'BINANCE_WEIGHT_LIMIT', 2400)
+        safety_ratio = safety_ratio or getattr(Config, 'BINANCE_WEIGHT_SAFETY_RATIO', 0.9)
+        # 预留部分额度给同一IP下的其他进程
+        self.capacity = max(1, int(weight_limit * safety_ratio))
+        self.refill_rate = self.capacity / window_seconds  # 每秒恢复的权重
+        self.used_weight_header = used_weight_header
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+            self._last_refill = now
+
+    def acquire(self, weight: int = 1):
+        """阻塞直到有足够的权重额度"""
+        weight = min(weight, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= weight:
+                    self._tokens -= weight
+                    return
+                wait = max(self._paused_until - now, (weight - self._tokens) / self.refill_rate)
+            time.sleep(wait)
+
+    def update_from_response(self, response: requests.Response):
+        """根据响应头校准剩余额度，遇到429/418时暂停发送"""
+        used_weight = response.headers.get(self.used_weight_header) if self.used_weight_header else None
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if used_weight is not None:
+                try:
+                    remaining = self.capacity - int(used_weight)
+                    if self._tokens > remaining:
+                        self._tokens = max(float(remaining), 0.0)
+                except ValueError:
+                    pass
+            if response.status_code in (418, 429):
+                try:
+                    retry_after = int(response.headers.get('Retry-After', 60))
+                except (TypeError, ValueError):
+                    retry_after = 60
+                self._paused_until = max(self._paused_until, now + retry_after)
+                self._tokens = 0.0
+                logger.warning(f"币安API触发限频({response.status_code})，暂停 {retry_after} 秒")
+
+    @property
+    def available(self) -> float:
+        """当前可用的权重额度"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+# 进程级共享限速器
+rate_limiter = BinanceRateLimiter()
+
+# 数据类接口（/futures/data/*）不计入请求权重，单独限制为每5分钟1000次
+data_rate_limiter = BinanceRateLimiter(weight_limit=1000, window_seconds=300, used_weight_header=None)
+
+ENDPOINT_LIMITERS = {
+    OPEN_INTEREST_HIST_PATH: data_rate_limiter,
+}
+
+
+def binance_get(path: str, params: dict | None = None, timeout: int = 10,
+                headers: dict | None = None) -> requests.Response:
+    """经过限速器发送币安GET请求，限频响应会在暂停后自动重试"""
+    url = f"{BINANCE_FUTURES_BASE_URL}{path}"
+    weight = endpoint_weight(path, params)
+    limiter = ENDPOINT_LIMITERS.get(path, rate_limiter)
+    max_retries = getattr(Config, 'MAX_RETRIES', 3)
+    for attempt in range(max_retries + 1):
+        limiter.acquire(weight)
+        response = http_get(url, params=params, timeout=timeout, headers=headers)
+        limiter.update_from_response(response)
+        if response.status_code not in (418, 429) or attempt == max_retries:
+            return response
+    return response
+
+
+# 进程级共享响应缓存
+response_cache = ResponseCache(getattr(Config, 'HTTP_CACHE_DIR', '.http_cache'))
+
+
+def binance_get_json(path: str, params: dict | None = None, timeout: int = 10, ttl: float | None = None):
+    """获取币安接口的JSON数据，全市场接口优先使用响应缓存
+
+    Returns:
+        解析后的JSON数据，请求失败（非200）时返回 None
+    """
+    if ttl is None:
+        ttl = ENDPOINT_CACHE_TTLS.get(path, 0)
+    if ttl <= 0 or not getattr(Config, 'ENABLE_HTTP_CACHE', True):
+        response = binance_get(path, params=params, timeout=timeout)
+        return response.json() if response.status_code == 200 else None
+
+    key = response_cache.make_key(path, params)
+    entry = response_cache.get(key)
+    if entry is not None and response_cache.is_fresh(entry):
+        response_cache.record('hit')
+        return entry['data']
+
+    # 过期条目带有校验信息时发送条件请求
+    headers = {}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    response = binance_get(path, params=params, timeout=timeout, headers=headers or None)
+    if response.status_code == 304 and entry is not None:
+        response_cache.record('revalidated')
+        return response_cache.touch(key, entry, ttl)['data']
+    if response.status_code != 200:
+        return None
+
+    response_cache.record('miss')
+    data = response.json()
+    response_cache.put(key, data, ttl, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return data
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+列式二进制文件格式
+文件由一个小的JSON头和若干按64字节对齐、连续存放的定长类型列组成：
+
+    b'OICF' | 头长度(uint32) | 头JSON | 填充 | 列1 | 填充 | 列2 ...
+
+头中记录每列的名称、dtype、形状和偏移。读取时整个文件只做一次 np.memmap，
+各列是映射内存上的零拷贝视图，切片也不会复制数据
+"""
+import json
+import os
+import struct
+import numpy as np
+
+FILE_MAGIC = b'OICF'
+FILE_VERSION = 1
+ALIGNMENT = 64
+PREAMBLE_FORMAT = '<4sI'
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_columns(path: str, columns: dict, meta: dict | None = None):
+    """原子写入列式文件
+
+    Args:
+        path: 文件路径
+        columns: 列名 -> 一维数组（各列长度可以不同，例如行数据列和币种表）
+        meta: 写入头中的附加信息（需可JSON序列化）
+    """
+    arrays = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+    specs = []
+    for name, values in arrays.items():
+        if values.dtype.hasobject:
+            raise TypeError(f"列 {name} 不能是 object 类型")
+        # 先用足够宽的占位偏移计算头长度，确定数据起始位置后再填入实际偏移
+        specs.append({'name': name, 'dtype': values.dtype.str, 'shape': list(values.shape), 'offset': 10 ** 15})
+    header = {'version': FILE_VERSION, 'columns': specs, 'meta': meta or {}}
+    preamble_size = struct.calcsize(PREAMBLE_FORMAT)
+    header_size = len(json.dumps(header, ensure_ascii=False).encode('utf-8'))
+    offset = _align(preamble_size + header_size)
+    for spec, values in zip(specs, arrays.values()):
+        spec['offset'] = offset
+        offset = _align(offset + values.nbytes)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    header_bytes += b' ' * (header_size - len(header_bytes))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack(PREAMBLE_FORMAT, FILE_MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for spec, values in zip(specs, arrays.values()):
+            f.write(b'\0' * (spec['offset'] - f.tell()))
+            f.write(values.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_header(buffer) -> dict:
+    magic, header_len = struct.unpack_from(PREAMBLE_FORMAT, buffer, 0)
+    if magic != FILE_MAGIC:
+        raise ValueError("不是列式文件")
+    start = struct.calcsize(PREAMBLE_FORMAT)
+    header = json.loads(bytes(buffer[start:start + header_len]))
+    if header.get('version') != FILE_VERSION:
+        raise ValueError(f"不支持的列式文件版本: {header.get('version')}")
+    return header
+
+
+def open_columns(path: str) -> tuple:
+    """以内存映射方式打开列式文件
+
+    Returns:
+        (列名 -> 只读数组视图, 头中的附加信息)
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError(f"{path} 为空文件")
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    header = read_header(mapped)
+    columns = {}
+    for spec in header['columns']:
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+        columns[spec['name']] = np.ndarray(
+            shape=tuple(spec['shape']), dtype=dtype, buffer=mapped, offset=spec['offset'],
+        ) if count else np.empty(tuple(spec['shape']), dtype=dtype)
+    return columns, header['meta']
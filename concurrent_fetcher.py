@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+并发请求工具
+基于有界线程池并发执行网络请求，结果顺序与输入顺序一致
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def fetch_concurrently(func, items, max_workers: int | None = None, label: str = "请求",
+                       progress_every: int = 50) -> list:
+    """并发执行 func(item)，按输入顺序返回结果
+
+    Args:
+        func: 单个请求函数，接收一个元素并返回结果
+        items: 待处理的元素列表
+        max_workers: 最大并发数，默认使用 Config.FETCH_CONCURRENCY
+        label: 进度日志中的任务名称
+        progress_every: 每完成多少个任务输出一次进度
+
+    Returns:
+        与 items 顺序一致的结果列表，单个任务异常时对应位置为 None
+    """
+    items = list(items)
+    total = len(items)
+    if total == 0:
+        return []
+
+    if max_workers is None:
+        max_workers = getattr(Config, 'FETCH_CONCURRENCY', 10)
+    max_workers = max(1, min(max_workers, total))
+
+    results = [None] * total
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(func, item): idx for idx, item in enumerate(items)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                logger.error(f"{label} {items[idx]} 异常: {e}")
+            done += 1
+            if done % progress_every == 0 or done == total:
+                logger.info(f"已完成{label} {done}/{total} 个...")
+    return results
@@ -16,11 +16,28 @@ class Config:
     TOP_VOLUME_LIMIT = 100  # 只分析成交量前100的币种
     USE_VOLUME_FILTER = True  # 是否启用成交量过滤
     USE_LOCAL_SYMBOLS = False  # True=只用本地币种，False=用API获取币种
+    AUTO_BACKFILL_OI_HISTORY = True  # 历史数据不足时自动从openInterestHist回填
+    OI_HISTORY_BACKEND = os.getenv('OI_HISTORY_BACKEND', 'columnar').lower()  # OI历史存储后端: columnar / jsonl / sqlite
+    OI_COLD_RETENTION_DAYS = int(os.getenv('OI_COLD_RETENTION_DAYS', '365'))  # 超过10天的OI历史压缩为冷数据的保留天数，0=直接删除
+    OI_SURGE_BUCKET = os.getenv('OI_SURGE_BUCKET', '4h').lower()  # OI激增比率的时间桶: 1h / 4h / 1d，raw=按原始样本计算
+    OI_SURGE_AGGREGATION = 'last'  # 桶内聚合方式: last=取最后一个值, mean=取均值
+    OI_SURGE_MAX_FILL_BUCKETS = int(os.getenv('OI_SURGE_MAX_FILL_BUCKETS', '1'))  # 空桶最多沿用几个桶之前的值，超出（例如停止采集的币种）比率为空值
+    ENABLE_OI_RATIO_CACHE = os.getenv('ENABLE_OI_RATIO_CACHE', 'true').lower() == 'true'  # 最新样本未变化时复用上次计算的OI比率
+    OI_RATIO_CACHE_FILE = 'oi_history_cache.json'  # OI比率缓存文件
+    ENABLE_MARKET_SNAPSHOT_STORE = True  # 是否保存每次运行的市场快照（价格、成交额、资金费率、OI、市值）
+    MARKET_SNAPSHOT_DIR = 'market_snapshots'  # 市场快照存储目录
+    ENABLE_PRESET_COMPARISON = os.getenv('ENABLE_PRESET_COMPARISON', 'true').lower() == 'true'  # 报告中对比保守/平衡/激进预设各自触发的信号
     
     # API调用配置
-    API_DELAY = 0.1  # API调用间隔（秒）
-    MAX_RETRIES = 3  # 最大重试次数
+    BINANCE_WEIGHT_LIMIT = 2400  # 币安合约每分钟请求权重上限
+    BINANCE_WEIGHT_SAFETY_RATIO = 0.9  # 限速器使用的额度比例，预留部分给同IP其他进程
+    MAX_RETRIES = 3  # 最大重试次数（限频响应）
     REQUEST_TIMEOUT = 30  # 请求超时时间（秒）
+    FETCH_CONCURRENCY = int(os.getenv('FETCH_CONCURRENCY', '20'))  # 并发请求数上限
+    HTTP_POOL_SIZE = FETCH_CONCURRENCY  # 每个主机的keep-alive连接池大小，与并发数保持一致
+    HTTP_CONNECT_TIMEOUT = 5  # 建立连接超时时间（秒）
+    ENABLE_HTTP_CACHE = os.getenv('ENABLE_HTTP_CACHE', 'true').lower() == 'true'  # 是否缓存全市场接口响应
+    HTTP_CACHE_DIR = '.http_cache'  # 响应缓存磁盘目录
     
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+共享HTTP客户端
+每个主机复用一个带连接池的 keep-alive 会话，避免每次请求重新进行 TCP/TLS 握手
+"""
+import logging
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def default_timeout() -> tuple:
+    """统一的 (连接超时, 读取超时)"""
+    return (getattr(Config, 'HTTP_CONNECT_TIMEOUT', 5), getattr(Config, 'REQUEST_TIMEOUT', 30))
+
+
+def get_session(url: str) -> requests.Session:
+    """获取目标主机的共享会话，首次访问时创建"""
+    parts = urlsplit(url)
+    host_key = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(host_key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(host_key)
+        if session is None:
+            pool_size = getattr(Config, 'HTTP_POOL_SIZE', getattr(Config, 'FETCH_CONCURRENCY', 10))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount(f"{parts.scheme}://", adapter)
+            _sessions[host_key] = session
+            logger.debug(f"为 {host_key} 创建共享HTTP会话，连接池大小 {pool_size}")
+    return session
+
+
+def http_get(url: str, params: dict | None = None, timeout=None, **kwargs) -> requests.Response:
+    """通过共享会话发送GET请求"""
+    return get_session(url).get(url, params=params, timeout=timeout or default_timeout(), **kwargs)
+
+
+def http_post(url: str, timeout=None, **kwargs) -> requests.Response:
+    """通过共享会话发送POST请求"""
+    return get_session(url).post(url, timeout=timeout or default_timeout(), **kwargs)
+
+
+def close_sessions():
+    """关闭所有共享会话（进程退出前调用）"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+单次运行的市场快照
+每个运行周期只请求一次 ticker、资金费率和OI，
+生成不可变快照后同时供信号分析和OI历史记录使用
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping
+from config import Config
+from binance_api import binance_get_json, TICKER_24HR_PATH, PREMIUM_INDEX_PATH
+from concurrent_fetcher import fetch_concurrently
+from oi_history_collector import OIHistoryCollector
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """不可变的市场快照
+
+    Attributes:
+        created_at: 快照生成时间（ISO格式）
+        markets: 币种 -> 行情字段（price、quote_volume_24h、funding_rate、price_change_percent_24h），
+                 按24h成交额降序排列
+        open_interest: 币种 -> OI记录（与OI历史数据的记录格式一致）
+    """
+    created_at: str
+    markets: Mapping[str, Mapping] = field(default_factory=lambda: MappingProxyType({}))
+    open_interest: Mapping[str, Mapping] = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def symbols(self) -> list:
+        """快照中的币种（按成交额降序）"""
+        return list(self.markets.keys())
+
+    def to_records(self) -> list:
+        """转换为行情记录列表，open_interest 为 OI数量，open_interest_value 为 OI数量 × 价格"""
+        records = []
+        for symbol, market in self.markets.items():
+            oi_record = self.open_interest.get(symbol)
+            oi_amount = oi_record['openInterest'] if oi_record else 0.0
+            records.append({
+                'symbol': symbol,
+                **market,
+                'open_interest': oi_amount,
+                'open_interest_value': oi_amount * market['price'],
+            })
+        return records
+
+    def oi_history_records(self, symbols: list | None = None) -> dict:
+        """获取可直接写入OI历史数据的记录"""
+        if symbols is None:
+            return {symbol: dict(record) for symbol, record in self.open_interest.items()}
+        return {symbol: dict(self.open_interest[symbol]) for symbol in symbols if symbol in self.open_interest}
+
+
+def build_market_snapshot(symbols: list, top_n: int | None = None,
+                          oi_collector: OIHistoryCollector | None = None) -> MarketSnapshot:
+    """请求一次行情、资金费率和成交额前N币种的OI，生成市场快照"""
+    tickers = binance_get_json(TICKER_24HR_PATH, timeout=10) or []
+    ticker_map = {t['symbol']: t for t in tickers}
+    # 获取所有币种资金费率
+    funding_data = binance_get_json(PREMIUM_INDEX_PATH, timeout=10) or []
+    funding_map = {f['symbol']: float(f.get('lastFundingRate', 0)) for f in funding_data}
+
+    # 先筛选有行情的币种
+    markets = {}
+    for symbol in symbols:
+        usdt_pair = symbol + 'USDT'
+        t = ticker_map.get(usdt_pair)
+        if not t:
+            continue
+        markets[symbol] = {
+            'price': float(t['lastPrice']),
+            'quote_volume_24h': float(t['quoteVolume']),
+            'funding_rate': funding_map.get(usdt_pair, 0),
+            'price_change_percent_24h': float(t.get('priceChangePercent', 0)) / 100,
+        }
+
+    # 按成交额降序取前N
+    if top_n is None:
+        top_n = getattr(Config, 'TOP_VOLUME_LIMIT', 100)
+    top_symbols = sorted(markets, key=lambda s: markets[s]['quote_volume_24h'], reverse=True)[:top_n]
+
+    # 只对前N采集OI（并发请求，结果顺序与输入一致）
+    oi_collector = oi_collector or OIHistoryCollector()
+    oi_results = fetch_concurrently(
+        oi_collector.get_current_oi,
+        [symbol + 'USDT' for symbol in top_symbols],
+        label="获取OI",
+    )
+    open_interest = {
+        symbol: MappingProxyType(record)
+        for symbol, record in zip(top_symbols, oi_results) if record
+    }
+
+    logger.info(f"市场快照已生成: {len(top_symbols)} 个币种，{len(open_interest)} 个币种有OI数据")
+    return MarketSnapshot(
+        created_at=datetime.now().isoformat(),
+        markets=MappingProxyType({symbol: MappingProxyType(markets[symbol]) for symbol in top_symbols}),
+        open_interest=MappingProxyType(open_interest),
+    )
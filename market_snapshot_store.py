@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+市场快照存储
+每次运行把分析用的完整行情数据（价格、成交额、资金费率、OI、流通量、市值、OI激增比率）
+按列追加到按天分区的列式文件中（见 columnar_file.py），每个币种每次运行一行，列为固定类型的数组。
+按时间范围读取时只内存映射相关日期的分区，分区内按运行时间二分查找后直接切片，可再按币种过滤，
+供后续分析复用而不需要重新请求API
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from columnar_file import open_columns, write_columns
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'snapshot_'
+PARTITION_SUFFIX = '.oicol'
+LEGACY_SUFFIX = '.npz'  # 早期版本的 np.savez 分区，仍可读取
+SYMBOL_DTYPE = '<U20'
+
+# 列名 -> 类型；缺失值为 NaN
+SNAPSHOT_COLUMNS = {
+    'price': np.float64,
+    'quote_volume_24h': np.float64,
+    'funding_rate': np.float64,
+    'price_change_percent_24h': np.float64,
+    'open_interest': np.float64,  # OI数量（合约张数/币数）
+    'open_interest_value': np.float64,  # OI名义价值（USDT）
+    'supply': np.float64,
+    'market_cap_estimate': np.float64,
+    'oi_surge_ratio': np.float64,
+}
+
+
+def _day_of(run_ts: int) -> str:
+    return datetime.fromtimestamp(run_ts / 1000).strftime('%Y-%m-%d')
+
+
+class MarketSnapshotStore:
+    """按天分区的列式市场快照存储"""
+
+    def __init__(self, data_dir: str = "market_snapshots"):
+        self.data_dir = data_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def partition_path(self, day: str) -> str:
+        return os.path.join(self.data_dir, f"{PARTITION_PREFIX}{day}{PARTITION_SUFFIX}")
+
+    def legacy_path(self, day: str) -> str:
+        return os.path.join(self.data_dir, f"{PARTITION_PREFIX}{day}{LEGACY_SUFFIX}")
+
+    def list_days(self) -> list:
+        """所有快照分区日期（升序）"""
+        days = set()
+        for filename in os.listdir(self.data_dir):
+            if not filename.startswith(PARTITION_PREFIX):
+                continue
+            for suffix in (PARTITION_SUFFIX, LEGACY_SUFFIX):
+                if filename.endswith(suffix):
+                    days.add(filename[len(PARTITION_PREFIX):-len(suffix)])
+        return sorted(days)
+
+    # ==================== 写入 ====================
+
+    @staticmethod
+    def _frame_to_columns(df: pd.DataFrame, run_ts: int) -> dict:
+        columns = {
+            'run_ts': np.full(len(df), run_ts, dtype=np.int64),
+            'symbol': df['symbol'].astype(str).to_numpy(dtype=SYMBOL_DTYPE),
+        }
+        for name, dtype in SNAPSHOT_COLUMNS.items():
+            if name in df.columns:
+                columns[name] = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=dtype, na_value=np.nan)
+            else:
+                columns[name] = np.full(len(df), np.nan, dtype=dtype)
+        return columns
+
+    def append_run(self, df: pd.DataFrame, run_ts: int | None = None) -> int:
+        """追加一次运行的数据（每个币种一行），返回写入的行数
+
+        Args:
+            df: 分析后的数据（至少包含 symbol 列，缺少的列记为 NaN）
+            run_ts: 本次运行的毫秒时间戳，默认为当前时间；同一运行重复写入时覆盖旧数据
+
+        分区已存在但无法读取（损坏或暂时不可读）时抛出异常且不写入，保留原文件
+        """
+        if df is None or df.empty:
+            return 0
+        if run_ts is None:
+            run_ts = int(datetime.now().timestamp() * 1000)
+        new_columns = self._frame_to_columns(df, run_ts)
+
+        day = _day_of(run_ts)
+        # 分区存在但读取失败时不能写入，否则会用只含本次运行的文件覆盖当天已有的数据
+        existing = self.read_partition(day, strict=True)
+        if existing:
+            keep = existing['run_ts'] != run_ts
+            merged = {name: np.concatenate((existing[name][keep], new_columns[name])) for name in new_columns}
+        else:
+            merged = new_columns
+        # 分区内按运行时间、币种排序，便于二分查找
+        order = np.lexsort((merged['symbol'], merged['run_ts']))
+        merged = {name: values[order] for name, values in merged.items()}
+
+        write_columns(self.partition_path(day), merged)
+        if os.path.exists(self.legacy_path(day)):
+            os.remove(self.legacy_path(day))
+        return len(df)
+
+    # ==================== 读取 ====================
+
+    def read_partition(self, day: str, strict: bool = False) -> dict:
+        """读取一天的快照：列名 -> 数组（内存映射视图），分区不存在时返回空字典
+
+        Args:
+            day: 分区日期
+            strict: 分区存在但读取失败时抛出异常（默认记录错误并返回空字典）
+        """
+        path = self.partition_path(day)
+        try:
+            if os.path.exists(path):
+                columns, _ = open_columns(path)
+            elif os.path.exists(self.legacy_path(day)):
+                with np.load(self.legacy_path(day), allow_pickle=False) as data:
+                    columns = {name: data[name] for name in data.files}
+            else:
+                return {}
+        except Exception as e:
+            if strict:
+                raise
+            logger.error(f"读取快照分区 {day} 失败: {e}")
+            return {}
+        # 旧分区缺少的新列补 NaN
+        for name, dtype in SNAPSHOT_COLUMNS.items():
+            if name not in columns:
+                columns[name] = np.full(len(columns['run_ts']), np.nan, dtype=dtype)
+        return columns
+
+    def read_range(self, start_ms: int | None = None, end_ms: int | None = None,
+                   symbols: list | None = None, columns: list | None = None) -> pd.DataFrame:
+        """读取运行时间在 [start_ms, end_ms) 内的快照
+
+        Args:
+            start_ms: 起始毫秒时间戳，默认不限
+            end_ms: 结束毫秒时间戳（不含），默认不限
+            symbols: 只返回这些币种，默认全部
+            columns: 只返回这些数据列，默认全部
+
+        Returns:
+            包含 run_ts、symbol 和数据列的 DataFrame，按运行时间、币种排序
+        """
+        columns = list(SNAPSHOT_COLUMNS) if columns is None else list(columns)
+        days = self.list_days()
+        if start_ms is not None:
+            first_day = _day_of(start_ms)
+            days = [day for day in days if day >= first_day]
+        if end_ms is not None:
+            last_day = _day_of(end_ms - 1)
+            days = [day for day in days if day <= last_day]
+
+        parts = []
+        symbol_filter = np.asarray(symbols, dtype=SYMBOL_DTYPE) if symbols is not None else None
+        for day in days:
+            partition = self.read_partition(day)
+            if not partition:
+                continue
+            run_ts = partition['run_ts']
+            lo = np.searchsorted(run_ts, start_ms, side='left') if start_ms is not None else 0
+            hi = np.searchsorted(run_ts, end_ms, side='left') if end_ms is not None else len(run_ts)
+            if hi <= lo:
+                continue
+            mask = slice(lo, hi)
+            if symbol_filter is not None:
+                mask = np.arange(lo, hi)[np.isin(partition['symbol'][lo:hi], symbol_filter)]
+            parts.append({name: partition[name][mask] for name in ['run_ts', 'symbol', *columns]})
+
+        if not parts:
+            return pd.DataFrame({name: pd.Series(dtype=np.int64 if name == 'run_ts' else
+                                                 object if name == 'symbol' else SNAPSHOT_COLUMNS[name])
+                                 for name in ['run_ts', 'symbol', *columns]})
+        frame = pd.DataFrame({name: np.concatenate([part[name] for part in parts]) for name in parts[0]})
+        frame['symbol'] = frame['symbol'].astype(object)
+        return frame
+
+    def read_days(self, days: int = 7, symbols: list | None = None, columns: list | None = None) -> pd.DataFrame:
+        """读取最近 days 天的快照"""
+        start = datetime.now() - timedelta(days=days)
+        return self.read_range(int(start.timestamp() * 1000), None, symbols, columns)
+
+    def run_timestamps(self, start_ms: int | None = None, end_ms: int | None = None) -> np.ndarray:
+        """时间范围内所有运行的毫秒时间戳（升序）"""
+        frame = self.read_range(start_ms, end_ms, columns=[])
+        return np.unique(frame['run_ts'].to_numpy())
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+旧版OI历史数据迁移工具
+把 oi_history_data/oi_data_YYYY-MM-DD.json（整天一个JSON文档）和 oi_history_cache.json 中的
+OI样本迁移到当前配置的历史存储后端：
+
+1. 逐个文件流式解析，每次只在内存中保留一个币种的数组，按批写入存储，
+   按 (币种, 时间戳) 去重；每批写入后记录进度，中断后重新运行会从断点继续
+2. 文件迁移完成后才移动到 oi_history_data/legacy/ 暂存，中断时未迁移完的文件仍留在数据目录，
+   jsonl / columnar 存储照常读取
+3. 执行一次存储维护（压缩、归档冷数据），失效重采样桶缓存、比率缓存并重建迁移币种的环形缓冲区，
+   再次流式读取旧文件核对每个 (币种, 时间戳) 都已写入
+
+用法:
+  python migrate_oi_history.py                  # 迁移并核对
+  python migrate_oi_history.py --verify-only    # 只核对
+  python migrate_oi_history.py --delete-legacy  # 核对通过后删除暂存的旧版文件
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+import numpy as np
+from config import Config
+from oi_history_index import OIHistoryIndex
+from oi_history_store import create_history_store, day_end_ms
+from oi_ratio_cache import OIRatioCache
+from oi_resampler import OIResampler
+from oi_ring_buffer import OIRingBufferStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LEGACY_PATTERN_PREFIX = 'oi_data_'
+LEGACY_SUFFIX = '.json'
+LEGACY_DIR = 'legacy'
+STATE_FILE = 'migration_state.json'
+CHUNK_SIZE = 1 << 20
+RATIO_HISTORY_DAYS = 7  # 与 OIHistoryCollector.history_index_days 一致
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+
+class StreamingJsonObjectReader:
+    """增量解析顶层为对象的JSON文档，逐个产出 (键, 数组值)
+
+    顶层值为对象时向下展开一层（例如 {"data": {"BTC": [...]}}），
+    缓冲区只需容纳当前正在解析的一个值，与文件总大小无关
+    """
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int | None = None):
+        # 丢弃已解析部分，避免缓冲区随文件增长
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buffer += chunk
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos] if self.pos < len(self.buffer) else ''
+            self._fill()
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise ValueError(f"JSON格式错误：期望 '{char}'，实际为 '{self._peek()}'")
+        self.pos += 1
+
+    def _decode(self):
+        """解析一个完整的值，缓冲区不足时成倍读取更多内容"""
+        while True:
+            self._peek()
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # 数字可能被块边界截断（例如只读到 "123."），后面还紧跟数字字符或到达缓冲区末尾时再读一些确认
+                truncated = end == len(self.buffer) or (
+                    isinstance(value, (int, float)) and self.buffer[end] in NUMBER_CHARS)
+                if not truncated or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(max(self.chunk_size, len(self.buffer) - self.pos))
+
+    def _iter_object(self, depth: int):
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self._decode()
+            self._expect(':')
+            if self._peek() == '{' and depth > 0:
+                yield from self._iter_object(depth - 1)
+            else:
+                value = self._decode()
+                if isinstance(value, list):
+                    yield key, value
+            separator = self._peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"JSON格式错误：期望 ',' 或 '}}'，实际为 '{separator}'")
+
+    def items(self):
+        yield from self._iter_object(depth=1)
+
+
+def iter_legacy_items(path: str):
+    """流式读取旧版文件，逐个产出 (币种, 有效OI记录列表)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for symbol, values in StreamingJsonObjectReader(f).items():
+            records = []
+            for item in values:
+                if not isinstance(item, dict):
+                    continue
+                try:
+                    records.append({
+                        'symbol': item.get('symbol', symbol + 'USDT'),
+                        'openInterest': float(item['openInterest']),
+                        'timestamp': int(item['timestamp']),
+                        'collect_time': item.get('collect_time'),
+                    })
+                except (KeyError, TypeError, ValueError):
+                    continue
+            yield symbol, records
+
+
+class LegacyHistoryMigrator:
+    """旧版OI历史数据迁移"""
+
+    def __init__(self, data_dir: str = "oi_history_data", cache_file: str = "oi_history_cache.json",
+                 backend: str | None = None, batch_rows: int = 200_000):
+        self.data_dir = data_dir
+        self.legacy_dir = os.path.join(data_dir, LEGACY_DIR)
+        self.cache_file = cache_file
+        self.batch_rows = batch_rows
+        self.state_path = os.path.join(self.legacy_dir, STATE_FILE)
+        # 迁移期间旧版文件仍在数据目录中，存储不读取它们，去重只针对已写入存储的数据
+        self.store = create_history_store(
+            data_dir, 10, backend=backend, cold_retention_days=Config.OI_COLD_RETENTION_DAYS, read_legacy=False)
+
+    # ==================== 旧版文件 ====================
+
+    @staticmethod
+    def _legacy_files(directory: str) -> list:
+        if not os.path.isdir(directory):
+            return []
+        return [
+            os.path.join(directory, filename)
+            for filename in os.listdir(directory)
+            if filename.startswith(LEGACY_PATTERN_PREFIX) and filename.endswith(LEGACY_SUFFIX)
+        ]
+
+    def source_files(self) -> list:
+        """待迁移的文件：暂存目录和数据目录中的旧版文件（按文件名排序）+ oi_history_cache.json"""
+        files = sorted(self._legacy_files(self.legacy_dir) + self._legacy_files(self.data_dir),
+                       key=os.path.basename)
+        if self.cache_file and os.path.exists(self.cache_file):
+            files.append(self.cache_file)
+        return files
+
+    def stage_file(self, path: str):
+        """把迁移完成的旧版文件移动到暂存目录（之后只由迁移工具读取）"""
+        if os.path.dirname(path) != self.data_dir or not os.path.exists(path):
+            return
+        os.makedirs(self.legacy_dir, exist_ok=True)
+        os.replace(path, os.path.join(self.legacy_dir, os.path.basename(path)))
+
+    def _load_state(self) -> dict:
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"读取迁移进度失败，将重新迁移: {e}")
+        return {'files': {}}
+
+    def _save_state(self, state: dict):
+        os.makedirs(self.legacy_dir, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _file_signature(path: str) -> list:
+        stat = os.stat(path)
+        return [stat.st_size, int(stat.st_mtime)]
+
+    # ==================== 迁移 ====================
+
+    def _flush(self, batch: dict, state: dict) -> int:
+        # 批内按 (币种, 时间戳) 去重，已存在于存储中的记录由 skip_existing 跳过
+        deduped = {
+            symbol: list({record['timestamp']: record for record in records}.values())
+            for symbol, records in batch.items()
+        }
+        written = self.store.append(deduped, skip_existing=True)
+        if written:
+            # 记录写入过数据的币种，迁移结束后失效其派生缓存（随进度保存，中断后不会遗漏）
+            state['pending_symbols'] = sorted(set(state.get('pending_symbols', [])) | set(deduped))
+        return written
+
+    def migrate_file(self, path: str, state: dict) -> dict:
+        """迁移单个文件，每批写入后保存进度；返回该文件的统计"""
+        name = os.path.basename(path)
+        signature = self._file_signature(path)
+        progress = state['files'].get(name)
+        if progress is None or progress.get('signature') != signature:
+            progress = {'signature': signature, 'items_done': 0, 'rows_read': 0, 'rows_written': 0, 'done': False}
+        if progress['done']:
+            return progress
+        state['files'][name] = progress
+
+        skip_items = progress['items_done']
+        batch, batch_rows, items = {}, 0, 0
+        for symbol, records in iter_legacy_items(path):
+            items += 1
+            if items <= skip_items:
+                continue
+            batch.setdefault(symbol, []).extend(records)
+            batch_rows += len(records)
+            progress['rows_read'] += len(records)
+            if batch_rows >= self.batch_rows:
+                progress['rows_written'] += self._flush(batch, state)
+                progress['items_done'] = items
+                self._save_state(state)
+                batch, batch_rows = {}, 0
+        if batch:
+            progress['rows_written'] += self._flush(batch, state)
+        progress['items_done'] = items
+        progress['done'] = True
+        self._save_state(state)
+        logger.info(f"{name}: 读取 {progress['rows_read']} 条，新写入 {progress['rows_written']} 条")
+        return progress
+
+    def migrate(self) -> dict:
+        """迁移全部旧版文件，返回汇总统计"""
+        state = self._load_state()
+        totals = {'files': 0, 'rows_read': 0, 'rows_written': 0}
+        for path in self.source_files():
+            if not os.path.exists(path):
+                # 迁移期间采集进程的存储压缩可能已把该文件并入追加日志
+                continue
+            progress = self.migrate_file(path, state)
+            self.stage_file(path)
+            totals['files'] += 1
+            totals['rows_read'] += progress['rows_read']
+            totals['rows_written'] += progress['rows_written']
+        # 迁移的数据按存储策略压缩、归档
+        if hasattr(self.store, 'run_maintenance'):
+            self.store.wait_for_compaction()
+            self.store.run_maintenance()
+        else:
+            self.store.cleanup()
+        if state.get('pending_symbols'):
+            self.refresh_derived_caches(state['pending_symbols'])
+            state['pending_symbols'] = []
+            self._save_state(state)
+        return totals
+
+    def refresh_derived_caches(self, symbols: list):
+        """迁移写入的多为旧样本，与回填一样失效已结束桶缓存和比率缓存，并用历史索引重建环形缓冲区"""
+        if Config.OI_SURGE_BUCKET != 'raw':
+            cache_file = os.path.join(self.data_dir, f'oi_buckets_{Config.OI_SURGE_BUCKET}.npz')
+            if os.path.exists(cache_file):
+                resampler = OIResampler(Config.OI_SURGE_BUCKET, Config.OI_SURGE_AGGREGATION, cache_file=cache_file)
+                resampler.invalidate(symbols)
+                resampler.save_cache()
+        ratio_cache = OIRatioCache(Config.OI_RATIO_CACHE_FILE)
+        ratio_cache.load()
+        # 旧版格式的 oi_history_cache.json 没有缓存条目，保留原文件供核对
+        if ratio_cache.entries:
+            ratio_cache.invalidate(symbols)
+            ratio_cache.save()
+        ring_buffers = OIRingBufferStore(os.path.join(self.data_dir, 'oi_ring_buffer.bin'),
+                                         max_age_ms=RATIO_HISTORY_DAYS * 86_400_000)
+        # 缓冲区文件不存在时采集器首次运行会用历史索引初始化
+        if ring_buffers.load():
+            ring_buffers.seed_from_index(OIHistoryIndex.from_store(self.store, RATIO_HISTORY_DAYS), symbols)
+            ring_buffers.save()
+        logger.info(f"已失效 {len(symbols)} 个迁移币种的重采样桶缓存、比率缓存并重建环形缓冲区")
+
+    # ==================== 核对 ====================
+
+    def _retention_cutoff_ms(self) -> int:
+        cold = getattr(self.store, 'cold', None)
+        retention_days = max(self.store.max_history_days, cold.retention_days if cold is not None else 0)
+        cutoff_day = (datetime.now() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+        return int(datetime.strptime(cutoff_day, '%Y-%m-%d').timestamp() * 1000)
+
+    def verify(self) -> dict:
+        """再次流式读取旧版文件，核对每个 (币种, 时间戳) 在存储中都存在
+
+        逐个文件核对，文件内的时间戳按天切分后每次只读取存储中的一天，
+        内存中只保留一个文件的时间戳和一天的存储数据，与积压数据的总量无关。
+        超出存储保留期的记录按保留策略不会保存，单独统计为 expired；
+        unique_rows 为各文件内去重后的条数之和
+        """
+        cutoff_ms = self._retention_cutoff_ms()
+        result = {'symbols': 0, 'unique_rows': 0, 'expired_rows': 0, 'found_rows': 0, 'missing_rows': 0}
+        symbols = set()
+        for path in self.source_files():
+            self._verify_file(path, cutoff_ms, result, symbols)
+        result['symbols'] = len(symbols)
+        return result
+
+    def _verify_file(self, path: str, cutoff_ms: int, result: dict, symbols: set):
+        """核对单个旧版文件，统计累加到 result"""
+        expected = {}
+        for symbol, records in iter_legacy_items(path):
+            if records:
+                expected.setdefault(symbol, []).append(
+                    np.fromiter((r['timestamp'] for r in records), dtype=np.int64, count=len(records)))
+        symbols.update(expected)
+
+        # 日期 -> 币种 -> 当天需要核对的时间戳（已排序）
+        by_day = {}
+        for symbol, parts in expected.items():
+            timestamps = np.unique(np.concatenate(parts))
+            live = timestamps[timestamps >= cutoff_ms]
+            result['unique_rows'] += len(timestamps)
+            result['expired_rows'] += len(timestamps) - len(live)
+            while len(live):
+                day = datetime.fromtimestamp(live[0] / 1000).strftime('%Y-%m-%d')
+                split = np.searchsorted(live, day_end_ms(day), side='left')
+                by_day.setdefault(day, {})[symbol] = live[:split]
+                live = live[split:]
+        expected = None
+
+        for day in sorted(by_day):
+            stored = self.store.read_day(day)
+            for symbol, live in by_day.pop(day).items():
+                records = stored.get(symbol, [])
+                stored_ts = np.fromiter((r['timestamp'] for r in records), dtype=np.int64, count=len(records))
+                found = int(np.isin(live, stored_ts).sum())
+                result['found_rows'] += found
+                result['missing_rows'] += len(live) - found
+
+    def delete_legacy(self):
+        """删除暂存的旧版文件（oi_history_cache.json 保留）"""
+        if os.path.isdir(self.legacy_dir):
+            shutil.rmtree(self.legacy_dir)
+            logger.info(f"已删除 {self.legacy_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='旧版OI历史数据迁移工具')
+    parser.add_argument('--data-dir', default='oi_history_data', help='OI历史数据目录')
+    parser.add_argument('--cache-file', default='oi_history_cache.json', help='旧版缓存文件，空字符串表示不迁移')
+    parser.add_argument('--backend', default=None, help='目标存储后端，默认使用 Config.OI_HISTORY_BACKEND')
+    parser.add_argument('--batch-rows', type=int, default=200_000, help='每批写入的记录数（决定内存占用）')
+    parser.add_argument('--verify-only', action='store_true', help='只核对，不迁移')
+    parser.add_argument('--delete-legacy', action='store_true', help='核对通过后删除暂存的旧版文件')
+    args = parser.parse_args()
+
+    migrator = LegacyHistoryMigrator(args.data_dir, args.cache_file, args.backend, args.batch_rows)
+    if not args.verify_only:
+        totals = migrator.migrate()
+        print(f"迁移完成: {totals['files']} 个文件，读取 {totals['rows_read']} 条，新写入 {totals['rows_written']} 条")
+
+    result = migrator.verify()
+    print(f"核对: {result['symbols']} 个币种，去重后 {result['unique_rows']} 条，"
+          f"已写入 {result['found_rows']} 条，超出保留期 {result['expired_rows']} 条，缺失 {result['missing_rows']} 条")
+    if result['missing_rows']:
+        print("❌ 核对未通过，旧版文件已保留，可重新运行迁移")
+        return 1
+    print("✅ 核对通过")
+    if args.delete_legacy:
+        migrator.delete_legacy()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+OI历史冷数据层
+超过热数据保留期的分区按天压缩为 cold/oi_cold_YYYY-MM-DD.json.gz，保留期远长于热数据。
+每个文件由JSON头（币种表、每个币种的样本数）和二进制数据组成：时间戳和OI用 oi_series_codec 的
+Gorilla 风格编码，采集时间存为相对时间戳的微秒偏移（varint），再整体 gzip 压缩，
+读取时透明解压还原为原始记录。早期版本的纯JSON格式（version 1）仍可读取
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from oi_series_codec import decode_series, encode_series, varint_decode, varint_encode, zigzag_decode, zigzag_encode
+
+logger = logging.getLogger(__name__)
+
+COLD_PREFIX = 'oi_cold_'
+COLD_SUFFIX = '.json.gz'
+COLD_FORMAT_VERSION = 2
+
+
+def _timestamp_base(timestamp: int) -> datetime:
+    return datetime.fromtimestamp(timestamp // 1000) + timedelta(milliseconds=timestamp % 1000)
+
+
+def _encode_collect_time(timestamp: int, collect_time):
+    """采集时间编码为相对时间戳的微秒偏移，无法精确还原时保留原字符串"""
+    if not isinstance(collect_time, str):
+        return None
+    try:
+        base = _timestamp_base(timestamp)
+        offset = (datetime.fromisoformat(collect_time) - base) // timedelta(microseconds=1)
+        if (base + timedelta(microseconds=offset)).isoformat() == collect_time:
+            return offset
+    except (ValueError, TypeError, OverflowError):
+        pass
+    return collect_time
+
+
+def _decode_collect_time(timestamp: int, encoded):
+    if isinstance(encoded, int):
+        return (_timestamp_base(timestamp) + timedelta(microseconds=encoded)).isoformat()
+    return encoded
+
+
+def encode_day(data: dict) -> bytes:
+    """把一天的数据（币种 -> 按时间排序的记录列表）编码为压缩字节串"""
+    bases = sorted(symbol for symbol, records in data.items() if records)
+    pairs, counts, timestamps, values, collect_times = [], [], [], [], []
+    for base in bases:
+        records = data[base]
+        pairs.append(records[-1].get('symbol', base + 'USDT'))
+        counts.append(len(records))
+        for record in records:
+            timestamp = int(record['timestamp'])
+            timestamps.append(timestamp)
+            values.append(float(record['openInterest']))
+            collect_times.append(_encode_collect_time(timestamp, record.get('collect_time')))
+
+    # 采集时间：能还原的存微秒偏移，其余（None 或原字符串）按位置记录在头中
+    offsets = np.zeros(len(collect_times), dtype=np.int64)
+    raw_collect_times = {}
+    for i, encoded in enumerate(collect_times):
+        if isinstance(encoded, int):
+            offsets[i] = encoded
+        else:
+            raw_collect_times[str(i)] = encoded
+    series = encode_series(np.asarray(timestamps, dtype=np.int64), np.asarray(values, dtype=np.float64))
+    header = {
+        'version': COLD_FORMAT_VERSION,
+        'bases': bases,
+        'symbols': pairs,
+        'counts': counts,
+        'series_bytes': len(series),
+        'raw_collect_time': raw_collect_times,
+    }
+    raw = (json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+           + series + varint_encode(zigzag_encode(offsets)))
+    return gzip.compress(raw, compresslevel=9, mtime=0)
+
+
+def _decode_v1(payload: dict) -> tuple:
+    timestamps = np.cumsum(np.asarray(payload['timestamps'], dtype=np.int64)).tolist()
+    scale = payload['scale']
+    if scale is None:
+        values = payload['open_interest']
+    else:
+        ints = np.cumsum(np.asarray(payload['open_interest'], dtype=np.int64))
+        values = (ints / 10.0 ** scale).tolist()
+    return timestamps, values, payload['collect_time']
+
+
+def _decode_v2(header: dict, body: bytes) -> tuple:
+    series_bytes = header['series_bytes']
+    timestamps, values = decode_series(body[:series_bytes])
+    collect_times = zigzag_decode(varint_decode(body[series_bytes:])).tolist()
+    for position, raw in header['raw_collect_time'].items():
+        collect_times[int(position)] = raw
+    return timestamps.tolist(), values.tolist(), collect_times
+
+
+def decode_day(blob: bytes) -> dict:
+    """解码 encode_day 的结果，返回 币种 -> 按时间排序的记录列表"""
+    raw = gzip.decompress(blob)
+    # version 1 是单个JSON对象（不含换行），version 2 是一行JSON头加二进制数据
+    head, _, body = raw.partition(b'\n')
+    header = json.loads(head)
+    if header.get('version') == 1:
+        timestamps, values, collect_times = _decode_v1(header)
+    elif header.get('version') == COLD_FORMAT_VERSION:
+        timestamps, values, collect_times = _decode_v2(header, body)
+    else:
+        raise ValueError(f"不支持的冷数据版本: {header.get('version')}")
+
+    data = {}
+    offset = 0
+    for base, pair, count in zip(header['bases'], header['symbols'], header['counts']):
+        data[base] = [
+            {
+                'symbol': pair,
+                'openInterest': values[i],
+                'timestamp': timestamps[i],
+                'collect_time': _decode_collect_time(timestamps[i], collect_times[i]),
+            }
+            for i in range(offset, offset + count)
+        ]
+        offset += count
+    return data
+
+
+class ColdHistoryTier:
+    """按天压缩存储的冷数据分区"""
+
+    def __init__(self, cold_dir: str, retention_days: int = 365):
+        self.cold_dir = cold_dir
+        self.retention_days = retention_days
+        os.makedirs(self.cold_dir, exist_ok=True)
+
+    def path(self, day: str) -> str:
+        return os.path.join(self.cold_dir, f"{COLD_PREFIX}{day}{COLD_SUFFIX}")
+
+    def list_days(self) -> list:
+        """所有冷数据分区日期（升序）"""
+        return sorted(
+            filename[len(COLD_PREFIX):-len(COLD_SUFFIX)]
+            for filename in os.listdir(self.cold_dir)
+            if filename.startswith(COLD_PREFIX) and filename.endswith(COLD_SUFFIX)
+        )
+
+    def read_day(self, day: str) -> dict:
+        """读取（解压）一天的冷数据，不存在时返回空字典"""
+        path = self.path(day)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'rb') as f:
+                return decode_day(f.read())
+        except Exception as e:
+            logger.error(f"读取冷数据 {path} 失败: {e}")
+            return {}
+
+    def write_day(self, day: str, data: dict) -> int:
+        """把一天的数据并入冷数据分区（同一时间戳以新数据为准），返回写入的记录数"""
+        merged = self.read_day(day)
+        for symbol, records in data.items():
+            unique = {record['timestamp']: record for record in merged.get(symbol, [])}
+            unique.update((record['timestamp'], record) for record in records)
+            merged[symbol] = [unique[ts] for ts in sorted(unique)]
+        path = self.path(day)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(encode_day(merged))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return sum(len(records) for records in data.values())
+
+    def cleanup(self) -> int:
+        """删除超过冷数据保留期的分区，返回删除的文件数"""
+        cutoff_day = (datetime.now() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        deleted_count = 0
+        for day in self.list_days():
+            if day >= cutoff_day:
+                break
+            try:
+                os.remove(self.path(day))
+                deleted_count += 1
+            except Exception as e:
+                logger.warning(f"删除冷数据 {day} 时出错: {e}")
+        if deleted_count > 0:
+            logger.info(f"删除了 {deleted_count} 个过期冷数据分区，仅保留最近{self.retention_days}天数据")
+        return deleted_count
+
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(self.path(day)) for day in self.list_days())
@@ -3,7 +3,6 @@
 OI历史数据收集器
 定期收集币安永续合约的当前OI数据并保存，用于历史数据分析
 """
-import requests
 import pandas as pd
 import time
 import logging
@@ -11,6 +10,14 @@ from datetime import datetime, timedelta
 import json
 import os
 from config import Config
+from binance_api import binance_get, OPEN_INTEREST_PATH, OPEN_INTEREST_HIST_PATH
+from concurrent_fetcher import fetch_concurrently
+from symbol_registry import SymbolRegistry
+from oi_history_store import create_history_store
+from oi_history_index import OIHistoryIndex
+from oi_ring_buffer import OIRingBufferStore
+from oi_resampler import OIResampler
+from oi_ratio_cache import OIRatioCache
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,43 +27,44 @@ class OIHistoryCollector:
     """OI历史数据收集器"""
     
     def __init__(self):
-        self.base_url = "https://fapi.binance.com/fapi/v1"
         self.history_data_dir = "oi_history_data"
         self.cache_duration_hours = 1  # 缓存1小时
-        self.max_history_days = 10  # 最多保留10天的历史数据
+        self.max_history_days = 10  # 热数据（未压缩）保留10天，更早的数据压缩为冷数据
+        self.cold_retention_days = Config.OI_COLD_RETENTION_DAYS  # 冷数据保留天数，0=直接删除
         self.valid_symbols_cache_file = "valid_symbols_cache.json"
         self.symbols_cache_duration = 24  # 币种列表缓存24小时
-        
-        # 确保数据目录存在
-        if not os.path.exists(self.history_data_dir):
-            os.makedirs(self.history_data_dir)
+        self.symbol_registry = SymbolRegistry()
+        # OI历史存储后端（jsonl 或 sqlite，会自动创建数据目录）
+        self.history_store = create_history_store(
+            self.history_data_dir, self.max_history_days, cold_retention_days=self.cold_retention_days)
+        self.history_index_days = 7  # 比率计算使用的历史天数
+        self._history_index = None  # 本次运行的内存索引，首次使用时构建
+        self._range_index = None  # 范围查询超出上面索引时使用的更长时间范围索引
+        # 每个币种最近10个样本的环形缓冲区，激增比率直接从这里读取
+        self.ring_buffers = OIRingBufferStore(os.path.join(self.history_data_dir, 'oi_ring_buffer.bin'),
+                                              max_age_ms=self.history_index_days * 86_400_000)
+        # 按固定时间桶计算激增比率，比率不受采集频率影响（raw 表示按原始样本计算）
+        self.resampler = None
+        if Config.OI_SURGE_BUCKET != 'raw':
+            self.resampler = OIResampler(
+                Config.OI_SURGE_BUCKET, Config.OI_SURGE_AGGREGATION,
+                cache_file=os.path.join(self.history_data_dir, f'oi_buckets_{Config.OI_SURGE_BUCKET}.npz'),
+                max_fill_buckets=Config.OI_SURGE_MAX_FILL_BUCKETS,
+            )
+        # 按 (币种, 最新样本时间戳) 缓存的比率，两次采集之间重复运行时不再重新计算
+        self.ratio_cache = OIRatioCache(Config.OI_RATIO_CACHE_FILE) if Config.ENABLE_OI_RATIO_CACHE else None
     
     def get_all_futures_symbols(self) -> list:
         """获取所有永续合约交易对"""
-        try:
-            url = f"{self.base_url}/exchangeInfo"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                symbols = []
-                
-                for symbol_info in data.get('symbols', []):
-                    # 只获取永续合约且状态为TRADING的USDT交易对
-                    if (symbol_info.get('status') == 'TRADING' and 
-                        symbol_info.get('contractType') == 'PERPETUAL' and
-                        symbol_info.get('quoteAsset') == 'USDT'):
-                        symbols.append(symbol_info['symbol'])
-                
-                logger.info(f"成功获取 {len(symbols)} 个有效永续合约交易对")
-                return symbols
-            else:
-                logger.error(f"获取交易对信息失败: {response.status_code}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"获取交易对信息异常: {e}")
+        payload = self.symbol_registry.fetch_exchange_info()
+        if payload is None:
             return []
+        symbols = [
+            symbol for symbol, info in self.symbol_registry.parse_exchange_info(payload).items()
+            if self.symbol_registry.is_tradable(info)
+        ]
+        logger.info(f"成功获取 {len(symbols)} 个有效永续合约交易对")
+        return symbols
     
     def check_symbol_validity(self, symbol: str) -> bool:
         """检查单个币种是否有效"""
@@ -85,34 +93,14 @@ class OIHistoryCollector:
             except Exception as e:
                 logger.warning(f"读取币种缓存失败: {e}")
         
-        # 获取所有永续合约交易对
-        all_symbols = self.get_all_futures_symbols()
-        if not all_symbols:
+        # 一次 exchangeInfo 请求刷新注册表，只探测新币种和状态不明确的币种
+        events = self.symbol_registry.refresh(probe=self.check_symbol_validity)
+        if events is None or not self.symbol_registry.symbols:
             logger.error("无法获取交易对列表，使用默认列表")
             return []
         
-        # 检查每个币种的有效性
-        valid_symbols = []
-        total = len(all_symbols)
-        
-        logger.info(f"开始检查 {total} 个币种的有效性...")
-        
-        for idx, symbol in enumerate(all_symbols, 1):
-            try:
-                # 移除USDT后缀进行检查
-                base_symbol = symbol.replace('USDT', '')
-                
-                if self.check_symbol_validity(symbol):
-                    valid_symbols.append(base_symbol)
-                
-                if idx % 20 == 0 or idx == total:
-                    logger.info(f"已检查币种有效性 {idx}/{total}，有效币种: {len(valid_symbols)}")
-                
-                # 避免API速率限制
-                time.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"检查币种 {symbol} 异常: {e}")
+        valid_symbols = self.symbol_registry.valid_symbols()
+        total = len(self.symbol_registry.symbols)
         
         # 保存到缓存
         cache_data = {
@@ -168,10 +156,9 @@ class OIHistoryCollector:
     def get_current_oi(self, symbol: str) -> dict | None:
         """获取指定币种的当前OI数据"""
         try:
-            url = f"{self.base_url}/openInterest"
             params = {'symbol': symbol}
             
-            response = requests.get(url, params=params, timeout=10)
+            response = binance_get(OPEN_INTEREST_PATH, params=params, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 return {
@@ -188,147 +175,234 @@ class OIHistoryCollector:
             logger.error(f"获取 {symbol} 当前OI数据异常: {e}")
             return None
     
-    def get_today_filename(self) -> str:
-        """获取今天的文件名"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        return os.path.join(self.history_data_dir, f"oi_data_{today}.json")
+    def load_day_data(self, date: datetime) -> dict:
+        """加载指定日期的数据"""
+        return self.history_store.read_day(date.strftime('%Y-%m-%d'))
     
     def load_today_data(self) -> dict:
         """加载今天的数据"""
-        filename = self.get_today_filename()
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"加载今天数据失败: {e}")
-        return {}
-    
-    def save_today_data(self, data: dict):
-        """保存今天的数据"""
-        filename = self.get_today_filename()
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logger.info(f"OI历史数据已保存到 {filename}")
-            
-            # 清理过期数据
-            self.cleanup_old_data()
-        except Exception as e:
-            logger.error(f"保存今天数据失败: {e}")
+        return self.load_day_data(datetime.now())
     
     def cleanup_old_data(self):
-        """清理超过最大保留天数的历史数据"""
+        """把超过热数据保留期的历史数据转入冷数据（或删除），并清理过期冷数据"""
         try:
-            # 获取所有历史数据文件
-            if not os.path.exists(self.history_data_dir):
-                return
-            files = [f for f in os.listdir(self.history_data_dir) if f.startswith('oi_data_') and f.endswith('.json')]
-            # 计算截止日期（保留最近10天）
-            cutoff_date = datetime.now() - timedelta(days=self.max_history_days)
-            deleted_count = 0
-            for filename in files:
-                try:
-                    # 从文件名提取日期
-                    date_str = filename.replace('oi_data_', '').replace('.json', '')
-                    file_date = datetime.strptime(date_str, '%Y-%m-%d')
-                    # 如果文件日期早于截止日期，则删除
-                    if file_date < cutoff_date:
-                        file_path = os.path.join(self.history_data_dir, filename)
-                        os.remove(file_path)
-                        deleted_count += 1
-                        logger.info(f"删除过期历史数据文件: {filename}")
-                except Exception as e:
-                    logger.warning(f"处理文件 {filename} 时出错: {e}")
-            if deleted_count > 0:
-                logger.info(f"清理完成，删除了 {deleted_count} 个过期历史数据文件，仅保留最近{self.max_history_days}天数据")
-            else:
-                logger.info(f"历史数据文件数量正常，无需清理，当前保留{len(files)}个文件")
+            self.history_store.cleanup()
         except Exception as e:
             logger.error(f"清理历史数据失败: {e}")
     
     def collect_oi_data(self, symbols: list) -> dict:
-        """收集多个币种的OI数据"""
-        collected_data = {}
+        """收集多个币种的OI数据（并发请求，由共享限速器控制频率）"""
         total = len(symbols)
         
         logger.info(f"开始收集 {total} 个币种的OI数据...")
         
-        for idx, symbol in enumerate(symbols, 1):
-            try:
-                # 添加USDT后缀
-                usdt_symbol = symbol + 'USDT'
-                oi_data = self.get_current_oi(usdt_symbol)
-                
-                if oi_data:
-                    collected_data[symbol] = oi_data
-                
-                if idx % 10 == 0 or idx == total:
-                    logger.info(f"已收集OI数据 {idx}/{total} 个币种...")
-                
-                # 避免API速率限制
-                time.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"收集 {symbol} OI数据异常: {e}")
+        # 添加USDT后缀
+        results = fetch_concurrently(
+            self.get_current_oi,
+            [symbol + 'USDT' for symbol in symbols],
+            label="收集OI数据",
+        )
         
-        return collected_data
+        return {symbol: oi_data for symbol, oi_data in zip(symbols, results) if oi_data}
     
-    def update_history_data(self, symbols: list):
-        """更新历史数据"""
-        # 加载今天的数据
-        today_data = self.load_today_data()
-        
+    def _append_history(self, records: dict, skip_existing: bool = False) -> int:
+        """写入OI历史存储；写入的样本落在已缓存（已结束）的时间桶中时同时失效这些币种的桶缓存和比率缓存
+
+        所有写入都经过这里，调用方不需要各自处理桶缓存
+        """
+        added = self.history_store.append(records, skip_existing=skip_existing)
+        stale = self.resampler.invalidate_written(records) if self.resampler is not None else []
+        if stale:
+            # 写入可能在独立进程中进行（scheduler.py --backfill），失效结果需要写回磁盘
+            self.resampler.save_cache()
+            if self.ratio_cache is not None:
+                # 早于缓存桶的样本不改变最新时间戳，比率缓存也需要失效
+                self.ratio_cache.invalidate(stale)
+                self.ratio_cache.save()
+        return added
+
+    def update_history_data(self, symbols: list, oi_data: dict | None = None):
+        """更新历史数据
+
+        Args:
+            symbols: 币种列表
+            oi_data: 已采集的OI数据（币种 -> OI记录），提供时不再请求API
+        """
         # 收集当前数据
-        current_data = self.collect_oi_data(symbols)
-        
-        # 合并数据
-        for symbol, data in current_data.items():
-            if symbol not in today_data:
-                today_data[symbol] = []
-            today_data[symbol].append(data)
+        current_data = oi_data if oi_data is not None else self.collect_oi_data(symbols)
         
-        # 保存数据
-        self.save_today_data(today_data)
+        # 追加写入（只写本次采集的记录）
+        self._append_history(current_data)
+        for index in (self._history_index, self._range_index):
+            if index is not None:
+                index.add_records(current_data)
+        ring_buffers = self.get_ring_buffers()
+        ring_buffers.push_records(current_data)
+        ring_buffers.save()
         
         logger.info(f"成功更新 {len(current_data)} 个币种的OI历史数据")
     
+    def update_history_and_ratios(self, symbols: list, oi_data: dict | None = None,
+                                  backfill: bool = False) -> pd.Series:
+        """OI历史阶段：（可选）回填历史不足的币种，写入本次采集的数据，再计算OI激增比率
+
+        与信号分析相互独立，结果可直接传给 TradingSignalAnalyzer.evaluate(oi_ratios=...)
+
+        Args:
+            symbols: 币种列表
+            oi_data: 已采集的OI数据（币种 -> OI记录），提供时不再请求API
+            backfill: 是否先从 openInterestHist 回填历史不足的币种
+
+        Returns:
+            以币种为索引的OI激增比率，历史不足为 NaN
+        """
+        if backfill:
+            missing_symbols = self.symbols_needing_backfill(symbols)
+            if missing_symbols:
+                self.backfill_history(missing_symbols)
+        logger.info("开始更新OI历史数据...")
+        self.update_history_data(symbols, oi_data=oi_data)
+        logger.info("开始获取OI比率数据...")
+        return self.get_oi_ratio_series(symbols)
+    
+    def get_oi_hist(self, symbol: str, period: str = '4h', limit: int = 30) -> list:
+        """获取指定币种的OI历史统计（openInterestHist），返回与历史数据一致的记录格式"""
+        try:
+            params = {'symbol': symbol, 'period': period, 'limit': limit}
+            response = binance_get(OPEN_INTEREST_HIST_PATH, params=params, timeout=10)
+            if response.status_code != 200:
+                logger.warning(f"获取 {symbol} OI历史统计失败: {response.status_code}")
+                return []
+            return [
+                {
+                    'symbol': symbol,
+                    'openInterest': float(item.get('sumOpenInterest', 0)),
+                    'timestamp': int(item['timestamp']),
+                    'collect_time': datetime.fromtimestamp(int(item['timestamp']) / 1000).isoformat()
+                }
+                for item in response.json()
+            ]
+        except Exception as e:
+            logger.error(f"获取 {symbol} OI历史统计异常: {e}")
+            return []
+    
+    def merge_history_records(self, records: dict) -> int:
+        """按日期合并OI记录到历史数据，跳过已存在的时间戳
+
+        Args:
+            records: 币种 -> OI记录列表
+
+        Returns:
+            新增的记录数
+        """
+        retention_days = max(self.max_history_days, self.cold_retention_days)
+        cutoff_ms = (datetime.now() - timedelta(days=retention_days)).timestamp() * 1000
+        records = {
+            symbol: [item for item in items if item['timestamp'] >= cutoff_ms]
+            for symbol, items in records.items()
+        }
+        added = self._append_history(records, skip_existing=True)
+        # 回填可能写入任意日期，重建索引并用其重建相关币种的环形缓冲区
+        self._history_index = None
+        self._range_index = None
+        if added:
+            if self.ratio_cache is not None:
+                # 回填的旧样本不改变最新时间戳，需要显式失效
+                self.ratio_cache.invalidate(list(records.keys()))
+                self.ratio_cache.save()
+            ring_buffers = self.get_ring_buffers()
+            ring_buffers.seed_from_index(self.get_history_index(), list(records.keys()))
+            ring_buffers.save()
+        return added
+    
+    def backfill_history(self, symbols: list, period: str = '4h', limit: int | None = None) -> int:
+        """冷启动回填：并发拉取 openInterestHist 并合并到历史数据
+
+        Args:
+            symbols: 币种列表（不含USDT后缀）
+            period: 统计周期
+            limit: 每个币种拉取的条数，默认覆盖最大保留天数
+
+        Returns:
+            新增的记录数
+        """
+        if limit is None:
+            period_hours = {'1h': 1, '2h': 2, '4h': 4, '6h': 6, '12h': 12, '1d': 24}.get(period, 4)
+            limit = min(500, self.max_history_days * 24 // period_hours)
+        
+        logger.info(f"开始回填 {len(symbols)} 个币种的OI历史数据（周期 {period}，每个币种 {limit} 条）...")
+        results = fetch_concurrently(
+            lambda symbol: self.get_oi_hist(symbol + 'USDT', period, limit),
+            symbols,
+            label="回填OI历史",
+        )
+        records = {symbol: items for symbol, items in zip(symbols, results) if items}
+        added = self.merge_history_records(records)
+        logger.info(f"OI历史回填完成: {len(records)} 个币种，新增 {added} 条记录")
+        return added
+    
+    def symbols_needing_backfill(self, symbols: list, min_samples: int = 10) -> list:
+        """找出历史数据不足 min_samples 条的币种"""
+        index = self.get_history_index()
+        counts = {symbol: index.count(symbol) for symbol in symbols}
+        return [symbol for symbol in symbols if counts[symbol] < min_samples]
+    
     def get_symbol_history(self, symbol: str, days: int = 7) -> list:
         """获取指定币种的历史数据"""
-        history_data = []
-        
-        for i in range(days):
-            date = datetime.now() - timedelta(days=i)
-            filename = os.path.join(self.history_data_dir, f"oi_data_{date.strftime('%Y-%m-%d')}.json")
-            
-            if os.path.exists(filename):
-                try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        day_data = json.load(f)
-                        if symbol in day_data:
-                            history_data.extend(day_data[symbol])
-                except Exception as e:
-                    logger.error(f"加载 {filename} 失败: {e}")
-        
-        # 按时间排序
-        history_data.sort(key=lambda x: x.get('timestamp', 0))
-        return history_data
+        return self.history_store.symbol_history(symbol, days)
+    
+    def history(self, symbol: str, start_ts: int, end_ts: int | None = None) -> tuple:
+        """查询币种在 [start_ts, end_ts) 内的OI历史
+
+        Returns:
+            (毫秒时间戳数组, OI数组)，均为内存索引的只读视图
+        """
+        return self.get_range_index(start_ts).history(symbol, start_ts, end_ts)
+
+    def history_many(self, symbols: list, start_ts: int, end_ts: int | None = None) -> dict:
+        """多个币种的范围查询：币种 -> (毫秒时间戳数组, OI数组)"""
+        return self.get_range_index(start_ts).history_many(symbols, start_ts, end_ts)
+
+    def get_range_index(self, start_ts: int) -> OIHistoryIndex:
+        """覆盖 start_ts 之后所有数据的内存索引：本次运行的索引已覆盖时直接复用，否则读取一次更长的范围"""
+        index = self.get_history_index()
+        if index.start_ms is not None and start_ts >= index.start_ms:
+            return index
+        if self._range_index is None or self._range_index.start_ms > start_ts:
+            self._range_index = OIHistoryIndex.from_store_range(self.history_store, start_ts)
+        return self._range_index
+    
+    def get_history_index(self, refresh: bool = False) -> OIHistoryIndex:
+        """获取本次运行的OI历史内存索引（整个保留窗口只读取一次）"""
+        if self._history_index is None or refresh:
+            self._history_index = OIHistoryIndex.from_store(self.history_store, self.history_index_days)
+        return self._history_index
+    
+    def get_ring_buffers(self) -> OIRingBufferStore:
+        """获取环形缓冲区，文件不存在时用历史索引初始化"""
+        if not self.ring_buffers.loaded:
+            if not self.ring_buffers.load():
+                logger.info("初始化OI环形缓冲区...")
+                self.ring_buffers.seed_from_index(self.get_history_index())
+                self.ring_buffers.save()
+            self.ring_buffers.loaded = True
+        return self.ring_buffers
     
     def calculate_oi_ratio(self, symbol: str, recent_count: int = 3, total_count: int = 10) -> float:
         """计算OI比率：最近N次均值 / 最近M次均值"""
         try:
-            # 获取历史数据
-            history_data = self.get_symbol_history(symbol, days=7)
-            if len(history_data) < total_count:
-                logger.info(f"{symbol} OI历史数据不足{total_count}条，当前只有{len(history_data)}条")
+            # 从内存索引获取历史数据
+            index = self.get_history_index()
+            sample_count = index.count(symbol)
+            if sample_count < total_count:
+                logger.info(f"{symbol} OI历史数据不足{total_count}条，当前只有{sample_count}条")
                 return 1.0  # 返回1.0表示无变化
             # 提取最近的OI值
-            recent_data = history_data[-total_count:]
-            oi_values = [item['openInterest'] for item in recent_data]
-            # 计算最近N次均值
-            recent_avg = sum(oi_values[:recent_count]) / recent_count
+            oi_values = index.latest_values(symbol, total_count)
+            # 计算最近N次均值（取时间上最新的N个值）
+            recent_avg = float(oi_values[-recent_count:].sum()) / recent_count
             # 计算最近M次均值
-            total_avg = sum(oi_values) / total_count
+            total_avg = float(oi_values.sum()) / total_count
             # 避免除零错误
             if total_avg == 0:
                 return 1.0
@@ -338,27 +412,63 @@ class OIHistoryCollector:
             logger.error(f"计算 {symbol} OI比率异常: {e}")
             return 1.0
     
+    def get_oi_ratio_series(self, symbols: list, recent_count: int = 3, total_count: int = 10) -> pd.Series:
+        """向量化计算OI比率，返回以币种为索引的 Series
+
+        历史数据不足的币种为 NaN（不会被当作1.0静默处理），可直接按币种映射到分析数据。
+        启用时间桶时按最近 total_count 个时间桶计算（已结束的桶来自缓存）；
+        否则按原始样本计算，窗口与环形缓冲区一致时直接读取缓冲区中的累计和。
+        最新样本时间戳（和当前时间桶）未变化的币种直接使用比率缓存，不再计算
+        """
+        symbols = list(symbols)
+        now_ms = int(datetime.now().timestamp() * 1000)
+        if self.ratio_cache is None:
+            ratios = self._compute_oi_ratios(symbols, recent_count, total_count, now_ms)
+        else:
+            ring_buffers = self.get_ring_buffers()
+            latest_timestamps = {
+                symbol: ring_buffers.buffers[symbol].last_timestamp if symbol in ring_buffers.buffers else None
+                for symbol in symbols
+            }
+            params = {
+                'bucket': self.resampler.bucket if self.resampler is not None else 'raw',
+                'aggregation': self.resampler.how if self.resampler is not None else None,
+                'recent_count': recent_count,
+                'total_count': total_count,
+            }
+            # 按时间桶计算时，进入新的桶后即使没有新样本比率也会变化；
+            # 按原始样本计算时每天重新计算一次，使停止更新的币种在样本过期后变为空值
+            window = now_ms // (self.resampler.bucket_ms if self.resampler is not None else 86_400_000)
+            cached, missing = self.ratio_cache.lookup(symbols, latest_timestamps, params, window)
+            if missing:
+                computed = self._compute_oi_ratios(missing, recent_count, total_count, now_ms)
+                self.ratio_cache.update(computed, latest_timestamps, params, window)
+                self.ratio_cache.save()
+                ratios = pd.concat([cached, computed]) if len(cached) else computed
+            else:
+                ratios = cached
+            ratios = ratios.reindex(symbols).rename('oi_surge_ratio').rename_axis('symbol')
+            logger.info(f"OI比率缓存命中 {len(symbols) - len(missing)}/{len(symbols)} 个币种")
+        unit = f"个{self.resampler.bucket}时间桶" if self.resampler is not None else "条"
+        insufficient = int(ratios.isna().sum())
+        if insufficient:
+            logger.info(f"{insufficient}/{len(ratios)} 个币种OI历史数据不足{total_count}{unit}，OI比率记为空值")
+        return ratios
+
+    def _compute_oi_ratios(self, symbols: list, recent_count: int, total_count: int, now_ms: int) -> pd.Series:
+        """不经过比率缓存直接计算OI比率"""
+        if self.resampler is not None:
+            ratios = self.resampler.surge_ratios(self.get_history_index(), symbols, recent_count, total_count, now_ms)
+            self.resampler.save_cache()
+            return ratios
+        ring_buffers = self.get_ring_buffers()
+        if (recent_count, total_count) == (ring_buffers.recent_count, ring_buffers.capacity):
+            return ring_buffers.ratios(symbols, now_ms)
+        return self.get_history_index().surge_ratios(symbols, recent_count, total_count)
+    
     def batch_calculate_oi_ratios(self, symbols: list) -> dict:
-        """批量计算多个币种的OI比率"""
-        results = {}
-        total = len(symbols)
-        
-        for idx, symbol in enumerate(symbols, 1):
-            try:
-                ratio = self.calculate_oi_ratio(symbol)
-                results[symbol] = ratio
-                
-                if idx % 10 == 0 or idx == total:
-                    logger.info(f"已处理OI比率 {idx}/{total} 个币种...")
-                
-                # 避免过度计算
-                time.sleep(0.05)
-                
-            except Exception as e:
-                logger.error(f"处理 {symbol} OI比率异常: {e}")
-                results[symbol] = 1.0
-        
-        return results
+        """批量计算多个币种的OI比率（历史数据不足时为1.0）"""
+        return self.get_oi_ratio_series(symbols).fillna(1.0).to_dict()
     
     def get_oi_ratios(self, symbols: list) -> dict:
         """获取OI比率"""
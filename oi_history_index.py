@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+OI历史数据内存索引
+每次运行只读取一遍保留窗口内的分区文件，为每个币种构建按时间排序的
+时间戳数组和OI数组，之后的比率计算全部在内存中完成
+"""
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from oi_series_codec import decode_series, encode_series
+
+logger = logging.getLogger(__name__)
+
+
+class OIHistoryIndex:
+    """按币种组织的OI历史数组索引"""
+
+    def __init__(self, timestamps: dict | None = None, values: dict | None = None, start_ms: int | None = None):
+        self.timestamps = timestamps or {}  # 币种 -> int64 时间戳数组（毫秒，升序）
+        self.values = values or {}  # 币种 -> float64 OI数组
+        self.start_ms = start_ms  # 索引覆盖的起始时间，None 表示未知
+
+    @classmethod
+    def from_store(cls, store, days: int = 7) -> 'OIHistoryIndex':
+        """从历史存储读取最近 days 个自然日的数据构建索引（每个分区只读取一次）"""
+        start = (datetime.now() - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        index = cls.from_store_range(store, int(start.timestamp() * 1000))
+        logger.info(f"OI历史索引已构建: {len(index.timestamps)} 个币种，最近 {days} 天")
+        return index
+
+    @classmethod
+    def from_store_range(cls, store, start_ms: int, end_ms: int | None = None) -> 'OIHistoryIndex':
+        """从历史存储读取时间范围 [start_ms, end_ms) 的数据构建索引（end_ms 默认不限）
+
+        存储提供 history_arrays 且范围内没有冷数据时（列式存储）直接使用其返回的内存映射数组视图
+        """
+        start_day = datetime.fromtimestamp(start_ms / 1000).strftime('%Y-%m-%d')
+        cold = getattr(store, 'cold', None)
+        if hasattr(store, 'history_arrays') and (cold is None or all(day < start_day for day in cold.list_days())):
+            timestamps, values = store.history_arrays(start_ms)
+            index = cls(timestamps, values, start_ms)
+        else:
+            end = datetime.now() if end_ms is None else datetime.fromtimestamp((end_ms - 1) / 1000)
+            day = datetime.strptime(start_day, '%Y-%m-%d')
+            merged = {}
+            while day.date() <= end.date():
+                for symbol, records in store.read_day(day.strftime('%Y-%m-%d')).items():
+                    merged.setdefault(symbol, []).extend(records)
+                day += timedelta(days=1)
+            index = cls(start_ms=start_ms)
+            for symbol, records in merged.items():
+                index._set_records(symbol, records)
+        # 按天读取的首尾分区可能超出范围，裁剪为视图
+        ranges = index.history_many(index.symbols, start_ms, end_ms)
+        index.timestamps = {symbol: ts for symbol, (ts, _) in ranges.items() if len(ts)}
+        index.values = {symbol: ranges[symbol][1] for symbol in index.timestamps}
+        return index
+
+    def _set_records(self, symbol: str, records: list):
+        timestamps = np.fromiter((r.get('timestamp', 0) for r in records), dtype=np.int64, count=len(records))
+        values = np.fromiter((r.get('openInterest', 0.0) for r in records), dtype=np.float64, count=len(records))
+        # 按时间排序并按时间戳去重（保留最后一条）
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, values = timestamps[order], values[order]
+        if len(timestamps) > 1:
+            keep = np.append(timestamps[1:] != timestamps[:-1], True)
+            timestamps, values = timestamps[keep], values[keep]
+        self.timestamps[symbol] = timestamps
+        self.values[symbol] = values
+
+    def encode(self) -> dict:
+        """把索引编码为紧凑字节串（币种 -> oi_series_codec 编码），用于在内存中长期保留大量历史"""
+        return {symbol: encode_series(self.timestamps[symbol], self.values[symbol]) for symbol in self.timestamps}
+
+    @classmethod
+    def decode(cls, encoded: dict, start_ms: int | None = None) -> 'OIHistoryIndex':
+        """由 encode 的结果还原索引"""
+        index = cls(start_ms=start_ms)
+        for symbol, blob in encoded.items():
+            index.timestamps[symbol], index.values[symbol] = decode_series(blob)
+        return index
+
+    def add_records(self, records: dict):
+        """把新采集的记录并入索引（币种 -> OI记录 或 OI记录列表）"""
+        for symbol, items in records.items():
+            if isinstance(items, dict):
+                items = [items]
+            existing = [
+                {'timestamp': int(ts), 'openInterest': float(v)}
+                for ts, v in zip(self.timestamps.get(symbol, ()), self.values.get(symbol, ()))
+            ]
+            self._set_records(symbol, existing + list(items))
+
+    @property
+    def symbols(self) -> list:
+        return list(self.timestamps.keys())
+
+    def count(self, symbol: str) -> int:
+        """币种的样本数"""
+        return len(self.timestamps.get(symbol, ()))
+
+    def history(self, symbol: str, start_ts: int | None = None, end_ts: int | None = None) -> tuple:
+        """币种在 [start_ts, end_ts) 内的 (时间戳数组, OI数组)，二分查找定位，返回原数组的视图"""
+        timestamps = self.timestamps.get(symbol)
+        if timestamps is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        lo = int(np.searchsorted(timestamps, start_ts, side='left')) if start_ts is not None else 0
+        hi = int(np.searchsorted(timestamps, end_ts, side='left')) if end_ts is not None else len(timestamps)
+        return timestamps[lo:hi], self.values[symbol][lo:hi]
+
+    def history_many(self, symbols: list, start_ts: int | None = None, end_ts: int | None = None) -> dict:
+        """多个币种的范围查询：币种 -> (时间戳数组, OI数组)，没有数据的币种为空数组"""
+        return {symbol: self.history(symbol, start_ts, end_ts) for symbol in symbols}
+
+    def latest_values(self, symbol: str, n: int) -> np.ndarray:
+        """币种最近 n 个OI值（按时间升序）"""
+        return self.values.get(symbol, np.empty(0, dtype=np.float64))[-n:]
+
+    def tail_matrix(self, symbols: list, length: int) -> np.ndarray:
+        """把每个币种最近 length 个OI值右对齐填入二维数组，不足的位置为 NaN"""
+        matrix = np.full((len(symbols), length), np.nan, dtype=np.float64)
+        for row, symbol in enumerate(symbols):
+            tail = self.latest_values(symbol, length)
+            if len(tail):
+                matrix[row, length - len(tail):] = tail
+        return matrix
+
+    def surge_ratios(self, symbols: list, recent_count: int = 3, total_count: int = 10) -> pd.Series:
+        """一次性计算所有币种的OI激增比率：最近 recent_count 个均值 / 最近 total_count 个均值
+
+        历史样本不足 total_count 个或均值为0的币种返回 NaN，由调用方显式处理
+        """
+        symbols = list(symbols)
+        matrix = self.tail_matrix(symbols, total_count)
+        complete = ~np.isnan(matrix).any(axis=1)
+        ratios = np.full(len(symbols), np.nan, dtype=np.float64)
+        if complete.any():
+            full_rows = matrix[complete]
+            recent_avg = full_rows[:, -recent_count:].mean(axis=1)
+            total_avg = full_rows.mean(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios[complete] = np.where(total_avg != 0, recent_avg / total_avg, np.nan)
+        return pd.Series(ratios, index=pd.Index(symbols, name='symbol'), name='oi_surge_ratio')
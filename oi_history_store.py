@@ -0,0 +1,782 @@
+#!/usr/bin/env python3
+"""
+OI历史数据存储
+- jsonl：按天分区的追加写日志，每天一个 oi_data_YYYY-MM-DD.jsonl 文件，每行一条OI记录。
+  每次采集只追加本次的记录并 fsync，不再重写整天的文件；
+  跨天时在后台线程中压缩已关闭的分区并清理过期数据。兼容读取旧版 oi_data_YYYY-MM-DD.json 文件
+- columnar：当天仍写追加日志；跨天时把热数据保留期内所有已关闭的分区合并为一个
+  列式二进制文件 oi_history.oicol（见 columnar_file.py），读取时整个文件一次内存映射，
+  每个币种是其中连续的一段，按偏移直接切片，无需解析JSON
+- sqlite：单个 SQLite 数据库（WAL模式），(symbol, timestamp) 聚簇主键，
+  每次采集一个事务批量写入，按索引范围查询，过期清理为一条 DELETE 语句
+
+两种后端提供相同的接口，通过 Config.OI_HISTORY_BACKEND 选择。
+启用冷数据层时，超过热数据保留期的数据不会被删除，而是按天压缩转入 cold/ 目录
+（见 oi_cold_storage.py），读取时透明解压；保留期维护每个分区切换（跨天）只执行一次
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from config import Config
+from oi_cold_storage import ColdHistoryTier
+from columnar_file import open_columns, write_columns
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'oi_data_'
+LEGACY_SUFFIX = '.json'
+SEGMENT_SUFFIX = '.jsonl'
+COMPACTION_MANIFEST = '.compaction.json'
+COLD_DIR = 'cold'
+COLUMNAR_FILE = 'oi_history.oicol'
+BASE_DTYPE = '<U20'
+PAIR_DTYPE = '<U24'
+
+
+def record_day(record: dict) -> str:
+    """记录所属的分区日期（按记录时间戳的本地日期）"""
+    return datetime.fromtimestamp(record['timestamp'] / 1000).strftime('%Y-%m-%d')
+
+
+def day_start_ms(day: str) -> int:
+    """本地日期零点的毫秒时间戳"""
+    return int(datetime.strptime(day, '%Y-%m-%d').timestamp() * 1000)
+
+
+def day_end_ms(day: str) -> int:
+    """本地日期次日零点的毫秒时间戳"""
+    next_day = datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)
+    return int(next_day.timestamp() * 1000)
+
+
+def recent_days(days: int) -> list:
+    """最近 days 个自然日（从今天开始倒序）"""
+    return [(datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+
+
+class JsonlHistoryStore:
+    """按天分区的追加写OI历史存储"""
+
+    def __init__(self, data_dir: str = "oi_history_data", max_history_days: int = 10,
+                 cold_retention_days: int = 0, read_legacy: bool = True):
+        self.data_dir = data_dir
+        self.max_history_days = max_history_days
+        # 是否读取（及压缩后删除）旧版整天JSON文件；迁移工具流式写入这些文件时设为 False
+        self.read_legacy = read_legacy
+        self._lock = threading.Lock()
+        self._compaction_thread = None
+        os.makedirs(self.data_dir, exist_ok=True)
+        # 冷数据层（cold_retention_days 为0时过期数据直接删除）
+        self.cold = ColdHistoryTier(os.path.join(data_dir, COLD_DIR), cold_retention_days) \
+            if cold_retention_days > 0 else None
+
+    # ==================== 分区文件 ====================
+
+    def segment_path(self, day: str) -> str:
+        """追加写分区文件路径"""
+        return os.path.join(self.data_dir, f"{SEGMENT_PREFIX}{day}{SEGMENT_SUFFIX}")
+
+    def legacy_path(self, day: str) -> str:
+        """旧版整天JSON文件路径"""
+        return os.path.join(self.data_dir, f"{SEGMENT_PREFIX}{day}{LEGACY_SUFFIX}")
+
+    def hot_paths(self, day: str) -> tuple:
+        """一天的热数据文件路径（追加日志，以及读取旧版文件时的旧版JSON）"""
+        if self.read_legacy:
+            return self.segment_path(day), self.legacy_path(day)
+        return (self.segment_path(day),)
+
+    def list_days(self) -> list:
+        """所有存在数据的分区日期（升序，包括冷数据）"""
+        days = set(self.hot_days())
+        if self.cold is not None:
+            days.update(self.cold.list_days())
+        return sorted(days)
+
+    def hot_days(self) -> list:
+        """未压缩的热数据分区日期（升序）"""
+        days = set()
+        for filename in os.listdir(self.data_dir):
+            if not filename.startswith(SEGMENT_PREFIX):
+                continue
+            for suffix in ((SEGMENT_SUFFIX, LEGACY_SUFFIX) if self.read_legacy else (SEGMENT_SUFFIX,)):
+                if filename.endswith(suffix):
+                    days.add(filename[len(SEGMENT_PREFIX):-len(suffix)])
+        return sorted(days)
+
+    # ==================== 读取 ====================
+
+    def _read_legacy(self, day: str) -> dict:
+        path = self.legacy_path(day)
+        if not self.read_legacy or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"加载 {path} 失败: {e}")
+            return {}
+        # 只保留 币种 -> 记录列表 的条目
+        return {symbol: records for symbol, records in data.items() if isinstance(records, list)}
+
+    def _read_segment(self, day: str) -> dict:
+        path = self.segment_path(day)
+        data = {}
+        if not os.path.exists(path):
+            return data
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时可能留下不完整的最后一行，跳过即可
+                    logger.warning(f"{path} 第{line_no}行不完整，已跳过")
+                    continue
+                base = record.pop('base')
+                data.setdefault(base, []).append(record)
+        return data
+
+    def _read_hot(self, day: str) -> dict:
+        """读取一天的热数据（旧版JSON + 追加日志）：币种 -> 按时间排序、去重后的记录列表"""
+        data = self._read_legacy(day)
+        for symbol, records in self._read_segment(day).items():
+            data.setdefault(symbol, []).extend(records)
+        for symbol, records in data.items():
+            data[symbol] = self._dedupe_sorted(records)
+        return data
+
+    def read_day(self, day: str) -> dict:
+        """读取一天的数据：币种 -> 按时间排序、去重后的记录列表（同一时间戳以热数据为准）"""
+        data = self._read_hot(day)
+        if self.cold is not None:
+            for symbol, records in self.cold.read_day(day).items():
+                data[symbol] = self._dedupe_sorted(records + data.get(symbol, []))
+        return data
+
+    @staticmethod
+    def _dedupe_sorted(records: list) -> list:
+        unique = {}
+        for record in records:
+            unique[record.get('timestamp', 0)] = record
+        return [unique[ts] for ts in sorted(unique)]
+
+    def symbol_history(self, symbol: str, days: int = 7) -> list:
+        """获取指定币种最近 days 个自然日的记录（按时间排序）"""
+        # 各分区内已按时间排序且时间范围互不重叠，按日期升序拼接即可
+        history = []
+        for day in reversed(recent_days(days)):
+            history.extend(self.read_day(day).get(symbol, []))
+        return history
+
+    def latest_records(self, symbol: str, count: int) -> list:
+        """指定币种最近 count 条记录（按时间升序），从最新的分区往前读取"""
+        history = []
+        for day in reversed(self.list_days()):
+            history = self.read_day(day).get(symbol, []) + history
+            if len(history) >= count:
+                break
+        return history[-count:]
+
+    # ==================== 写入 ====================
+
+    @staticmethod
+    def _ends_with_partial_line(path: str) -> bool:
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return False
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def append(self, records: dict, skip_existing: bool = False) -> int:
+        """追加OI记录
+
+        Args:
+            records: 币种 -> OI记录 或 OI记录列表
+            skip_existing: 是否跳过分区中已存在的 (币种, 时间戳)，用于回填
+
+        Returns:
+            实际写入的记录数
+        """
+        by_day = {}
+        for symbol, items in records.items():
+            if isinstance(items, dict):
+                items = [items]
+            for item in items:
+                by_day.setdefault(record_day(item), []).append((symbol, item))
+
+        today = datetime.now().strftime('%Y-%m-%d')
+        rollover = False
+        written = 0
+        with self._lock:
+            for day, items in sorted(by_day.items()):
+                path = self.segment_path(day)
+                if day == today and not os.path.exists(path):
+                    rollover = True
+                if skip_existing:
+                    existing = self.read_day(day)
+                    seen = {(s, r.get('timestamp')) for s, rs in existing.items() for r in rs}
+                    items = [(s, r) for s, r in items if (s, r['timestamp']) not in seen]
+                if not items:
+                    continue
+                lines = ''.join(
+                    json.dumps({'base': symbol, **item}, ensure_ascii=False) + '\n'
+                    for symbol, item in items
+                )
+                if self._ends_with_partial_line(path):
+                    # 上次写入中断留下的半行单独成行，避免与新记录粘连
+                    lines = '\n' + lines
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                written += len(items)
+
+        if rollover:
+            # 新的一天开始：在后台压缩已关闭的分区并清理过期数据
+            self.start_background_compaction()
+        return written
+
+    # ==================== 压缩与清理 ====================
+
+    def compact_day(self, day: str) -> bool:
+        """把一天的旧版JSON和追加日志合并为去重、排序后的单个日志文件"""
+        with self._lock:
+            data = self._read_hot(day)
+            path = self.segment_path(day)
+            tmp_path = path + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for symbol, records in data.items():
+                        for record in records:
+                            f.write(json.dumps({'base': symbol, **record}, ensure_ascii=False) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+                if self.read_legacy and os.path.exists(self.legacy_path(day)):
+                    os.remove(self.legacy_path(day))
+                return True
+            except Exception as e:
+                logger.error(f"压缩分区 {day} 失败: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return False
+
+    def _load_manifest(self) -> dict:
+        path = os.path.join(self.data_dir, COMPACTION_MANIFEST)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"读取压缩记录失败: {e}")
+        return {}
+
+    def _save_manifest(self, manifest: dict):
+        path = os.path.join(self.data_dir, COMPACTION_MANIFEST)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def compact_closed_days(self):
+        """压缩今天之前自上次压缩后有变化（或仍有旧版JSON文件）的分区"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        manifest = self._load_manifest()
+        for day in self.hot_days():
+            if day >= today:
+                continue
+            segment = self.segment_path(day)
+            size = os.path.getsize(segment) if os.path.exists(segment) else None
+            if not (self.read_legacy and os.path.exists(self.legacy_path(day))) and manifest.get(day) == size:
+                continue
+            if self.compact_day(day):
+                manifest[day] = os.path.getsize(segment)
+                logger.info(f"已压缩OI历史分区 {day}")
+        existing_days = set(self.hot_days())
+        self._save_manifest({day: size for day, size in manifest.items() if day in existing_days})
+
+    def archive_day(self, day: str) -> int:
+        """把一天的热数据压缩转入冷数据层并删除热数据文件，返回转入的记录数"""
+        with self._lock:
+            archived = self.cold.write_day(day, self._read_hot(day))
+            for path in self.hot_paths(day):
+                if os.path.exists(path):
+                    os.remove(path)
+        return archived
+
+    def cleanup(self) -> int:
+        """处理超过热数据保留期的分区：有冷数据层时压缩转入冷数据层，否则删除
+
+        Returns:
+            转入冷数据层或删除的热数据分区数
+        """
+        cutoff_day = (datetime.now() - timedelta(days=self.max_history_days)).strftime('%Y-%m-%d')
+        expired_days = [day for day in self.hot_days() if day < cutoff_day]
+        if self.cold is not None:
+            archived_days = 0
+            for day in expired_days:
+                try:
+                    archived = self.archive_day(day)
+                    archived_days += 1
+                    logger.info(f"已将OI历史分区 {day} 压缩转入冷数据（{archived} 条记录）")
+                except Exception as e:
+                    logger.error(f"压缩转存分区 {day} 失败: {e}")
+            self.cold.cleanup()
+            return archived_days
+
+        deleted_count = 0
+        for day in expired_days:
+            for path in self.hot_paths(day):
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                        deleted_count += 1
+                        logger.info(f"删除过期历史数据文件: {os.path.basename(path)}")
+                    except Exception as e:
+                        logger.warning(f"删除文件 {path} 时出错: {e}")
+        if deleted_count > 0:
+            logger.info(f"清理完成，删除了 {deleted_count} 个过期历史数据文件，仅保留最近{self.max_history_days}天数据")
+        return deleted_count
+
+    def run_maintenance(self):
+        """分区切换时的维护任务：清理过期分区并压缩已关闭的分区"""
+        try:
+            self.cleanup()
+            self.compact_closed_days()
+        except Exception as e:
+            logger.error(f"OI历史数据维护失败: {e}")
+
+    def start_background_compaction(self):
+        """在后台线程中执行维护任务（非守护线程，进程退出前会等待其完成）"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(
+            target=self.run_maintenance, name='oi-history-compaction')
+        self._compaction_thread.start()
+
+    def wait_for_compaction(self, timeout: float | None = None):
+        """等待后台维护任务结束（进程退出前调用）"""
+        if self._compaction_thread is not None:
+            self._compaction_thread.join(timeout)
+
+
+class ColumnarHistoryStore(JsonlHistoryStore):
+    """当天追加写日志 + 已关闭分区合并为单个内存映射列式文件的OI历史存储
+
+    列式文件按 (币种, 时间戳) 排序，包含行数据列 timestamp / open_interest / collect_time，
+    以及币种表 bases / pairs / starts（第 i 个币种的数据位于 starts[i]:starts[i+1]）
+    """
+
+    @property
+    def columnar_path(self) -> str:
+        return os.path.join(self.data_dir, COLUMNAR_FILE)
+
+    def open_columnar(self) -> tuple:
+        """内存映射打开列式文件，返回 (列名 -> 数组视图, 附加信息)，文件不存在时为空"""
+        if not os.path.exists(self.columnar_path):
+            return {}, {}
+        try:
+            return open_columns(self.columnar_path)
+        except Exception as e:
+            logger.error(f"打开 {self.columnar_path} 失败: {e}")
+            return {}, {}
+
+    def log_days(self) -> list:
+        """仍以追加日志（或旧版JSON）形式存在的分区日期"""
+        return super().hot_days()
+
+    def hot_days(self) -> list:
+        days = set(self.log_days())
+        days.update(self.open_columnar()[1].get('days', []))
+        return sorted(days)
+
+    # ==================== 读取 ====================
+
+    @staticmethod
+    def _column_records(columns: dict, start_ms: int, end_ms: int, symbol: str | None = None) -> dict:
+        """列式文件中时间范围 [start_ms, end_ms) 内的记录：币种 -> 记录列表（可只取一个币种）"""
+        data = {}
+        if not columns:
+            return data
+        starts, timestamps, bases = columns['starts'], columns['timestamp'], columns['bases']
+        if symbol is None:
+            positions = range(len(bases))
+        else:
+            # 币种表有序，二分查找定位
+            position = int(np.searchsorted(bases, symbol))
+            positions = [position] if position < len(bases) and bases[position] == symbol else []
+        for i in positions:
+            base = str(bases[i])
+            lo, hi = int(starts[i]), int(starts[i + 1])
+            segment = timestamps[lo:hi]
+            first = lo + int(np.searchsorted(segment, start_ms))
+            last = lo + int(np.searchsorted(segment, end_ms))
+            if last <= first:
+                continue
+            pair = str(columns['pairs'][i])
+            collect_times = columns['collect_time'][first:last].astype(object)
+            data[base] = [
+                {
+                    'symbol': pair,
+                    'openInterest': value,
+                    'timestamp': timestamp,
+                    'collect_time': collect_time.isoformat() if collect_time is not None else None,
+                }
+                for value, timestamp, collect_time in zip(
+                    columns['open_interest'][first:last].tolist(),
+                    timestamps[first:last].tolist(),
+                    collect_times,
+                )
+            ]
+        return data
+
+    def _read_hot(self, day: str) -> dict:
+        data = super()._read_hot(day)
+        columns, meta = self.open_columnar()
+        if day in meta.get('days', []):
+            for symbol, records in self._column_records(columns, day_start_ms(day), day_end_ms(day)).items():
+                # 同一时间戳以追加日志为准
+                data[symbol] = self._dedupe_sorted(records + data.get(symbol, []))
+        return data
+
+    def _symbol_records(self, symbol: str, start_day: str) -> list:
+        """指定币种从 start_day 起的所有记录（冷数据、列式文件、追加日志合并，按时间排序）"""
+        records = []
+        if self.cold is not None:
+            for day in self.cold.list_days():
+                if day >= start_day:
+                    records.extend(self.cold.read_day(day).get(symbol, []))
+        columns, _ = self.open_columnar()
+        records.extend(self._column_records(columns, day_start_ms(start_day), 2 ** 62, symbol).get(symbol, []))
+        for day in self.log_days():
+            if day >= start_day:
+                records.extend(super()._read_hot(day).get(symbol, []))
+        return self._dedupe_sorted(records)
+
+    def symbol_history(self, symbol: str, days: int = 7) -> list:
+        return self._symbol_records(symbol, recent_days(days)[-1])
+
+    def latest_records(self, symbol: str, count: int) -> list:
+        hot_start = (datetime.now() - timedelta(days=self.max_history_days)).strftime('%Y-%m-%d')
+        history = self._symbol_records(symbol, hot_start)
+        if len(history) < count and self.cold is not None:
+            # 热数据不足时逐天往前读取冷数据
+            return super().latest_records(symbol, count)
+        return history[-count:]
+
+    def history_arrays(self, start_ms: int) -> tuple:
+        """start_ms 之后的按币种数组 (币种 -> 时间戳数组, 币种 -> OI数组)
+
+        列式文件部分直接返回内存映射上的切片视图，只有当天等追加日志中的记录需要解析并合并
+        """
+        timestamps, values = {}, {}
+        columns, _ = self.open_columnar()
+        if columns:
+            starts, all_ts, all_values = columns['starts'], columns['timestamp'], columns['open_interest']
+            for i, base in enumerate(columns['bases'].tolist()):
+                lo, hi = int(starts[i]), int(starts[i + 1])
+                lo += int(np.searchsorted(all_ts[lo:hi], start_ms))
+                if hi > lo:
+                    timestamps[base] = all_ts[lo:hi]
+                    values[base] = all_values[lo:hi]
+
+        start_day = datetime.fromtimestamp(start_ms / 1000).strftime('%Y-%m-%d')
+        for day in self.log_days():
+            if day < start_day:
+                continue
+            for base, records in super()._read_hot(day).items():
+                records = [r for r in records if r['timestamp'] >= start_ms]
+                if not records:
+                    continue
+                new_ts = np.fromiter((r['timestamp'] for r in records), dtype=np.int64, count=len(records))
+                new_values = np.fromiter((r['openInterest'] for r in records), dtype=np.float64, count=len(records))
+                if base in timestamps:
+                    new_ts = np.concatenate((timestamps[base], new_ts))
+                    new_values = np.concatenate((values[base], new_values))
+                # 按时间排序并按时间戳去重（保留最后一条，即追加日志中的记录）
+                order = np.argsort(new_ts, kind='stable')
+                new_ts, new_values = new_ts[order], new_values[order]
+                keep = np.append(new_ts[1:] != new_ts[:-1], True)
+                timestamps[base], values[base] = new_ts[keep], new_values[keep]
+        return timestamps, values
+
+    # ==================== 合并与清理 ====================
+
+    def compact_closed_days(self):
+        """把热数据保留期内今天之前的分区（列式文件 + 追加日志）合并为新的列式文件，
+        删除已合并的追加日志；超出保留期的行随之丢弃（cleanup 已先将其转入冷数据层）"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        cutoff_day = (datetime.now() - timedelta(days=self.max_history_days)).strftime('%Y-%m-%d')
+        with self._lock:
+            columns, meta = self.open_columnar()
+            old_days = meta.get('days', [])
+            log_days = [day for day in self.log_days() if cutoff_day <= day < today]
+            keep_days = sorted({day for day in old_days + log_days if cutoff_day <= day < today})
+            if keep_days == sorted(old_days) and not log_days:
+                return
+
+            bases, pairs, ts_parts, value_parts, collect_parts = [], {}, [], [], []
+            if columns:
+                row_bases = np.repeat(columns['bases'], np.diff(columns['starts']))
+                keep = columns['timestamp'] >= day_start_ms(cutoff_day)
+                bases.append(row_bases[keep])
+                ts_parts.append(columns['timestamp'][keep])
+                value_parts.append(columns['open_interest'][keep])
+                collect_parts.append(columns['collect_time'][keep])
+                pairs.update(zip(columns['bases'].tolist(), columns['pairs'].tolist()))
+            for day in log_days:
+                for base, records in super()._read_hot(day).items():
+                    bases.append(np.full(len(records), base, dtype=BASE_DTYPE))
+                    ts_parts.append(np.array([r['timestamp'] for r in records], dtype=np.int64))
+                    value_parts.append(np.array([r['openInterest'] for r in records], dtype=np.float64))
+                    collect_parts.append(np.array([_parse_collect_time(r.get('collect_time')) for r in records],
+                                                  dtype='datetime64[us]'))
+                    pairs[base] = records[-1].get('symbol', base + 'USDT')
+
+            row_bases = np.concatenate(bases).astype(BASE_DTYPE) if bases else np.empty(0, BASE_DTYPE)
+            row_ts = np.concatenate(ts_parts) if ts_parts else np.empty(0, np.int64)
+            row_values = np.concatenate(value_parts) if value_parts else np.empty(0, np.float64)
+            row_collect = np.concatenate(collect_parts) if collect_parts else np.empty(0, 'datetime64[us]')
+            # 按 (币种, 时间戳) 排序，重复的 (币种, 时间戳) 保留后合并进来的追加日志记录
+            order = np.lexsort((row_ts, row_bases))
+            row_bases, row_ts = row_bases[order], row_ts[order]
+            row_values, row_collect = row_values[order], row_collect[order]
+            if len(row_ts):
+                keep = np.append((row_bases[1:] != row_bases[:-1]) | (row_ts[1:] != row_ts[:-1]), True)
+                row_bases, row_ts = row_bases[keep], row_ts[keep]
+                row_values, row_collect = row_values[keep], row_collect[keep]
+            unique_bases, first_rows = np.unique(row_bases, return_index=True)
+
+            write_columns(self.columnar_path, {
+                'bases': unique_bases.astype(BASE_DTYPE),
+                'pairs': np.array([pairs[b] for b in unique_bases.tolist()], dtype=PAIR_DTYPE),
+                'starts': np.append(first_rows, len(row_ts)).astype(np.int64),
+                'timestamp': row_ts,
+                'open_interest': row_values,
+                'collect_time': row_collect,
+            }, meta={'days': keep_days})
+            for day in log_days:
+                for path in self.hot_paths(day):
+                    if os.path.exists(path):
+                        os.remove(path)
+        logger.info(f"已将 {len(log_days)} 个OI历史分区合并为列式文件（共 {len(keep_days)} 天、{len(row_ts)} 条记录）")
+
+    def cleanup(self) -> int:
+        processed = super().cleanup()
+        # 从列式文件中去掉已过期（已转入冷数据层或删除）的行
+        self.compact_closed_days()
+        return processed
+
+    def run_maintenance(self):
+        try:
+            self.cleanup()
+        except Exception as e:
+            logger.error(f"OI历史数据维护失败: {e}")
+
+
+def _parse_collect_time(collect_time):
+    try:
+        return np.datetime64(datetime.fromisoformat(collect_time), 'us')
+    except (TypeError, ValueError):
+        return np.datetime64('NaT', 'us')
+
+
+class SqliteHistoryStore:
+    """SQLite（WAL模式）OI历史存储"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS oi_history (
+            base TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            open_interest REAL NOT NULL,
+            collect_time TEXT,
+            PRIMARY KEY (base, timestamp)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_oi_history_timestamp ON oi_history (timestamp);
+        CREATE TABLE IF NOT EXISTS oi_history_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, db_path: str = "oi_history_data/oi_history.db", max_history_days: int = 10,
+                 cold_retention_days: int = 0):
+        self.db_path = db_path
+        self.data_dir = os.path.dirname(db_path) or '.'
+        self.max_history_days = max_history_days
+        self._lock = threading.Lock()
+        os.makedirs(self.data_dir, exist_ok=True)
+        # 冷数据层（cold_retention_days 为0时过期记录直接删除）
+        self.cold = ColdHistoryTier(os.path.join(self.data_dir, COLD_DIR), cold_retention_days) \
+            if cold_retention_days > 0 else None
+        # 多个进程（scheduler.py、update_symbols.py）可同时读写，写冲突时最多等待30秒
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _to_record(row) -> dict:
+        symbol, open_interest, timestamp, collect_time = row
+        return {'symbol': symbol, 'openInterest': open_interest, 'timestamp': timestamp, 'collect_time': collect_time}
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def read_range(self, start_ms: int, end_ms: int) -> dict:
+        """读取时间范围 [start_ms, end_ms) 内的数据：币种 -> 按时间排序的记录列表"""
+        data = {}
+        rows = self._query(
+            'SELECT base, symbol, open_interest, timestamp, collect_time FROM oi_history '
+            'WHERE timestamp >= ? AND timestamp < ? ORDER BY base, timestamp',
+            (start_ms, end_ms),
+        )
+        for base, *rest in rows:
+            data.setdefault(base, []).append(self._to_record(rest))
+        if self.cold is not None and start_ms < self._hot_cutoff_ms():
+            for day in self.cold.list_days():
+                day_ms = day_start_ms(day)
+                if day_ms >= end_ms or day_ms + 86_400_000 <= start_ms:
+                    continue
+                for base, records in self.cold.read_day(day).items():
+                    in_range = [r for r in records if start_ms <= r['timestamp'] < end_ms]
+                    if in_range:
+                        data[base] = JsonlHistoryStore._dedupe_sorted(in_range + data.get(base, []))
+        return data
+
+    def _hot_cutoff_ms(self) -> int:
+        cutoff_day = (datetime.now() - timedelta(days=self.max_history_days)).strftime('%Y-%m-%d')
+        return day_start_ms(cutoff_day)
+
+    def read_day(self, day: str) -> dict:
+        """读取一天的数据：币种 -> 按时间排序的记录列表"""
+        start_ms = day_start_ms(day)
+        return self.read_range(start_ms, start_ms + 86_400_000)
+
+    def symbol_history(self, symbol: str, days: int = 7) -> list:
+        """获取指定币种最近 days 个自然日的记录（按时间排序）"""
+        start_ms = day_start_ms(recent_days(days)[-1])
+        if self.cold is not None and start_ms < self._hot_cutoff_ms():
+            return self.read_range(start_ms, 2 ** 62).get(symbol, [])
+        rows = self._query(
+            'SELECT symbol, open_interest, timestamp, collect_time FROM oi_history '
+            'WHERE base = ? AND timestamp >= ? ORDER BY timestamp',
+            (symbol, start_ms),
+        )
+        return [self._to_record(row) for row in rows]
+
+    def latest_records(self, symbol: str, count: int) -> list:
+        """指定币种最近 count 条记录（按时间升序）"""
+        rows = self._query(
+            'SELECT symbol, open_interest, timestamp, collect_time FROM oi_history '
+            'WHERE base = ? ORDER BY timestamp DESC LIMIT ?',
+            (symbol, count),
+        )
+        history = [self._to_record(row) for row in reversed(rows)]
+        if self.cold is not None and len(history) < count:
+            # 热数据不足时从冷数据往前补齐
+            oldest = history[0]['timestamp'] if history else 2 ** 62
+            for day in reversed(self.cold.list_days()):
+                older = [r for r in self.cold.read_day(day).get(symbol, []) if r['timestamp'] < oldest]
+                history = older + history
+                if len(history) >= count:
+                    break
+        return history[-count:]
+
+    def append(self, records: dict, skip_existing: bool = False) -> int:
+        """在一个事务中批量写入OI记录（币种 -> OI记录 或 OI记录列表），返回写入的记录数"""
+        rows = []
+        for symbol, items in records.items():
+            if isinstance(items, dict):
+                items = [items]
+            for item in items:
+                rows.append((symbol, int(item['timestamp']), item.get('symbol', symbol + 'USDT'),
+                             float(item['openInterest']), item.get('collect_time')))
+        if not rows:
+            return 0
+        verb = 'INSERT OR IGNORE' if skip_existing else 'INSERT OR REPLACE'
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f'{verb} INTO oi_history (base, timestamp, symbol, open_interest, collect_time) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows,
+            )
+            written = self._conn.total_changes - before
+
+        # 每天（跨所有进程）执行一次保留期维护；维护成功后才记录日期，失败时下次写入重试，
+        # 归档失败（磁盘满、权限等）只记录日志，不影响已成功的写入
+        today = datetime.now().strftime('%Y-%m-%d')
+        if self._maintenance_due(today):
+            try:
+                self.cleanup()
+                self._mark_maintained(today)
+            except Exception as e:
+                logger.error(f"OI历史保留期维护失败，将在下次写入时重试: {e}")
+        return written
+
+    def _maintenance_due(self, today: str) -> bool:
+        row = self._query("SELECT value FROM oi_history_meta WHERE key = 'last_maintenance_day'", ())
+        return not row or row[0][0] != today
+
+    def _mark_maintained(self, today: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO oi_history_meta (key, value) VALUES ('last_maintenance_day', ?)", (today,))
+
+    def cleanup(self) -> int:
+        """处理超过热数据保留期的记录：有冷数据层时按天压缩转入冷数据层，然后删除
+
+        Returns:
+            转入冷数据层或删除的记录数
+        """
+        cutoff_ms = self._hot_cutoff_ms()
+        if self.cold is not None:
+            expired = {}
+            rows = self._query(
+                'SELECT base, symbol, open_interest, timestamp, collect_time FROM oi_history '
+                'WHERE timestamp < ? ORDER BY base, timestamp',
+                (cutoff_ms,),
+            )
+            for base, *rest in rows:
+                record = self._to_record(rest)
+                expired.setdefault(record_day(record), {}).setdefault(base, []).append(record)
+            for day, data in sorted(expired.items()):
+                self.cold.write_day(day, data)
+                logger.info(f"已将 {day} 的OI历史记录压缩转入冷数据")
+        with self._lock, self._conn:
+            deleted = self._conn.execute('DELETE FROM oi_history WHERE timestamp < ?', (cutoff_ms,)).rowcount
+        if self.cold is not None:
+            self.cold.cleanup()
+        elif deleted > 0:
+            logger.info(f"清理完成，删除了 {deleted} 条过期OI记录，仅保留最近{self.max_history_days}天数据")
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_history_store(data_dir: str = "oi_history_data", max_history_days: int = 10,
+                         backend: str | None = None, cold_retention_days: int | None = None,
+                         read_legacy: bool = True):
+    """按配置创建OI历史存储后端（read_legacy 只对 jsonl / columnar 有效，SQLite 不读取旧版文件）"""
+    backend = (backend or getattr(Config, 'OI_HISTORY_BACKEND', 'jsonl')).lower()
+    if cold_retention_days is None:
+        cold_retention_days = getattr(Config, 'OI_COLD_RETENTION_DAYS', 0)
+    if backend == 'sqlite':
+        return SqliteHistoryStore(os.path.join(data_dir, 'oi_history.db'), max_history_days, cold_retention_days)
+    if backend == 'columnar':
+        return ColumnarHistoryStore(data_dir, max_history_days, cold_retention_days, read_legacy=read_legacy)
+    if backend != 'jsonl':
+        logger.warning(f"未知的OI历史存储后端 {backend}，使用 jsonl")
+    return JsonlHistoryStore(data_dir, max_history_days, cold_retention_days, read_legacy=read_legacy)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+OI比率缓存
+缓存每个币种最近一次计算的OI激增比率，以该币种最新样本的时间戳（按时间桶计算时还包括当前时间桶）
+作为缓存键：只有该币种有新样本（或进入新的时间桶）时才重新计算。
+两次采集之间重复运行或重新生成报告时可以完全跳过比率计算。缓存文件原子写入
+"""
+import json
+import logging
+import math
+import os
+from datetime import datetime
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class OIRatioCache:
+    """按 (币种, 最新样本时间戳) 失效的OI比率缓存，保存在 oi_history_cache.json"""
+
+    def __init__(self, cache_file: str = "oi_history_cache.json"):
+        self.cache_file = cache_file
+        self.params = None
+        self.entries = {}  # 币种 -> {'ratio': float | None, 'latest_timestamp': int | None, 'window': int | None}
+        self.dirty = False
+        self.loaded = False
+
+    def load(self):
+        """读取缓存文件；旧版只有 ratios 的文件视为空缓存"""
+        self.loaded = True
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取OI比率缓存失败: {e}")
+            return
+        entries = data.get('entries')
+        if isinstance(entries, dict):
+            self.params = data.get('params')
+            self.entries = entries
+
+    def lookup(self, symbols: list, latest_timestamps: dict, params: dict, window: int | None = None) -> tuple:
+        """查找缓存
+
+        Args:
+            symbols: 币种列表
+            latest_timestamps: 币种 -> 最新样本时间戳（无样本为 None）
+            params: 比率计算参数，与缓存中的不一致时全部视为未命中
+            window: 当前时间桶编号（按原始样本计算时为 None）
+
+        Returns:
+            (命中的比率 Series, 未命中的币种列表)
+        """
+        if not self.loaded:
+            self.load()
+        if self.params != params:
+            return pd.Series(dtype='float64', name='oi_surge_ratio'), list(symbols)
+        hits, missing = {}, []
+        for symbol in symbols:
+            entry = self.entries.get(symbol)
+            if (entry is not None and entry.get('latest_timestamp') == latest_timestamps.get(symbol)
+                    and entry.get('window') == window):
+                ratio = entry.get('ratio')
+                hits[symbol] = math.nan if ratio is None else ratio
+            else:
+                missing.append(symbol)
+        return pd.Series(hits, dtype='float64', name='oi_surge_ratio'), missing
+
+    def update(self, ratios: pd.Series, latest_timestamps: dict, params: dict, window: int | None = None):
+        """写入新计算的比率（NaN 表示历史数据不足，同样缓存）"""
+        if self.params != params:
+            self.params = params
+            self.entries = {}
+        for symbol, ratio in ratios.items():
+            self.entries[symbol] = {
+                'ratio': None if pd.isna(ratio) else float(ratio),
+                'latest_timestamp': latest_timestamps.get(symbol),
+                'window': window,
+            }
+        self.dirty = True
+
+    def invalidate(self, symbols: list | None = None):
+        """清除指定币种（默认全部）的缓存"""
+        if not self.loaded:
+            self.load()
+        if symbols is None:
+            self.entries = {}
+        else:
+            for symbol in symbols:
+                self.entries.pop(symbol, None)
+        self.dirty = True
+
+    def save(self):
+        """原子写入缓存文件（ratios 字段保留旧版的 币种 -> 比率 格式，便于直接查看）"""
+        if not self.dirty:
+            return
+        data = {
+            'timestamp': datetime.now().isoformat(),
+            'params': self.params,
+            'ratios': {symbol: entry['ratio'] for symbol, entry in self.entries.items()},
+            'entries': self.entries,
+        }
+        tmp_path = self.cache_file + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.cache_file)
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"保存OI比率缓存失败: {e}")
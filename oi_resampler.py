@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+OI时间桶重采样
+把不规则时间采集的OI样本对齐到固定时间桶（1h/4h/1d，按UTC整点对齐），
+桶内取最后一个值或均值，空桶沿用上一个桶的值（最多向后沿用 max_fill_buckets 个桶，
+停止采集或已下架的币种不会被当作OI没有变化）。
+聚合对所有币种一次性向量化计算；已结束的桶结果会被缓存并持久化，不再重复计算
+"""
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BUCKET_MS = {
+    '1h': 3_600_000,
+    '4h': 4 * 3_600_000,
+    '1d': 24 * 3_600_000,
+}
+
+
+def aggregate_buckets(symbol_ids: np.ndarray, timestamps: np.ndarray, values: np.ndarray,
+                      bucket_ms: int, how: str = 'last') -> tuple:
+    """对所有样本按 (币种, 时间桶) 分组聚合
+
+    Returns:
+        (分组的币种编号, 分组的桶编号, 分组的聚合值)，按币种、桶升序
+    """
+    if len(timestamps) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float64)
+    buckets = timestamps // bucket_ms
+    order = np.lexsort((timestamps, buckets, symbol_ids))
+    symbol_ids, buckets, values = symbol_ids[order], buckets[order], values[order]
+    # 每组的最后一个样本位置
+    is_last = np.ones(len(buckets), dtype=bool)
+    is_last[:-1] = (symbol_ids[1:] != symbol_ids[:-1]) | (buckets[1:] != buckets[:-1])
+    if how == 'mean':
+        group_ids = np.cumsum(np.concatenate(([0], is_last[:-1].astype(np.int64))))
+        sums = np.bincount(group_ids, weights=values)
+        counts = np.bincount(group_ids)
+        aggregated = sums / counts
+    else:
+        aggregated = values[is_last]
+    return symbol_ids[is_last], buckets[is_last], aggregated
+
+
+class OIResampler:
+    """带已结束桶缓存的OI重采样器"""
+
+    def __init__(self, bucket: str = '4h', how: str = 'last', cache_file: str | None = None,
+                 max_buckets: int = 256, max_fill_buckets: int = 1):
+        if bucket not in BUCKET_MS:
+            raise ValueError(f"不支持的时间桶: {bucket}，可选 {list(BUCKET_MS)}")
+        if how not in ('last', 'mean'):
+            raise ValueError(f"不支持的聚合方式: {how}，可选 last / mean")
+        self.bucket = bucket
+        self.bucket_ms = BUCKET_MS[bucket]
+        self.how = how
+        self.cache_file = cache_file
+        self.max_buckets = max_buckets  # 每个币种最多缓存的已结束桶数量
+        self.max_fill_buckets = max_fill_buckets  # 空桶最多沿用几个桶之前的值
+        self._closed = {}  # 币种 -> (已结束桶编号数组, 聚合值数组)
+        self._closed_until = {}  # 币种 -> 已缓存到的桶编号（不含）
+        self._load_cache()
+
+    # ==================== 缓存 ====================
+
+    def _load_cache(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with np.load(self.cache_file, allow_pickle=False) as data:
+                if str(data['bucket']) != self.bucket or str(data['how']) != self.how:
+                    return
+                symbols = data['symbols'].tolist()
+                offsets = data['offsets']
+                buckets, values, until = data['buckets'], data['values'], data['until']
+            for i, symbol in enumerate(symbols):
+                lo, hi = offsets[i], offsets[i + 1]
+                self._closed[symbol] = (buckets[lo:hi], values[lo:hi])
+                self._closed_until[symbol] = int(until[i])
+        except Exception as e:
+            logger.warning(f"加载OI重采样缓存失败: {e}")
+
+    def save_cache(self):
+        """持久化已结束桶的缓存"""
+        if not self.cache_file:
+            return
+        symbols = list(self._closed)
+        lengths = [len(self._closed[s][0]) for s in symbols]
+        tmp_path = self.cache_file + '.tmp.npz'
+        try:
+            np.savez(
+                tmp_path,
+                bucket=np.array(self.bucket), how=np.array(self.how),
+                symbols=np.array(symbols, dtype=str),
+                offsets=np.concatenate(([0], np.cumsum(lengths))).astype(np.int64),
+                buckets=np.concatenate([self._closed[s][0] for s in symbols] or [np.empty(0, np.int64)]),
+                values=np.concatenate([self._closed[s][1] for s in symbols] or [np.empty(0, np.float64)]),
+                until=np.array([self._closed_until[s] for s in symbols], dtype=np.int64),
+            )
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            logger.error(f"保存OI重采样缓存失败: {e}")
+
+    def invalidate(self, symbols: list | None = None):
+        """丢弃缓存（例如回填写入了已结束的桶）"""
+        for symbol in (list(self._closed) if symbols is None else symbols):
+            self._closed.pop(symbol, None)
+            self._closed_until.pop(symbol, None)
+
+    def invalidate_written(self, records: dict) -> list:
+        """新写入的记录早于某币种已缓存的桶时丢弃该币种的缓存（否则 bucketize 会跳过这些样本）
+
+        Args:
+            records: 币种 -> OI记录 或 OI记录列表（刚写入存储的记录）
+
+        Returns:
+            被丢弃缓存的币种列表
+        """
+        stale = []
+        for symbol, items in records.items():
+            until = self._closed_until.get(symbol)
+            if until is None or not items:
+                continue
+            if isinstance(items, dict):
+                items = [items]
+            if min(int(item['timestamp']) for item in items) < until * self.bucket_ms:
+                stale.append(symbol)
+        self.invalidate(stale)
+        return stale
+
+    # ==================== 重采样 ====================
+
+    def bucketize(self, index, symbols: list, now_ms: int) -> dict:
+        """计算各币种截至当前桶的所有桶值：币种 -> (桶编号数组, 聚合值数组)
+
+        只对缓存之后的样本做聚合，已结束的桶写入缓存
+        """
+        current_bucket = now_ms // self.bucket_ms
+        ids, ts_parts, value_parts = [], [], []
+        for i, symbol in enumerate(symbols):
+            timestamps = index.timestamps.get(symbol)
+            if timestamps is None or len(timestamps) == 0:
+                continue
+            until = self._closed_until.get(symbol)
+            lo = np.searchsorted(timestamps, until * self.bucket_ms) if until is not None else 0
+            hi = np.searchsorted(timestamps, (current_bucket + 1) * self.bucket_ms)
+            if hi > lo:
+                ids.append(np.full(hi - lo, i, dtype=np.int64))
+                ts_parts.append(timestamps[lo:hi])
+                value_parts.append(index.values[symbol][lo:hi])
+
+        if ids:
+            group_symbols, group_buckets, group_values = aggregate_buckets(
+                np.concatenate(ids), np.concatenate(ts_parts), np.concatenate(value_parts),
+                self.bucket_ms, self.how)
+            bounds = np.searchsorted(group_symbols, np.arange(len(symbols) + 1))
+        else:
+            group_buckets = np.empty(0, dtype=np.int64)
+            group_values = np.empty(0, dtype=np.float64)
+            bounds = np.zeros(len(symbols) + 1, dtype=np.int64)
+
+        result = {}
+        for i, symbol in enumerate(symbols):
+            new_buckets = group_buckets[bounds[i]:bounds[i + 1]]
+            new_values = group_values[bounds[i]:bounds[i + 1]]
+            cached_buckets, cached_values = self._closed.get(
+                symbol, (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)))
+            buckets = np.concatenate((cached_buckets, new_buckets))
+            values = np.concatenate((cached_values, new_values))
+            if len(buckets) == 0:
+                continue
+            result[symbol] = (buckets, values)
+            # 当前桶之前的桶已结束，写入缓存
+            closed = (buckets < current_bucket) & (buckets >= current_bucket - self.max_buckets)
+            self._closed[symbol] = (buckets[closed], values[closed])
+            self._closed_until[symbol] = int(current_bucket)
+        return result
+
+    def bucket_matrix(self, index, symbols: list, length: int, now_ms: int) -> tuple:
+        """最近 length 个时间桶（截至当前桶）的二维矩阵，空桶沿用上一个桶的值
+
+        只沿用 max_fill_buckets 个桶以内的值，因此最新样本不在最近 max_fill_buckets 个桶
+        （默认为当前桶或上一个桶）内的币种，当前桶为 NaN，比率也为 NaN
+
+        Returns:
+            (桶起始时间戳数组, 矩阵[币种, 桶])，首个样本之前和超出沿用范围的桶为 NaN
+        """
+        symbols = list(symbols)
+        current_bucket = now_ms // self.bucket_ms
+        grid = np.arange(current_bucket - length + 1, current_bucket + 1, dtype=np.int64)
+        matrix = np.full((len(symbols), length), np.nan, dtype=np.float64)
+        bucketed = self.bucketize(index, symbols, now_ms)
+        for row, symbol in enumerate(symbols):
+            if symbol not in bucketed:
+                continue
+            buckets, values = bucketed[symbol]
+            pos = np.searchsorted(buckets, grid, side='right') - 1
+            valid = pos >= 0
+            valid[valid] = grid[valid] - buckets[pos[valid]] <= self.max_fill_buckets
+            matrix[row, valid] = values[pos[valid]]
+        return grid * self.bucket_ms, matrix
+
+    def surge_ratios(self, index, symbols: list, recent_count: int = 3, total_count: int = 10,
+                     now_ms: int | None = None) -> pd.Series:
+        """基于时间桶的OI激增比率：最近 recent_count 个桶均值 / 最近 total_count 个桶均值
+
+        数据覆盖不足 total_count 个桶或均值为0的币种为 NaN
+        """
+        if now_ms is None:
+            now_ms = int(pd.Timestamp.now(tz='UTC').timestamp() * 1000)
+        symbols = list(symbols)
+        _, matrix = self.bucket_matrix(index, symbols, total_count, now_ms)
+        complete = ~np.isnan(matrix).any(axis=1)
+        ratios = np.full(len(symbols), np.nan, dtype=np.float64)
+        if complete.any():
+            rows = matrix[complete]
+            recent_avg = rows[:, -recent_count:].mean(axis=1)
+            total_avg = rows.mean(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios[complete] = np.where(total_avg != 0, recent_avg / total_avg, np.nan)
+        return pd.Series(ratios, index=pd.Index(symbols, name='symbol'), name='oi_surge_ratio')
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+OI环形缓冲区
+激增比率只需要每个币种最近的少量样本，这里为每个币种维护固定容量的环形缓冲区，
+新样本到达时以 O(1) 更新最近N个和最近M个的累计和，比率随时可读。
+窗口内的样本超过 max_age_ms 时比率为 NaN；超过 max_age_ms 没有新样本的币种（停止采集或已下架）保存时淘汰。
+所有缓冲区保存在一个小的二进制文件中，启动时毫秒级加载
+"""
+import logging
+import math
+import os
+import struct
+import time
+from array import array
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = b'OIRB'
+FILE_VERSION = 1
+HEADER_FORMAT = '<4sHHHI'  # magic, version, capacity, recent_count, 币种数量
+
+
+class OIRingBuffer:
+    """单个币种的固定容量环形缓冲区"""
+
+    __slots__ = ('capacity', 'recent_count', 'timestamps', 'values',
+                 'start', 'size', 'total_sum', 'recent_sum')
+
+    def __init__(self, capacity: int = 10, recent_count: int = 3):
+        self.capacity = capacity
+        self.recent_count = recent_count
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.start = 0  # 最旧样本的位置
+        self.size = 0
+        self.total_sum = 0.0
+        self.recent_sum = 0.0
+
+    def _slot(self, logical_index: int) -> int:
+        return (self.start + logical_index) % self.capacity
+
+    @property
+    def last_timestamp(self) -> int | None:
+        return self.timestamps[self._slot(self.size - 1)] if self.size else None
+
+    def push(self, timestamp: int, value: float) -> bool:
+        """追加一个样本，时间戳不晚于最新样本时忽略；返回是否写入"""
+        if self.size and timestamp <= self.last_timestamp:
+            return False
+
+        if self.size == self.capacity:
+            # 淘汰最旧样本
+            self.total_sum -= self.values[self.start]
+            self.start = (self.start + 1) % self.capacity
+            self.size -= 1
+
+        slot = self._slot(self.size)
+        self.timestamps[slot] = timestamp
+        self.values[slot] = value
+        self.size += 1
+        self.total_sum += value
+        self.recent_sum += value
+        if self.size > self.recent_count:
+            # 滑出最近N个窗口的样本
+            self.recent_sum -= self.values[self._slot(self.size - 1 - self.recent_count)]
+
+        if slot == self.capacity - 1:
+            # 每写满一轮重新精确求和，避免浮点误差累积
+            self._resum()
+        return True
+
+    def _resum(self):
+        ordered = self.ordered_values()
+        self.total_sum = math.fsum(ordered)
+        self.recent_sum = math.fsum(ordered[-self.recent_count:])
+
+    def ordered_values(self) -> list:
+        """按时间升序的OI值"""
+        return [self.values[self._slot(i)] for i in range(self.size)]
+
+    def ordered_timestamps(self) -> list:
+        """按时间升序的时间戳"""
+        return [self.timestamps[self._slot(i)] for i in range(self.size)]
+
+    def ratio(self, min_timestamp: int | None = None) -> float:
+        """最近N个均值 / 最近M个均值；样本未满、均值为0或窗口内有早于 min_timestamp 的样本时为 NaN"""
+        if self.size < self.capacity or self.total_sum == 0:
+            return math.nan
+        if min_timestamp is not None and self.timestamps[self.start] < min_timestamp:
+            return math.nan
+        return (self.recent_sum / self.recent_count) / (self.total_sum / self.capacity)
+
+
+class OIRingBufferStore:
+    """所有币种的环形缓冲区及其二进制持久化"""
+
+    def __init__(self, path: str, capacity: int = 10, recent_count: int = 3, max_age_ms: int | None = None):
+        self.path = path
+        self.capacity = capacity
+        self.recent_count = recent_count
+        self.max_age_ms = max_age_ms  # 样本有效期，None 表示不限
+        self.buffers = {}
+        self.loaded = False
+
+    def buffer(self, symbol: str) -> OIRingBuffer:
+        buf = self.buffers.get(symbol)
+        if buf is None:
+            buf = self.buffers[symbol] = OIRingBuffer(self.capacity, self.recent_count)
+        return buf
+
+    def push_records(self, records: dict) -> int:
+        """写入新采集的记录（币种 -> OI记录 或 OI记录列表），返回写入的样本数"""
+        pushed = 0
+        for symbol, items in records.items():
+            if isinstance(items, dict):
+                items = [items]
+            buf = self.buffer(symbol)
+            for item in sorted(items, key=lambda x: x['timestamp']):
+                pushed += buf.push(int(item['timestamp']), float(item['openInterest']))
+        return pushed
+
+    def seed_from_index(self, index, symbols: list | None = None):
+        """用历史索引中的最近样本重建缓冲区"""
+        for symbol in (symbols if symbols is not None else index.symbols):
+            buf = self.buffers[symbol] = OIRingBuffer(self.capacity, self.recent_count)
+            timestamps = index.timestamps.get(symbol, ())[-self.capacity:]
+            values = index.values.get(symbol, ())[-self.capacity:]
+            for ts, value in zip(timestamps, values):
+                buf.push(int(ts), float(value))
+
+    def _min_timestamp(self, now_ms: int | None) -> int | None:
+        if self.max_age_ms is None:
+            return None
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        return now_ms - self.max_age_ms
+
+    def ratios(self, symbols: list, now_ms: int | None = None) -> pd.Series:
+        """各币种的激增比率（以币种为索引，数据不足或窗口内有过期样本为 NaN）"""
+        symbols = list(symbols)
+        min_timestamp = self._min_timestamp(now_ms)
+        values = [self.buffers[s].ratio(min_timestamp) if s in self.buffers else math.nan for s in symbols]
+        return pd.Series(np.array(values, dtype=np.float64),
+                         index=pd.Index(symbols, name='symbol'), name='oi_surge_ratio')
+
+    def load(self) -> bool:
+        """从二进制文件加载，文件不存在或参数不一致时返回 False"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                payload = f.read()
+            magic, version, capacity, recent_count, count = struct.unpack_from(HEADER_FORMAT, payload, 0)
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                logger.warning(f"{self.path} 格式不支持，忽略")
+                return False
+            if capacity != self.capacity or recent_count != self.recent_count:
+                logger.info(f"{self.path} 的窗口参数已变化，需要重建")
+                return False
+            offset = struct.calcsize(HEADER_FORMAT)
+            buffers = {}
+            for _ in range(count):
+                name_len, size = struct.unpack_from('<BH', payload, offset)
+                offset += 3
+                symbol = payload[offset:offset + name_len].decode('utf-8')
+                offset += name_len
+                timestamps = np.frombuffer(payload, dtype='<i8', count=size, offset=offset)
+                offset += 8 * size
+                values = np.frombuffer(payload, dtype='<f8', count=size, offset=offset)
+                offset += 8 * size
+                buf = OIRingBuffer(capacity, recent_count)
+                for ts, value in zip(timestamps.tolist(), values.tolist()):
+                    buf.push(ts, value)
+                buffers[symbol] = buf
+            self.buffers = buffers
+            self.loaded = True
+            return True
+        except Exception as e:
+            logger.warning(f"加载OI环形缓冲区失败: {e}")
+            return False
+
+    def save(self, now_ms: int | None = None):
+        """原子写入二进制文件，超过有效期没有新样本的币种不再保存"""
+        min_timestamp = self._min_timestamp(now_ms)
+        if min_timestamp is not None:
+            stale = [symbol for symbol, buf in self.buffers.items()
+                     if buf.size == 0 or buf.last_timestamp < min_timestamp]
+            for symbol in stale:
+                del self.buffers[symbol]
+        parts = [struct.pack(HEADER_FORMAT, FILE_MAGIC, FILE_VERSION,
+                             self.capacity, self.recent_count, len(self.buffers))]
+        for symbol, buf in self.buffers.items():
+            name = symbol.encode('utf-8')
+            parts.append(struct.pack('<BH', len(name), buf.size))
+            parts.append(name)
+            parts.append(np.asarray(buf.ordered_timestamps(), dtype='<i8').tobytes())
+            parts.append(np.asarray(buf.ordered_values(), dtype='<f8').tobytes())
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(parts))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"保存OI环形缓冲区失败: {e}")
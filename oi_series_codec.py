@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+OI时间序列紧凑编码
+Gorilla 风格的无损编码，编码和解码全部用 NumPy 向量化实现：
+
+- 时间戳：二阶差分（delta-of-delta），固定间隔采集时几乎全为0
+- OI值：能精确表示为定点整数时存一阶差分，否则存与上一个值的 float64 位模式异或（XOR）
+- 差分结果经 zigzag 映射为无符号整数后按 varint（LEB128）写出，小数值只占1个字节
+
+    b'OIS1' | 样本数(uint32) | 小数位数(int8，-1=XOR) | 时间戳段长度(uint32) | 时间戳段 | OI段
+"""
+import struct
+import numpy as np
+
+SERIES_MAGIC = b'OIS1'
+SERIES_HEADER = '<4sIbI'
+MAX_DECIMAL_SCALE = 8
+XOR_SCALE = -1
+
+
+def decimal_scale(values: np.ndarray) -> int | None:
+    """能把所有值精确表示为整数的最小十进制位数，不存在时返回 None"""
+    if np.signbit(values[values == 0]).any():
+        return None  # -0.0 转为整数后无法还原符号
+    for scale in range(MAX_DECIMAL_SCALE + 1):
+        factor = 10.0 ** scale
+        scaled = np.round(values * factor)
+        if np.all(np.abs(scaled) < 2 ** 53) and np.array_equal(scaled / factor, values):
+            return scale
+    return None
+
+
+# ==================== zigzag / varint ====================
+
+def zigzag_encode(values: np.ndarray) -> np.ndarray:
+    """有符号整数映射为无符号整数（0,-1,1,-2 → 0,1,2,3）"""
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def zigzag_decode(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.uint64)
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+def varint_encode(values: np.ndarray) -> bytes:
+    """无符号整数数组按 LEB128 编码（每字节7位，最高位表示后面还有字节）"""
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return b''
+    lengths = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        lengths += values >= np.uint64(1 << (7 * k))
+    owner = np.repeat(np.arange(len(values)), lengths)
+    position = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    out = ((values[owner] >> (7 * position).astype(np.uint64)) & np.uint64(0x7F)).astype(np.uint8)
+    out[position < lengths[owner] - 1] |= 0x80
+    return out.tobytes()
+
+
+def varint_decode(buffer) -> np.ndarray:
+    """解码 varint_encode 的结果，返回 uint64 数组"""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if len(data) == 0:
+        return np.empty(0, dtype=np.uint64)
+    ends = np.flatnonzero((data & 0x80) == 0)
+    if len(ends) == 0 or ends[-1] != len(data) - 1:
+        raise ValueError("varint 数据不完整")
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    if lengths.max() > 10:
+        raise ValueError("varint 超出64位")
+    position = np.arange(len(data)) - np.repeat(starts, lengths)
+    parts = (data & 0x7F).astype(np.uint64) << (7 * position).astype(np.uint64)
+    return np.bitwise_or.reduceat(parts, starts)
+
+
+# ==================== 时间戳 / OI值 ====================
+
+def encode_timestamps(timestamps: np.ndarray) -> bytes:
+    """毫秒时间戳按二阶差分编码"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    deltas = np.diff(timestamps, prepend=0)
+    return varint_encode(zigzag_encode(np.diff(deltas, prepend=0)))
+
+
+def decode_timestamps(buffer) -> np.ndarray:
+    return np.cumsum(np.cumsum(zigzag_decode(varint_decode(buffer))))
+
+
+def encode_values(values: np.ndarray) -> tuple:
+    """OI值编码，返回 (小数位数，XOR 编码时为 -1, 编码字节)"""
+    values = np.asarray(values, dtype=np.float64)
+    scale = decimal_scale(values) if len(values) else 0
+    if scale is None:
+        bits = values.view(np.uint64)
+        xored = bits ^ np.concatenate((np.zeros(1, dtype=np.uint64), bits[:-1]))
+        return XOR_SCALE, varint_encode(xored)
+    ints = np.round(values * 10.0 ** scale).astype(np.int64)
+    return scale, varint_encode(zigzag_encode(np.diff(ints, prepend=0)))
+
+
+def decode_values(buffer, scale: int) -> np.ndarray:
+    if scale == XOR_SCALE:
+        return np.bitwise_xor.accumulate(varint_decode(buffer)).view(np.float64)
+    ints = np.cumsum(zigzag_decode(varint_decode(buffer)))
+    return ints / 10.0 ** scale
+
+
+# ==================== 完整序列 ====================
+
+def encode_series(timestamps: np.ndarray, values: np.ndarray) -> bytes:
+    """把一条（或多条首尾相接的）OI序列编码为字节串，解码后与原数组逐位相同"""
+    if len(timestamps) != len(values):
+        raise ValueError("时间戳与OI数组长度不一致")
+    ts_bytes = encode_timestamps(timestamps)
+    scale, value_bytes = encode_values(values)
+    return struct.pack(SERIES_HEADER, SERIES_MAGIC, len(timestamps), scale, len(ts_bytes)) + ts_bytes + value_bytes
+
+
+def decode_series(blob: bytes) -> tuple:
+    """解码 encode_series 的结果，返回 (int64 时间戳数组, float64 OI数组)"""
+    magic, count, scale, ts_length = struct.unpack_from(SERIES_HEADER, blob, 0)
+    if magic != SERIES_MAGIC:
+        raise ValueError("不是OI序列编码数据")
+    start = struct.calcsize(SERIES_HEADER)
+    view = memoryview(blob)
+    timestamps = decode_timestamps(view[start:start + ts_length])
+    values = decode_values(view[start + ts_length:], scale)
+    if len(timestamps) != count or len(values) != count:
+        raise ValueError("OI序列编码数据长度不符")
+    return timestamps, values
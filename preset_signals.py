@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+多策略预设信号矩阵
+各预设共享同一份指标（OI/市值、成交量/市值、信号强度、OI激增比率），只有阈值不同。
+把每个预设的阈值排成列向量，与指标行向量广播比较，一次得到 预设 × 币种 的买入/警报信号矩阵，
+不必为每个预设重复运行 calculate_signals（也不会重复读写OI历史）
+"""
+import numpy as np
+import pandas as pd
+
+
+class PresetSignals:
+    """多个策略预设在同一批行情数据上的信号矩阵"""
+
+    def __init__(self, result, presets: list, buy: np.ndarray, alert: np.ndarray):
+        """
+        Args:
+            result: 共享指标的分析结果（SignalResult）
+            presets: 预设名称列表，对应矩阵的行
+            buy: 买入信号矩阵，形状 (预设数, 币种数)
+            alert: 警报信号矩阵，形状 (预设数, 币种数)
+        """
+        self.result = result
+        self.presets = list(presets)
+        self.buy = buy
+        self.alert = alert
+
+    @property
+    def symbols(self) -> list:
+        frame = self.result.frame
+        return frame['symbol'].tolist() if 'symbol' in frame.columns else []
+
+    def matrix(self, kind: str = 'buy') -> pd.DataFrame:
+        """信号矩阵（行为预设，列为币种），kind 为 buy 或 alert"""
+        values = self.buy if kind == 'buy' else self.alert
+        return pd.DataFrame(values, index=self.presets, columns=self.symbols)
+
+    def fired(self) -> pd.DataFrame:
+        """至少一个预设触发信号的币种，以及分别触发买入/警报信号的预设
+
+        按触发买入信号的预设数、再按信号强度从高到低排序
+        """
+        names = np.array(self.presets, dtype=object)
+        fired = self.buy.any(axis=0) | self.alert.any(axis=0)
+        if not fired.any():
+            return pd.DataFrame(columns=['symbol', 'buy_presets', 'alert_presets', 'buy_preset_count', 'signal_strength'])
+        frame = self.result.frame[fired]
+        buy, alert = self.buy[:, fired], self.alert[:, fired]
+        fired_df = pd.DataFrame({
+            'symbol': frame['symbol'].to_numpy(),
+            'buy_presets': [names[column].tolist() for column in buy.T],
+            'alert_presets': [names[column].tolist() for column in alert.T],
+            'buy_preset_count': buy.sum(axis=0),
+            'signal_strength': frame['signal_strength'].to_numpy(),
+        })
+        return fired_df.sort_values(['buy_preset_count', 'signal_strength'], ascending=False, kind='stable') \
+            .reset_index(drop=True)
+
+    def summary(self) -> dict:
+        """各预设的信号数量（预设 -> {'buy_signals', 'alert_signals'}）"""
+        return {
+            preset: {'buy_signals': int(buy), 'alert_signals': int(alert)}
+            for preset, buy, alert in zip(self.presets, self.buy.sum(axis=1), self.alert.sum(axis=1))
+        }
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+HTTP响应缓存
+按接口和参数缓存JSON响应，支持每个接口单独设置TTL，
+过期后如服务器提供 ETag/Last-Modified 则发送条件请求重新验证。
+内存层供同一进程复用，磁盘层供多次命令行调用之间共享
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """内存 + 磁盘两级响应缓存"""
+
+    def __init__(self, cache_dir: str = ".http_cache"):
+        self.cache_dir = cache_dir
+        self._memory = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    @staticmethod
+    def make_key(path: str, params: dict | None = None) -> str:
+        """缓存键：接口路径 + 排序后的参数"""
+        if not params:
+            return path
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{path}?{query}"
+
+    def _disk_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, key: str) -> dict | None:
+        """获取缓存条目（可能已过期），先查内存再查磁盘"""
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+
+        disk_path = self._disk_path(key)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            with open(disk_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception as e:
+            logger.warning(f"读取响应缓存 {key} 失败: {e}")
+            return None
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: dict) -> bool:
+        return entry.get('expires_at', 0) > time.time()
+
+    def put(self, key: str, data, ttl: float, etag: str | None = None, last_modified: str | None = None) -> dict:
+        """写入缓存条目（内存和磁盘）"""
+        now = time.time()
+        entry = {
+            'key': key,
+            'stored_at': now,
+            'expires_at': now + ttl,
+            'etag': etag,
+            'last_modified': last_modified,
+            'data': data,
+        }
+        with self._lock:
+            self._memory[key] = entry
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            disk_path = self._disk_path(key)
+            tmp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, disk_path)
+        except Exception as e:
+            logger.warning(f"写入响应缓存 {key} 失败: {e}")
+        return entry
+
+    def touch(self, key: str, entry: dict, ttl: float) -> dict:
+        """条件请求返回304后延长条目有效期"""
+        return self.put(key, entry['data'], ttl, entry.get('etag'), entry.get('last_modified'))
+
+    def record(self, outcome: str):
+        """记录一次缓存结果：hit / miss / revalidated"""
+        with self._lock:
+            if outcome == 'hit':
+                self.hits += 1
+            elif outcome == 'revalidated':
+                self.revalidated += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        """缓存命中统计，avoided 为省去的完整下载次数"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'avoided': self.hits + self.revalidated,
+            }
+
+    def reset_stats(self):
+        """清零命中统计（定时任务每个周期开始时调用，统计只反映本周期）"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.revalidated = 0
+
+    def clear(self):
+        """清空内存层和磁盘层"""
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, filename))
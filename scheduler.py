@@ -15,7 +15,9 @@ from config import Config
 from local_supply import COIN_SUPPLY
 from manual_supply import MANUAL_SUPPLY
 from oi_history_collector import OIHistoryCollector
-import requests
+from market_snapshot import MarketSnapshot, build_market_snapshot
+from market_snapshot_store import MarketSnapshotStore
+from binance_api import response_cache
 
 # 设置日志
 logging.basicConfig(
@@ -28,10 +30,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-BINANCE_FUTURES_TICKER_URL = 'https://fapi.binance.com/fapi/v1/ticker/24hr'
-BINANCE_FUTURES_OI_URL = 'https://fapi.binance.com/fapi/v1/openInterest'
-BINANCE_FUTURES_FUNDING_URL = 'https://fapi.binance.com/fapi/v1/premiumIndex'
-
 def get_final_supply():
     """manual_supply.py 有值优先，否则用 local_supply.py"""
     supply = COIN_SUPPLY.copy()
@@ -41,51 +39,23 @@ def get_final_supply():
     return supply
 
 # 获取币安USDT合约币种行情数据
-def get_binance_futures_data(symbols):
-    resp = requests.get(BINANCE_FUTURES_TICKER_URL, timeout=10)
-    tickers = resp.json() if resp.status_code == 200 else []
-    ticker_map = {t['symbol']: t for t in tickers}
-    # 获取所有币种资金费率
-    funding_resp = requests.get(BINANCE_FUTURES_FUNDING_URL, timeout=10)
-    funding_data = funding_resp.json() if funding_resp.status_code == 200 else []
-    funding_map = {f['symbol']: float(f.get('lastFundingRate', 0)) for f in funding_data}
-    # 先筛选有行情的币种
-    market_rows = []
-    for symbol in symbols:
-        usdt_pair = symbol + 'USDT'
-        t = ticker_map.get(usdt_pair)
-        if not t:
-            continue
-        funding_rate = funding_map.get(usdt_pair, 0)
-        price_change_percent = float(t.get('priceChangePercent', 0)) / 100
-        market_rows.append({
-            'symbol': symbol,
-            'price': float(t['lastPrice']),
-            'quote_volume_24h': float(t['quoteVolume']),
-            'funding_rate': funding_rate,
-            'price_change_percent_24h': price_change_percent,
-        })
-    market_df = pd.DataFrame(market_rows)
-    # 按成交额降序取前100
-    top_n = getattr(Config, 'TOP_VOLUME_LIMIT', 100)
-    market_df = market_df.sort_values('quote_volume_24h', ascending=False).head(top_n)
-    # 只对前100采集OI
-    oi_list = []
-    total = len(market_df)
-    for idx, row in enumerate(market_df.itertuples(), 1):
-        usdt_pair = row[1] + 'USDT'  # row[1] 是 symbol
-        try:
-            oi_resp = requests.get(BINANCE_FUTURES_OI_URL, params={'symbol': usdt_pair}, timeout=10)
-            oi_val = float(oi_resp.json().get('openInterest', 0))
-        except Exception as e:
-            print(f"获取 {usdt_pair} open interest 失败: {e}")
-            oi_val = 0
-        oi_list.append(oi_val * row[2])  # row[2] 是 price
-        if idx % 10 == 0 or idx == total:
-            print(f"已处理OI {idx}/{total} 个币种...")
-            time.sleep(1)
-    market_df['open_interest_value'] = oi_list
-    return market_df.to_dict(orient='records')
+def get_binance_futures_data(symbols, snapshot: MarketSnapshot | None = None):
+    """返回成交额前N币种的行情记录，传入快照时不再请求API"""
+    if snapshot is None:
+        snapshot = build_market_snapshot(symbols)
+    return snapshot.to_records()
+
+def collect_oi_history(oi_collector: OIHistoryCollector, snapshot: MarketSnapshot) -> pd.Series:
+    """OI历史阶段：回填、写入本次采集的OI并计算激增比率，失败时所有币种比率记为1.0"""
+    try:
+        return oi_collector.update_history_and_ratios(
+            snapshot.symbols,
+            oi_data=snapshot.oi_history_records(snapshot.symbols),
+            backfill=getattr(Config, 'AUTO_BACKFILL_OI_HISTORY', True),
+        )
+    except Exception as e:
+        logger.error(f"OI历史阶段异常: {e}", exc_info=True)
+        return pd.Series(1.0, index=pd.Index(snapshot.symbols, name='symbol'), name='oi_surge_ratio')
 
 def run_main_program():
     """运行主程序"""
@@ -94,6 +64,9 @@ def run_main_program():
         logger.info(f"开始执行定时任务 - {datetime.now(pytz.timezone('Asia/Shanghai'))}")
         logger.info("=" * 50)
         
+        # 响应缓存统计只记录本周期（守护模式下进程会运行多个周期）
+        response_cache.reset_stats()
+        
         # 创建企业微信通知器
         wechat_notifier = WeChatNotifier()
         
@@ -110,8 +83,12 @@ def run_main_program():
             logger.info(f"币种列表已更新: {len(current_symbols)} -> {len(updated_symbols)}")
             # 这里可以添加币种列表持久化逻辑，如果需要的话
         
-        # 获取币安行情数据（只采集前100 OI）
-        market_data = get_binance_futures_data(updated_symbols)
+        # 获取币安行情数据（只采集前100 OI），快照同时供分析和OI历史记录使用
+        snapshot = build_market_snapshot(updated_symbols, oi_collector=oi_collector)
+        market_data = get_binance_futures_data(updated_symbols, snapshot=snapshot)
+        
+        # OI历史阶段（回填、写入历史、计算比率），行情数据为空时也照常记录历史
+        oi_ratios = collect_oi_history(oi_collector, snapshot)
         df = pd.DataFrame(market_data)
         # 合并流通量
         df['supply'] = df['symbol'].apply(lambda s: supply_dict.get(s))
@@ -131,13 +108,27 @@ def run_main_program():
         
         logger.info(f"成功收集 {len(df)} 个币种的行情和流通量数据")
         
-        # 分析交易信号
-        analyzer = TradingSignalAnalyzer()
-        signals_df = analyzer.calculate_signals(df)
+        # 分析交易信号（纯计算，OI比率来自历史阶段；信号描述只为报告中展示的行生成）
+        analyzer = TradingSignalAnalyzer(oi_collector=oi_collector)
+        signals = analyzer.evaluate(df, oi_ratios=oi_ratios)
+        
+        # 保存本次运行的完整行情数据，供后续分析复用
+        if getattr(Config, 'ENABLE_MARKET_SNAPSHOT_STORE', True):
+            try:
+                run_ts = int(datetime.fromisoformat(snapshot.created_at).timestamp() * 1000)
+                rows = MarketSnapshotStore(Config.MARKET_SNAPSHOT_DIR).append_run(signals.frame, run_ts)
+                logger.info(f"已保存 {rows} 个币种的市场快照")
+            except Exception as e:
+                logger.error(f"保存市场快照失败: {e}")
         
-        if not signals_df.empty:
-            summary_stats = analyzer.generate_report(signals_df)
-            message = wechat_notifier.format_trading_signals_message(signals_df, summary_stats)
+        if not signals.empty:
+            summary_stats = analyzer.generate_report(signals)
+            # 同一份指标上广播比较所有策略预设的阈值，得到 预设 × 币种 的信号矩阵
+            preset_signals = None
+            if getattr(Config, 'ENABLE_PRESET_COMPARISON', True):
+                preset_signals = analyzer.evaluate_presets(signals)
+                summary_stats['preset_signals'] = preset_signals.summary()
+            message = wechat_notifier.format_trading_signals_message(signals.frame, summary_stats)
             
             # 检查是否有警报信号
             alert_signals_count = summary_stats.get('alert_signals', 0)
@@ -149,7 +140,9 @@ def run_main_program():
                 logger.info("企业微信通知发送成功")
             else:
                 logger.warning("企业微信通知发送失败")
-            analyzer.print_analysis(signals_df)
+            analyzer.print_analysis(signals)
+            if preset_signals is not None:
+                analyzer.print_preset_comparison(preset_signals)
         else:
             logger.warning("未生成任何交易信号")
             wechat_notifier.send_simple_notification(
@@ -157,6 +150,10 @@ def run_main_program():
                 "本次分析未发现任何交易信号，建议观望。"
             )
         
+        cache_stats = response_cache.stats()
+        logger.info(f"响应缓存: 命中 {cache_stats['hits']}，重新验证 {cache_stats['revalidated']}，"
+                    f"未命中 {cache_stats['misses']}，共省去 {cache_stats['avoided']} 次下载")
+        
         logger.info("=" * 50)
         logger.info(f"定时任务执行完成 - {datetime.now(pytz.timezone('Asia/Shanghai'))}")
         logger.info("=" * 50)
@@ -208,6 +205,13 @@ def run_once():
     logger.info("立即运行主程序...")
     run_main_program()
 
+def run_backfill():
+    """回填所有跟踪币种的OI历史数据"""
+    supply_dict = get_final_supply()
+    oi_collector = OIHistoryCollector()
+    symbols = oi_collector.update_symbols_list(list(supply_dict.keys()))
+    oi_collector.backfill_history(symbols)
+
 def show_next_run():
     """显示下次运行时间"""
     next_run = schedule.next_run()
@@ -225,10 +229,13 @@ if __name__ == '__main__':
     parser.add_argument('--daemon', action='store_true', help='以守护进程模式运行定时任务')
     parser.add_argument('--every-hours', type=int, default=None, help='每隔N小时运行一次（如1或2）')
     parser.add_argument('--funding-rate', action='store_true', help='按币安资金费率结算时间运行（每8小时一次）')
+    parser.add_argument('--backfill', action='store_true', help='从openInterestHist回填所有跟踪币种的OI历史数据')
     
     args = parser.parse_args()
     
-    if args.run_now:
+    if args.backfill:
+        run_backfill()
+    elif args.run_now:
         run_once()
     elif args.show_next:
         setup_schedule(args.every_hours, args.funding_rate)
@@ -244,3 +251,4 @@ if __name__ == '__main__':
         print("  python scheduler.py --daemon --every-hours 1     # 每1小时运行一次")
         print("  python scheduler.py --daemon --every-hours 2     # 每2小时运行一次")
         print("  python scheduler.py --daemon --funding-rate      # 按资金费率结算时间运行")
+        print("  python scheduler.py --backfill                   # 回填OI历史数据（冷启动）")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+延迟生成描述的信号分析结果
+布尔信号、信号强度、风险评分等整列向量化指标在分析时立即计算（统计和筛选需要全部行），
+逐行的信号描述只在报告实际展示某些行时才生成，并按行缓存；
+同一筛选（信号列、排序列、条数）的结果也会缓存，重复生成报告不再重新计算
+"""
+import pandas as pd
+
+
+class SignalResult:
+    """一次信号分析的结果"""
+
+    def __init__(self, frame: pd.DataFrame, describe, descriptions: dict | None = None):
+        """
+        Args:
+            frame: 已计算信号和指标的数据（可以不含 signal_description 列）
+            describe: 为给定行生成描述的函数（DataFrame -> Series）
+            descriptions: 已生成的描述（行索引 -> 描述）
+        """
+        self.frame = frame
+        self.describe = describe
+        self._descriptions = dict(descriptions or {})
+        self._selections = {}
+        self._full_frame = None
+        self.reports = {}  # 基于本结果生成的报告（名称 -> 报告），由生成方写入
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def descriptions(self, index) -> pd.Series:
+        """指定行的信号描述，只为尚未生成过的行调用 describe"""
+        index = list(index)
+        missing = [label for label in index if label not in self._descriptions]
+        if missing:
+            self._descriptions.update(self.describe(self.frame.loc[missing]).items())
+        return pd.Series([self._descriptions[label] for label in index], index=index)
+
+    def rows(self, index) -> pd.DataFrame:
+        """指定行的完整数据（包含 signal_description）"""
+        return self._with_descriptions(self.frame.loc[list(index)].copy())
+
+    def _with_descriptions(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """填入 signal_description 列（位于 risk_score 之前，与逐行生成时的列顺序一致）"""
+        descriptions = self.descriptions(frame.index)
+        if 'signal_description' in frame.columns:
+            frame['signal_description'] = descriptions
+        else:
+            position = frame.columns.get_loc('risk_score') if 'risk_score' in frame.columns else len(frame.columns)
+            frame.insert(position, 'signal_description', descriptions)
+        return frame
+
+    def select(self, signal_column: str, sort_by: str | None = None, top_n: int | None = None,
+               ascending: bool = False) -> pd.DataFrame:
+        """筛选信号列为真的行，可按 sort_by 排序后取前 top_n 行，只为这些行生成描述
+
+        sort_by 为空时保持原有行顺序
+        """
+        key = (signal_column, sort_by, top_n, ascending)
+        if key not in self._selections:
+            frame = self.frame
+            if signal_column in frame.columns:
+                selected = frame[frame[signal_column].fillna(False).astype(bool)]
+            else:
+                selected = frame.iloc[0:0]
+            if sort_by is not None:
+                selected = selected.sort_values(by=sort_by, ascending=ascending)
+            if top_n is not None:
+                selected = selected.head(top_n)
+            self._selections[key] = self.rows(selected.index)
+        return self._selections[key].copy()
+
+    def to_frame(self) -> pd.DataFrame:
+        """生成所有行的描述，返回完整数据（signal_description 列位于 risk_score 之前）"""
+        if self._full_frame is None:
+            frame = self.frame.copy()
+            self._full_frame = self._with_descriptions(frame) if not frame.empty else frame
+        return self._full_frame.copy()
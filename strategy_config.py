@@ -142,4 +142,13 @@ class StrategyConfig:
         config.OI_SURGE_RATIO_THRESHOLD = 2.0  # 标准OI激增要求
         return config
 
- 
\ No newline at end of file
+ 
+    
+    @classmethod
+    def get_presets(cls):
+        """所有策略预设（名称 -> 配置），按从严到宽排列"""
+        return {
+            'conservative': cls.get_conservative_config(),
+            'balanced': cls.get_balanced_config(),
+            'aggressive': cls.get_aggressive_config(),
+        }
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+策略参数扫描
+在已保存的市场快照（market_snapshot_store.py）上评估策略参数的所有组合，输出每个组合的
+买入信号数、命中率（买入后 horizon 小时价格上涨的比例）、平均远期收益和警报信号数：
+
+- 指标（OI/市值、信号强度等）由 TradingSignalAnalyzer.evaluate 纯计算得到，与实盘分析一致
+- 买入条件只依赖 (OI/市值阈值, 信号强度阈值)，警报条件只依赖 (资金费率阈值, OI激增阈值)，
+  两组参数分别排成阈值向量与样本广播比较，再用矩阵乘法统计同时满足两个条件的样本数，
+  完整组合表由两张二维统计表广播得到，耗时与 (P1×P2 + P3×P4) × 样本数 成正比，而不是四个维度的乘积
+- 样本按块处理，每块的比较矩阵不超过 max_elements 个元素，内存占用与组合数、快照天数无关
+- 快照按天分组交给进程池并行处理，各进程只读取自己负责的分区，结果为可直接相加的计数矩阵
+
+用法:
+  python strategy_sweep.py --days 90 --oi-ratio 0.2:1.0:0.05 --strength 40:80:5 \\
+      --funding-abs 0.0005:0.003:0.00025 --oi-surge 1.2:3.0:0.1 --output sweep.csv
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from market_snapshot_store import MarketSnapshotStore
+from strategy_config import StrategyConfig
+
+logger = logging.getLogger(__name__)
+
+# 可扫描的参数：买入条件两个，警报条件两个
+BUY_PARAMETERS = ('OI_MARKET_CAP_RATIO_THRESHOLD', 'SIGNAL_STRENGTH_THRESHOLD')
+ALERT_PARAMETERS = ('FUNDING_RATE_ABS_THRESHOLD', 'OI_SURGE_RATIO_THRESHOLD')
+SWEEP_PARAMETERS = BUY_PARAMETERS + ALERT_PARAMETERS
+SNAPSHOT_COLUMNS = ['price', 'quote_volume_24h', 'funding_rate', 'price_change_percent_24h',
+                    'open_interest_value', 'market_cap_estimate', 'oi_surge_ratio']
+DEFAULT_MAX_ELEMENTS = 1 << 22  # 每块比较矩阵的元素数上限（float64 约32MB）
+SYMBOL_KEY_SHIFT = 43  # 币种编号左移后与毫秒时间戳组合为单一排序键
+
+
+def parse_range(text: str) -> np.ndarray:
+    """解析参数取值：'start:stop:step'（含 stop）或逗号分隔的列表"""
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        if step <= 0:
+            raise ValueError(f"步长必须为正数: {text}")
+        return np.round(np.arange(start, stop + step / 2, step), 10)
+    return np.array([float(part) for part in text.split(',')], dtype=np.float64)
+
+
+def forward_returns(run_ts: np.ndarray, symbols: np.ndarray, prices: np.ndarray, horizon_ms: int) -> np.ndarray:
+    """每个样本之后 horizon_ms 的收益率
+
+    取同一币种在 run_ts + horizon_ms 及之后的第一次运行的价格；该运行晚于 run_ts + 2 × horizon_ms
+    （中间缺少快照）或不存在时为 NaN
+    """
+    _, codes = np.unique(symbols, return_inverse=True)
+    keys = (codes.astype(np.int64) << SYMBOL_KEY_SHIFT) + run_ts
+    order = np.argsort(keys, kind='stable')
+    sorted_keys, sorted_ts = keys[order], run_ts[order]
+    position = np.searchsorted(sorted_keys, keys + horizon_ms, side='left')
+    found = position < len(keys)
+    position = np.minimum(position, len(keys) - 1)
+    target = order[position]
+    found &= (codes[target] == codes) & (sorted_ts[position] <= run_ts + 2 * horizon_ms)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices[target] / prices - 1
+    return np.where(found, returns, np.nan)
+
+
+def pair_counts(x: np.ndarray, x_thresholds: np.ndarray, y: np.ndarray, y_thresholds: np.ndarray,
+                weights: list, max_elements: int = DEFAULT_MAX_ELEMENTS) -> list:
+    """对每个阈值对 (i, j) 统计 sum(w * (x > x_thresholds[i]) * (y > y_thresholds[j]))
+
+    样本分块处理：每块把两个阈值向量分别与样本广播比较得到 (Px, S)、(Py, S) 的矩阵，
+    加权后相乘累加到 (Px, Py) 的结果上
+
+    Returns:
+        与 weights 一一对应的 (Px, Py) 矩阵列表
+    """
+    results = [np.zeros((len(x_thresholds), len(y_thresholds))) for _ in weights]
+    step = max(1, max_elements // (len(x_thresholds) + len(y_thresholds)))
+    with np.errstate(invalid='ignore'):
+        for start in range(0, len(x), step):
+            chunk = slice(start, start + step)
+            x_hits = (x[chunk] > x_thresholds[:, None]).astype(np.float64)
+            y_hits = y[chunk] > y_thresholds[:, None]
+            for result, weight in zip(results, weights):
+                result += x_hits @ (y_hits * weight[chunk]).T
+    return results
+
+
+def _empty_totals(grid: dict) -> dict:
+    buy_shape = tuple(len(grid[name]) for name in BUY_PARAMETERS)
+    alert_shape = tuple(len(grid[name]) for name in ALERT_PARAMETERS)
+    return {
+        'samples': 0,
+        'buy_signals': np.zeros(buy_shape), 'buy_outcomes': np.zeros(buy_shape),
+        'buy_hits': np.zeros(buy_shape), 'buy_return_sum': np.zeros(buy_shape),
+        'alert_signals': np.zeros(alert_shape),
+    }
+
+
+def _sweep_range(data_dir: str, start_ms: int, end_ms: int, grid: dict, preset: str,
+                 horizon_ms: int, max_elements: int) -> dict:
+    """统计运行时间在 [start_ms, end_ms) 内的快照（进程池任务，只返回计数矩阵）"""
+    # 导入分析器会配置日志，放在子进程中执行
+    from trading_signal_analyzer import TradingSignalAnalyzer
+
+    # 多读 2 × horizon 的快照用于计算远期收益
+    frame = MarketSnapshotStore(data_dir).read_range(start_ms, end_ms + 2 * horizon_ms, columns=SNAPSHOT_COLUMNS)
+    totals = _empty_totals(grid)
+    if frame.empty:
+        return totals
+
+    run_ts = frame['run_ts'].to_numpy()
+    returns = forward_returns(run_ts, frame['symbol'].to_numpy(), frame['price'].to_numpy(), horizon_ms)
+    frame = frame[run_ts < end_ms]
+    returns = returns[run_ts < end_ms]
+    if frame.empty:
+        return totals
+
+    analyzer = TradingSignalAnalyzer(StrategyConfig.get_presets()[preset])
+    df = analyzer.evaluate(frame, oi_ratios=frame['oi_surge_ratio'].to_numpy()).frame
+    oi_market_cap_ratio = df['oi_market_cap_ratio'].to_numpy(dtype=np.float64)
+    signal_strength = df['signal_strength'].to_numpy(dtype=np.float64)
+
+    # 不参与扫描的买入条件（最小OI、成交量/市值）使用预设的值
+    with np.errstate(invalid='ignore'):
+        fixed = ((df['open_interest_value'].to_numpy(dtype=np.float64) > analyzer.min_oi_value) &
+                 (df['volume_market_cap_ratio'].to_numpy(dtype=np.float64) > analyzer.volume_threshold))
+    has_outcome = fixed & ~np.isnan(returns)
+    counts = pair_counts(
+        oi_market_cap_ratio, grid[BUY_PARAMETERS[0]], signal_strength, grid[BUY_PARAMETERS[1]],
+        [fixed.astype(np.float64), has_outcome.astype(np.float64),
+         (has_outcome & (returns > 0)).astype(np.float64), np.where(has_outcome, returns, 0.0)],
+        max_elements,
+    )
+    totals['buy_signals'], totals['buy_outcomes'], totals['buy_hits'], totals['buy_return_sum'] = counts
+
+    # 警报条件与 _generate_alert_signals 相同：缺失的资金费率按0、OI激增比率按1处理
+    funding_rate_abs = np.nan_to_num(np.abs(df['funding_rate'].to_numpy(dtype=np.float64)), nan=0.0)
+    oi_surge_ratio = np.nan_to_num(df['oi_surge_ratio'].to_numpy(dtype=np.float64), nan=1.0)
+    totals['alert_signals'], = pair_counts(
+        funding_rate_abs, grid[ALERT_PARAMETERS[0]], oi_surge_ratio, grid[ALERT_PARAMETERS[1]],
+        [np.ones(len(df))], max_elements,
+    )
+    totals['samples'] = len(df)
+    return totals
+
+
+class StrategySweep:
+    """在历史市场快照上扫描策略参数组合"""
+
+    def __init__(self, data_dir: str = "market_snapshots", grid: dict | None = None, preset: str = 'balanced',
+                 horizon_hours: float = 24, workers: int | None = None, days_per_task: int = 1,
+                 max_elements: int = DEFAULT_MAX_ELEMENTS):
+        """
+        Args:
+            data_dir: 市场快照目录
+            grid: 参数名（SWEEP_PARAMETERS 之一）-> 取值数组，未给出的参数只取预设中的值
+            preset: 提供其余参数（最小OI、成交量/市值阈值）和默认取值的策略预设
+            horizon_hours: 计算命中率的远期收益周期（小时）
+            workers: 并行进程数，默认为CPU核数，1 表示在当前进程中执行
+            days_per_task: 每个进程池任务处理的快照天数
+            max_elements: 每块比较矩阵的元素数上限
+        """
+        presets = StrategyConfig.get_presets()
+        if preset not in presets:
+            raise ValueError(f"未知的策略预设: {preset}")
+        grid = dict(grid or {})
+        unknown = set(grid) - set(SWEEP_PARAMETERS)
+        if unknown:
+            raise ValueError(f"不支持扫描的参数: {', '.join(sorted(unknown))}")
+        self.grid = {
+            name: np.asarray(grid[name] if name in grid else [getattr(presets[preset], name)], dtype=np.float64)
+            for name in SWEEP_PARAMETERS
+        }
+        self.data_dir = data_dir
+        self.preset = preset
+        self.horizon_ms = int(horizon_hours * 3_600_000)
+        self.workers = workers or os.cpu_count() or 1
+        self.days_per_task = max(1, days_per_task)
+        self.max_elements = max_elements
+
+    @property
+    def combinations(self) -> int:
+        return int(np.prod([len(values) for values in self.grid.values()]))
+
+    def _tasks(self, start_ms: int | None, end_ms: int | None) -> list:
+        """按天分组的 (起始, 结束) 毫秒时间范围"""
+        days = MarketSnapshotStore(self.data_dir).list_days()
+        tasks = []
+        for i in range(0, len(days), self.days_per_task):
+            group = days[i:i + self.days_per_task]
+            task_start = int(datetime.strptime(group[0], '%Y-%m-%d').timestamp() * 1000)
+            task_end = int((datetime.strptime(group[-1], '%Y-%m-%d') + timedelta(days=1)).timestamp() * 1000)
+            if start_ms is not None:
+                task_start = max(task_start, start_ms)
+            if end_ms is not None:
+                task_end = min(task_end, end_ms)
+            if task_start < task_end:
+                tasks.append((task_start, task_end))
+        return tasks
+
+    def run(self, start_ms: int | None = None, end_ms: int | None = None) -> pd.DataFrame:
+        """扫描运行时间在 [start_ms, end_ms) 内的快照，返回每个参数组合一行的结果表"""
+        tasks = self._tasks(start_ms, end_ms)
+        logger.info(f"参数扫描: {self.combinations} 个组合，{len(tasks)} 个任务，{min(self.workers, max(len(tasks), 1))} 个进程")
+        args = (self.grid, self.preset, self.horizon_ms, self.max_elements)
+        if self.workers <= 1 or len(tasks) <= 1:
+            partials = [_sweep_range(self.data_dir, task_start, task_end, *args) for task_start, task_end in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as executor:
+                futures = [executor.submit(_sweep_range, self.data_dir, task_start, task_end, *args)
+                           for task_start, task_end in tasks]
+                partials = [future.result() for future in futures]
+
+        totals = _empty_totals(self.grid)
+        for partial in partials:
+            for name, value in partial.items():
+                totals[name] = totals[name] + value
+        return self._table(totals)
+
+    def check_cell(self, table: pd.DataFrame, row: int = 0, start_ms: int | None = None,
+                   end_ms: int | None = None) -> bool:
+        """用结果表中一个组合的参数构造策略配置，在同一时间范围内直接运行 calculate_signals，
+        核对买入信号数、命中率、平均远期收益和警报信号数与扫描结果一致
+
+        一次读入整个时间范围，只用于核对扫描引擎
+        """
+        from trading_signal_analyzer import TradingSignalAnalyzer
+
+        cell = table.iloc[row]
+        config = StrategyConfig.get_presets()[self.preset]
+        for name in SWEEP_PARAMETERS:
+            setattr(config, name, float(cell[name]))
+
+        read_end = end_ms + 2 * self.horizon_ms if end_ms is not None else None
+        frame = MarketSnapshotStore(self.data_dir).read_range(start_ms, read_end, columns=SNAPSHOT_COLUMNS)
+        run_ts = frame['run_ts'].to_numpy()
+        returns = forward_returns(run_ts, frame['symbol'].to_numpy(), frame['price'].to_numpy(), self.horizon_ms)
+        if end_ms is not None:
+            frame, returns = frame[run_ts < end_ms], returns[run_ts < end_ms]
+        signals = TradingSignalAnalyzer(config).calculate_signals(frame, oi_ratios=frame['oi_surge_ratio'].to_numpy())
+
+        buy = signals['buy_signal'].to_numpy(dtype=bool)
+        outcomes = buy & ~np.isnan(returns)
+        with np.errstate(invalid='ignore'):
+            expected = [buy.sum(), outcomes.sum(), signals['alert_signal'].sum(),
+                        (returns[outcomes] > 0).mean() if outcomes.any() else np.nan,
+                        returns[outcomes].mean() if outcomes.any() else np.nan]
+        actual = [cell['buy_signals'], cell['buy_outcomes'], cell['alert_signals'],
+                  cell['hit_rate'], cell['avg_forward_return']]
+        return bool(np.allclose(np.array(expected, dtype=np.float64), np.array(actual, dtype=np.float64),
+                                equal_nan=True))
+
+    def _table(self, totals: dict) -> pd.DataFrame:
+        """把买入 (P1, P2) 和警报 (P3, P4) 两张统计表广播为 P1×P2×P3×P4 行的组合表"""
+        shape = tuple(len(values) for values in self.grid.values())
+        axes = np.meshgrid(*self.grid.values(), indexing='ij')
+        table = {name: axis.ravel() for name, axis in zip(SWEEP_PARAMETERS, axes)}
+
+        def buy(values):
+            return np.broadcast_to(values[:, :, None, None], shape).ravel()
+
+        buy_signals, buy_outcomes = buy(totals['buy_signals']), buy(totals['buy_outcomes'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['buy_signals'] = buy_signals.astype(np.int64)
+            table['buy_outcomes'] = buy_outcomes.astype(np.int64)
+            table['hit_rate'] = buy(totals['buy_hits']) / buy_outcomes
+            table['avg_forward_return'] = buy(totals['buy_return_sum']) / buy_outcomes
+            table['alert_signals'] = np.broadcast_to(totals['alert_signals'][None, None], shape).ravel().astype(np.int64)
+            table['alert_rate'] = table['alert_signals'] / totals['samples'] if totals['samples'] else np.nan
+        return pd.DataFrame(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='策略参数扫描')
+    parser.add_argument('--data-dir', default='market_snapshots', help='市场快照目录')
+    parser.add_argument('--days', type=int, default=30, help='扫描最近N天的快照，0表示全部')
+    parser.add_argument('--preset', default='balanced', help='提供其余参数的策略预设')
+    parser.add_argument('--oi-ratio', help='OI_MARKET_CAP_RATIO_THRESHOLD 取值，start:stop:step 或逗号分隔')
+    parser.add_argument('--strength', help='SIGNAL_STRENGTH_THRESHOLD 取值')
+    parser.add_argument('--funding-abs', help='FUNDING_RATE_ABS_THRESHOLD 取值')
+    parser.add_argument('--oi-surge', help='OI_SURGE_RATIO_THRESHOLD 取值')
+    parser.add_argument('--horizon-hours', type=float, default=24, help='命中率的远期收益周期（小时）')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数，默认为CPU核数')
+    parser.add_argument('--days-per-task', type=int, default=1, help='每个进程任务处理的天数')
+    parser.add_argument('--min-signals', type=int, default=20, help='排名时要求的最少有结果的买入信号数')
+    parser.add_argument('--top', type=int, default=20, help='打印命中率最高的N个组合')
+    parser.add_argument('--output', help='完整结果表保存为CSV')
+    parser.add_argument('--check', action='store_true', help='用第一个组合的参数直接运行 calculate_signals 核对结果')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    options = {'OI_MARKET_CAP_RATIO_THRESHOLD': args.oi_ratio, 'SIGNAL_STRENGTH_THRESHOLD': args.strength,
+               'FUNDING_RATE_ABS_THRESHOLD': args.funding_abs, 'OI_SURGE_RATIO_THRESHOLD': args.oi_surge}
+    grid = {name: parse_range(value) for name, value in options.items() if value}
+    sweep = StrategySweep(args.data_dir, grid, args.preset, args.horizon_hours, args.workers, args.days_per_task)
+    start_ms = int((datetime.now() - timedelta(days=args.days)).timestamp() * 1000) if args.days > 0 else None
+    table = sweep.run(start_ms)
+    if args.check:
+        same = sweep.check_cell(table, 0, start_ms)
+        print(f"核对第一个组合与 calculate_signals 的结果: {'一致' if same else '不一致'}")
+        if not same:
+            return 1
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"已保存 {len(table)} 个组合的结果: {args.output}")
+    ranked = table[table['buy_outcomes'] >= args.min_signals].sort_values(
+        ['hit_rate', 'avg_forward_return'], ascending=False)
+    if ranked.empty:
+        print(f"没有买入信号数达到 {args.min_signals} 的组合")
+        return 0
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(ranked.head(args.top).to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+币种注册表
+基于一次 exchangeInfo 请求构建永续合约币种列表，
+与上一次保存的数据对比生成上架/下架事件，只对新币种或状态不明确的币种进行OI探测
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from binance_api import binance_get_json, EXCHANGE_INFO_PATH
+
+logger = logging.getLogger(__name__)
+
+# 永续合约的默认交割时间（2100-12-25），早于该时间表示已安排下架
+PERPETUAL_DELIVERY_DATE = 4133404800000
+
+# 保存的交易对字段
+SYMBOL_FIELDS = ('status', 'contractType', 'quoteAsset', 'onboardDate', 'deliveryDate')
+
+
+class SymbolRegistry:
+    """永续合约币种注册表"""
+
+    def __init__(self, registry_file: str = "symbol_registry.json"):
+        self.registry_file = registry_file
+        self.symbols = {}  # 交易对 -> exchangeInfo 字段
+        self.invalid_symbols = set()  # OI探测失败的交易对
+        self.updated_at = None
+        self.last_events = []
+        self.load()
+
+    def load(self):
+        """加载上一次保存的注册表"""
+        if not os.path.exists(self.registry_file):
+            return
+        try:
+            with open(self.registry_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.symbols = data.get('symbols', {})
+            self.invalid_symbols = set(data.get('invalid_symbols', []))
+            self.updated_at = data.get('updated_at')
+        except Exception as e:
+            logger.warning(f"读取币种注册表失败: {e}")
+
+    def save(self):
+        """保存注册表"""
+        data = {
+            'updated_at': self.updated_at,
+            'symbols': self.symbols,
+            'invalid_symbols': sorted(self.invalid_symbols),
+        }
+        try:
+            tmp_file = self.registry_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.registry_file)
+        except Exception as e:
+            logger.error(f"保存币种注册表失败: {e}")
+
+    @staticmethod
+    def parse_exchange_info(payload: dict) -> dict:
+        """从 exchangeInfo 中提取USDT永续合约交易对"""
+        symbols = {}
+        for symbol_info in payload.get('symbols', []):
+            if (symbol_info.get('contractType') == 'PERPETUAL' and
+                    symbol_info.get('quoteAsset') == 'USDT'):
+                symbols[symbol_info['symbol']] = {key: symbol_info.get(key) for key in SYMBOL_FIELDS}
+        return symbols
+
+    @staticmethod
+    def is_tradable(info: dict, now_ms: int | None = None) -> bool:
+        """根据 exchangeInfo 字段判断交易对当前是否可交易"""
+        now_ms = now_ms or int(time.time() * 1000)
+        delivery_date = info.get('deliveryDate') or PERPETUAL_DELIVERY_DATE
+        return info.get('status') == 'TRADING' and delivery_date > now_ms
+
+    @staticmethod
+    def is_ambiguous(info: dict, now_ms: int | None = None) -> bool:
+        """状态不明确：尚未到上线时间，或已安排下架"""
+        now_ms = now_ms or int(time.time() * 1000)
+        onboard_date = info.get('onboardDate') or 0
+        delivery_date = info.get('deliveryDate') or PERPETUAL_DELIVERY_DATE
+        return onboard_date > now_ms or delivery_date < PERPETUAL_DELIVERY_DATE
+
+    def diff(self, current: dict) -> list:
+        """对比上一次的注册表，生成上架/下架事件"""
+        now_ms = int(time.time() * 1000)
+        events = []
+        for symbol, info in current.items():
+            previous = self.symbols.get(symbol)
+            if self.is_tradable(info, now_ms) and (previous is None or not self.is_tradable(previous, now_ms)):
+                events.append({'type': 'listed', 'symbol': symbol, 'onboardDate': info.get('onboardDate')})
+        for symbol, previous in self.symbols.items():
+            info = current.get(symbol)
+            if self.is_tradable(previous, now_ms) and (info is None or not self.is_tradable(info, now_ms)):
+                events.append({'type': 'delisted', 'symbol': symbol,
+                               'status': info.get('status') if info else None})
+        return events
+
+    def fetch_exchange_info(self) -> dict | None:
+        """请求 exchangeInfo（经过响应缓存）"""
+        try:
+            payload = binance_get_json(EXCHANGE_INFO_PATH, timeout=10)
+            if payload is None:
+                logger.error("获取交易对信息失败")
+            return payload
+        except Exception as e:
+            logger.error(f"获取交易对信息异常: {e}")
+        return None
+
+    def refresh(self, probe=None, payload: dict | None = None) -> list | None:
+        """刷新注册表并返回本次的上架/下架事件，获取 exchangeInfo 失败时返回 None
+
+        Args:
+            probe: 探测函数，接收交易对并返回是否有效；只对新币种和状态不明确的币种调用
+            payload: 已获取的 exchangeInfo 数据，未提供时请求一次API
+        """
+        if payload is None:
+            payload = self.fetch_exchange_info()
+        if payload is None:
+            return None
+
+        current = self.parse_exchange_info(payload)
+        now_ms = int(time.time() * 1000)
+        events = self.diff(current) if self.symbols else []
+
+        if probe is not None:
+            # 只探测新币种、状态不明确的币种以及上次探测失败的币种；
+            # 首次构建时没有上一次的数据可对比，只探测状态不明确的币种
+            first_build = not self.symbols
+            to_probe = [
+                symbol for symbol, info in current.items()
+                if self.is_tradable(info, now_ms) and (
+                    (symbol not in self.symbols and not first_build) or
+                    symbol in self.invalid_symbols or
+                    self.is_ambiguous(info, now_ms))
+            ]
+            if to_probe:
+                logger.info(f"探测 {len(to_probe)} 个新增或状态不明确的币种...")
+            for symbol in to_probe:
+                if probe(symbol):
+                    self.invalid_symbols.discard(symbol)
+                else:
+                    self.invalid_symbols.add(symbol)
+        self.invalid_symbols &= set(current)
+
+        for event in events:
+            action = "上架" if event['type'] == 'listed' else "下架"
+            logger.info(f"币种{action}: {event['symbol']}")
+
+        self.symbols = current
+        self.updated_at = datetime.now().isoformat()
+        self.last_events = events
+        self.save()
+        return events
+
+    def valid_symbols(self) -> list:
+        """当前有效的币种列表（去掉USDT后缀）"""
+        now_ms = int(time.time() * 1000)
+        return [
+            symbol[:-len('USDT')] for symbol, info in self.symbols.items()
+            if self.is_tradable(info, now_ms) and symbol not in self.invalid_symbols
+        ]
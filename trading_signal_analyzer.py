@@ -1,16 +1,58 @@
 import pandas as pd
 import numpy as np
 import logging
+import copy
 from strategy_config import StrategyConfig
 from oi_history_collector import OIHistoryCollector
+from signal_result import SignalResult
+from preset_signals import PresetSignals
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _float_values(df, column: str) -> np.ndarray:
+    """列转为 float64 数组（缺失值为 NaN），指标计算直接在数组上进行，避免逐个 Series 运算的开销"""
+    values = df[column]
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+
+def _like(df, values: np.ndarray):
+    """输入为 DataFrame 时把结果包装为同索引的 Series，否则直接返回数组"""
+    if isinstance(df, pd.DataFrame):
+        return pd.Series(values, index=df.index)
+    return values
+
+
+class _ColumnView:
+    """原始数据列 + 新计算的数组列，供 evaluate 在并入数据框之前计算后续指标"""
+
+    def __init__(self, data: pd.DataFrame, columns: dict):
+        self.data = data
+        self.columns = columns
+        self._inputs = {}  # 原始数据列转换后的数组，每列只转换一次
+
+    def __getitem__(self, column: str):
+        if column in self.columns:
+            return self.columns[column]
+        if column not in self._inputs:
+            self._inputs[column] = _float_values(self.data, column)
+        return self._inputs[column]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
 class TradingSignalAnalyzer:
-    def __init__(self, config=None):
-        """初始化交易信号分析器"""
+    def __init__(self, config=None, oi_collector=None):
+        """初始化交易信号分析器
+
+        Args:
+            config: 策略配置，默认为平衡型配置
+            oi_collector: OI历史收集器，默认在首次需要时创建（传入 oi_ratios 分析时不会创建）
+        """
         # 使用传入的配置或默认配置
         self.config = config if config else StrategyConfig.get_balanced_config()
         
@@ -18,6 +60,7 @@ class TradingSignalAnalyzer:
         self.oi_market_cap_ratio_threshold = self.config.OI_MARKET_CAP_RATIO_THRESHOLD
         self.min_oi_value = self.config.MIN_OI_VALUE
         self.volume_threshold = self.config.VOLUME_MARKET_CAP_RATIO_THRESHOLD
+        self.signal_strength_threshold = getattr(self.config, 'SIGNAL_STRENGTH_THRESHOLD', 60)
         self.funding_rate_threshold = 0.0001  # 资金费率阈值
         self.price_change_threshold = 0.02  # 24h价格变化阈值 2%
         
@@ -26,145 +69,264 @@ class TradingSignalAnalyzer:
         self.oi_surge_ratio_threshold = getattr(self.config, 'OI_SURGE_RATIO_THRESHOLD', 2.0)
         self.enable_new_alert_conditions = getattr(self.config, 'ENABLE_NEW_ALERT_CONDITIONS', True)
         
-        # 初始化OI历史收集器
-        self.oi_collector = OIHistoryCollector()
+        self._oi_collector = oi_collector
+    
+    @property
+    def oi_collector(self) -> OIHistoryCollector:
+        """OI历史收集器（首次使用时创建，会初始化历史存储目录）"""
+        if self._oi_collector is None:
+            self._oi_collector = OIHistoryCollector()
+        return self._oi_collector
+    
+    @oi_collector.setter
+    def oi_collector(self, collector: OIHistoryCollector):
+        self._oi_collector = collector
         
-    def calculate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
-        """计算交易信号"""
+    def calculate_signals(self, data: pd.DataFrame, snapshot=None, oi_ratios=None) -> pd.DataFrame:
+        """计算交易信号，返回包含所有行信号描述的完整数据
+
+        Args:
+            data: 行情数据
+            snapshot: 本次运行的市场快照（MarketSnapshot），提供时直接使用其中的OI数据写入历史，不再重复请求
+            oi_ratios: 预先计算的OI激增比率（币种 -> 比率），见 evaluate
+        """
+        return self.evaluate(data, snapshot, oi_ratios).to_frame()
+
+    def evaluate(self, data: pd.DataFrame, snapshot=None, oi_ratios=None) -> SignalResult:
+        """计算交易信号，信号描述延迟到报告展示具体行时才生成
+
+        Args:
+            data: 行情数据
+            snapshot: 本次运行的市场快照（MarketSnapshot）
+            oi_ratios: 预先计算的OI激增比率（Series 或 dict，币种 -> 比率，缺失为空值；
+                也可以是与数据逐行对应的数组，例如多次运行的历史快照中同一币种有多行）。
+                提供时为纯计算，不写入OI历史、不访问网络或文件，可用于回测和离线分析；
+                不提供时先由OI历史收集器更新历史并计算比率
+        """
         if data.empty:
             logger.warning("输入数据为空")
-            return pd.DataFrame()
+            return self._as_result(pd.DataFrame())
         
-        # 复制数据避免修改原始数据
-        df = data.copy()
+        # 新列先在数组上计算，最后一次性并入数据框（逐列插入的开销远大于计算本身）
+        columns = {}
+        view = _ColumnView(data, columns)
+        open_interest_value = view['open_interest_value']
+        market_cap = view['market_cap_estimate']
+        quote_volume = view['quote_volume_24h']
         
         # 计算关键指标
-        df['oi_market_cap_ratio'] = df['open_interest_value'] / df['market_cap_estimate']
-        df['volume_market_cap_ratio'] = df['quote_volume_24h'] / df['market_cap_estimate']
-        df['oi_volume_ratio'] = df['open_interest_value'] / df['quote_volume_24h']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns['oi_market_cap_ratio'] = open_interest_value / market_cap
+            columns['volume_market_cap_ratio'] = quote_volume / market_cap
+            columns['oi_volume_ratio'] = open_interest_value / quote_volume
         
         # 计算新警报条件指标
         if self.enable_new_alert_conditions:
-            df = self._calculate_new_alert_indicators(df)
+            if oi_ratios is None:
+                oi_ratios = self._calculate_new_alert_indicators(data['symbol'].tolist(), snapshot)
+            if isinstance(oi_ratios, (dict, pd.Series)):
+                columns['oi_surge_ratio'] = data['symbol'].map(oi_ratios).to_numpy(dtype=np.float64, na_value=np.nan)
+            elif np.ndim(oi_ratios):
+                columns['oi_surge_ratio'] = np.asarray(oi_ratios, dtype=np.float64)
+            else:
+                columns['oi_surge_ratio'] = np.full(len(data), float(oi_ratios))
+            columns['funding_rate_abs'] = np.abs(view['funding_rate'])
         
         # 计算信号强度
-        df['signal_strength'] = self._calculate_signal_strength(df)
+        columns['signal_strength'] = self._calculate_signal_strength(view)
         
         # 生成交易信号
-        df['buy_signal'] = self._generate_buy_signals(df)
-        df['sell_signal'] = self._generate_sell_signals(df)
+        columns['buy_signal'] = self._generate_buy_signals(view)
+        columns['sell_signal'] = self._generate_sell_signals(view)
         
         # 生成新警报信号
         if self.enable_new_alert_conditions:
-            df['alert_signal'] = self._generate_alert_signals(df)
-        
-        # 添加信号描述
-        df['signal_description'] = df.apply(self._get_signal_description, axis=1)
+            columns['alert_signal'] = self._generate_alert_signals(view)
         
-        # 计算风险评分
-        df['risk_score'] = self._calculate_risk_score(df)
+        # 计算风险评分（整列统计和高风险筛选需要全部行）
+        columns['risk_score'] = self._calculate_risk_score(view)
         
-        return df
+        # 不修改原始数据；原数据中已有的同名列（例如重新分析已保存的快照）以新计算结果为准
+        overlap = [name for name in columns if name in data.columns]
+        base = data.drop(columns=overlap) if overlap else data
+        df = pd.concat([base, pd.DataFrame(columns, index=data.index)], axis=1)
+        return self._as_result(df)
+
+    def evaluate_presets(self, data, presets: dict | None = None, snapshot=None, oi_ratios=None) -> PresetSignals:
+        """在同一批数据上同时评估多个策略预设
+
+        共享指标只计算一次（OI历史也只更新一次），各预设的阈值排成 (预设数, 1) 的列向量，
+        与 (币种数,) 的指标广播比较，一次得到 预设 × 币种 的信号矩阵。
+        每个预设的结果与用该预设单独运行 calculate_signals 得到的 buy_signal / alert_signal 一致
+
+        Args:
+            data: 行情数据，或已分析的结果（SignalResult，直接复用其中的指标）
+            presets: 预设名称 -> 策略配置，默认为 StrategyConfig.get_presets()
+            snapshot, oi_ratios: 见 evaluate
+        """
+        if isinstance(data, SignalResult):
+            result = data
+        else:
+            result = self.evaluate(data, snapshot, oi_ratios)
+        presets = presets if presets is not None else StrategyConfig.get_presets()
+        # 各预设的阈值取自对应分析器的属性，与单独分析时使用的参数完全相同
+        analyzers = [TradingSignalAnalyzer(config, oi_collector=self._oi_collector) for config in presets.values()]
+        shape = (len(analyzers), len(result))
+        if result.empty:
+            return PresetSignals(result, presets.keys(), np.zeros(shape, dtype=bool), np.zeros(shape, dtype=bool))
+
+        def thresholds(attribute):
+            return np.array([getattr(analyzer, attribute) for analyzer in analyzers], dtype=np.float64)[:, None]
+
+        df = result.frame
+        with np.errstate(invalid='ignore'):
+            buy = (
+                (_float_values(df, 'oi_market_cap_ratio') > thresholds('oi_market_cap_ratio_threshold')) &
+                (_float_values(df, 'open_interest_value') > thresholds('min_oi_value')) &
+                (_float_values(df, 'volume_market_cap_ratio') > thresholds('volume_threshold')) &
+                (_float_values(df, 'signal_strength') > thresholds('signal_strength_threshold'))
+            )
+            if 'oi_surge_ratio' in df.columns and 'funding_rate_abs' in df.columns:
+                funding_rate_abs = np.nan_to_num(_float_values(df, 'funding_rate_abs'), nan=0.0)
+                oi_surge_ratio = np.nan_to_num(_float_values(df, 'oi_surge_ratio'), nan=1.0)
+                enabled = np.array([analyzer.enable_new_alert_conditions for analyzer in analyzers])[:, None]
+                alert = (
+                    enabled &
+                    (funding_rate_abs > thresholds('funding_rate_abs_threshold')) &
+                    (oi_surge_ratio > thresholds('oi_surge_ratio_threshold'))
+                )
+            else:
+                alert = np.zeros(shape, dtype=bool)
+        return PresetSignals(result, presets.keys(), buy, alert)
+
+    def _as_result(self, signals) -> SignalResult:
+        """把分析结果统一为 SignalResult（已生成的描述列会被复用）"""
+        if isinstance(signals, SignalResult):
+            return signals
+        descriptions = None
+        if 'signal_description' in signals.columns:
+            descriptions = dict(zip(signals.index, signals['signal_description']))
+        return SignalResult(signals, self._build_signal_descriptions, descriptions)
     
-    def _calculate_new_alert_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """计算新警报条件指标"""
+    def _calculate_new_alert_indicators(self, symbols: list, snapshot=None):
+        """由OI历史收集器更新历史数据并计算OI比率，返回 币种 -> 比率（失败时所有币种为1.0）"""
         try:
-            # 获取所有币种
-            symbols = df['symbol'].tolist()
-            
-            # 更新历史数据
-            logger.info("开始更新OI历史数据...")
-            self.oi_collector.update_history_data(symbols)
-            
-            # 获取OI比率数据
-            logger.info("开始获取OI比率数据...")
-            oi_ratios = self.oi_collector.get_oi_ratios(symbols)
-            
-            # 添加OI比率到数据框
-            df['oi_surge_ratio'] = df['symbol'].map(lambda x: oi_ratios.get(x, 1.0))
-            
-            # 计算资金费率绝对值
-            df['funding_rate_abs'] = abs(df['funding_rate'])
-            
-            logger.info(f"成功计算 {len(df)} 个币种的新警报指标")
-            
+            # 更新历史数据（优先使用快照中的OI数据），再计算OI比率（历史不足的币种为空值）
+            oi_data = snapshot.oi_history_records(symbols) if snapshot is not None else None
+            oi_ratios = self.oi_collector.update_history_and_ratios(symbols, oi_data=oi_data)
+            logger.info(f"成功计算 {len(symbols)} 个币种的新警报指标")
+            return oi_ratios
         except Exception as e:
             logger.error(f"计算新警报指标异常: {e}")
-            # 设置默认值
-            df['oi_surge_ratio'] = 1.0
-            df['funding_rate_abs'] = abs(df['funding_rate'])
-        
-        return df
+            return 1.0
     
     def _calculate_signal_strength(self, df: pd.DataFrame) -> pd.Series:
         """计算信号强度 (0-100)"""
-        strength = pd.Series(0, index=df.index)
+        strength = np.zeros(len(df), dtype=np.float64)
         
         # OI/市值比率得分 (40分)
-        oi_ratio_score = np.clip(df['oi_market_cap_ratio'] * 100, 0, 40)
+        oi_ratio_score = np.clip(_float_values(df, 'oi_market_cap_ratio') * 100, 0, 40)
         strength += oi_ratio_score
         
         # OI价值得分 (20分)
-        oi_value_score = np.clip(df['open_interest_value'] / 10_000_000 * 20, 0, 20)
+        oi_value_score = np.clip(_float_values(df, 'open_interest_value') / 10_000_000 * 20, 0, 20)
         strength += oi_value_score
         
         # 成交量得分 (20分)
-        volume_score = np.clip(df['volume_market_cap_ratio'] * 100, 0, 20)
+        volume_score = np.clip(_float_values(df, 'volume_market_cap_ratio') * 100, 0, 20)
         strength += volume_score
         
         # 资金费率得分 (10分)
         funding_score = np.where(
-            abs(df['funding_rate']) > self.funding_rate_threshold,
+            np.abs(_float_values(df, 'funding_rate')) > self.funding_rate_threshold,
             10, 5
         )
         strength += funding_score
         
         # 价格动量得分 (10分)
         momentum_score = np.where(
-            abs(df['price_change_percent_24h']) > self.price_change_threshold,
+            np.abs(_float_values(df, 'price_change_percent_24h')) > self.price_change_threshold,
             10, 5
         )
         strength += momentum_score
         
-        return strength
+        return _like(df, strength)
     
     def _generate_buy_signals(self, df: pd.DataFrame) -> pd.Series:
         """生成买入信号"""
         buy_conditions = (
-            (df['oi_market_cap_ratio'] > self.oi_market_cap_ratio_threshold) &  # OI/市值 > 0.5
-            (df['open_interest_value'] > self.min_oi_value) &  # OI > 5M
-            (df['volume_market_cap_ratio'] > self.volume_threshold) &  # 成交量/市值 > 0.1
-            (df['signal_strength'] > 60)  # 信号强度 > 60
+            (_float_values(df, 'oi_market_cap_ratio') > self.oi_market_cap_ratio_threshold) &  # OI/市值 > 0.5
+            (_float_values(df, 'open_interest_value') > self.min_oi_value) &  # OI > 5M
+            (_float_values(df, 'volume_market_cap_ratio') > self.volume_threshold) &  # 成交量/市值 > 0.1
+            (_float_values(df, 'signal_strength') > self.signal_strength_threshold)  # 信号强度 > 60
         )
         
-        return buy_conditions
+        return _like(df, buy_conditions)
     
     def _generate_sell_signals(self, df: pd.DataFrame) -> pd.Series:
         """生成卖出信号"""
         sell_conditions = (
-            (df['oi_market_cap_ratio'] < 0.2) &  # OI/市值 < 0.2
-            (df['signal_strength'] < 30) &  # 信号强度 < 30
-            (df['funding_rate'] < -0.0001)  # 负资金费率
+            (_float_values(df, 'oi_market_cap_ratio') < 0.2) &  # OI/市值 < 0.2
+            (_float_values(df, 'signal_strength') < 30) &  # 信号强度 < 30
+            (_float_values(df, 'funding_rate') < -0.0001)  # 负资金费率
         )
         
-        return sell_conditions
+        return _like(df, sell_conditions)
     
     def _generate_alert_signals(self, df: pd.DataFrame) -> pd.Series:
         """生成新警报信号"""
         if not self.enable_new_alert_conditions:
-            return pd.Series(False, index=df.index)
+            return _like(df, np.zeros(len(df), dtype=bool))
         
         # 使用历史OI比率进行警报检测
         # 当资金费率绝对值较大且OI短期激增时触发警报
+        funding_rate_abs = np.nan_to_num(_float_values(df, 'funding_rate_abs'), nan=0.0)
+        oi_surge_ratio = np.nan_to_num(_float_values(df, 'oi_surge_ratio'), nan=1.0)
         alert_conditions = (
-            (df['funding_rate_abs'].fillna(0) > self.funding_rate_abs_threshold) &  # 资金费率绝对值 > 0.1%
-            (df['oi_surge_ratio'].fillna(1.0) > self.oi_surge_ratio_threshold)  # OI短期激增 > 2
+            (funding_rate_abs > self.funding_rate_abs_threshold) &  # 资金费率绝对值 > 0.1%
+            (oi_surge_ratio > self.oi_surge_ratio_threshold)  # OI短期激增 > 2
         )
         
-        return alert_conditions
+        return _like(df, alert_conditions)
     
+    def _build_signal_descriptions(self, df: pd.DataFrame) -> pd.Series:
+        """按列生成所有行的信号描述，与逐行调用 _get_signal_description 的结果一致
+
+        每个描述片段用布尔掩码选出需要的行，只对这些行格式化数值，再整列拼接
+        """
+        descriptions = np.where(df['buy_signal'].to_numpy(dtype=bool), "OI/市值警报",
+                                np.where(df['sell_signal'].to_numpy(dtype=bool), "考虑卖出", "观望")).astype(object)
+
+        def append(mask, values=None, template=None, text=None):
+            if not mask.any():
+                return
+            if text is None:
+                text = np.array([template.format(v) for v in values[mask].tolist()], dtype=object)
+            descriptions[mask] = descriptions[mask] + " | " + text
+
+        with np.errstate(invalid='ignore'):
+            if self.enable_new_alert_conditions and 'alert_signal' in df.columns:
+                append(df['alert_signal'].fillna(False).to_numpy(dtype=bool), text="🚨OI异常警报")
+
+            oi_market_cap_ratio = _float_values(df, 'oi_market_cap_ratio')
+            append(oi_market_cap_ratio > self.oi_market_cap_ratio_threshold, oi_market_cap_ratio, "OI/市值比高({:.2f})")
+            oi_value = _float_values(df, 'open_interest_value')
+            append(oi_value > self.min_oi_value, oi_value / 1e6, "OI充足({:.1f}M)")
+            funding_rate = _float_values(df, 'funding_rate')
+            append(np.abs(funding_rate) > self.funding_rate_threshold, funding_rate * 100, "资金费率{:.3f}%")
+
+            if self.enable_new_alert_conditions:
+                if 'funding_rate_abs' in df.columns:
+                    append(_float_values(df, 'funding_rate_abs') > self.funding_rate_abs_threshold,
+                           funding_rate * 100, "资金费率异常({:.3f}%)")
+                if 'oi_surge_ratio' in df.columns:
+                    oi_surge_ratio = _float_values(df, 'oi_surge_ratio')
+                    append(oi_surge_ratio > self.oi_surge_ratio_threshold, oi_surge_ratio, "OI激增({:.2f}x)")
+
+        return pd.Series(descriptions, index=df.index)
+
     def _get_signal_description(self, row: pd.Series) -> str:
-        """获取信号描述"""
+        """获取单行的信号描述（逐行版本，批量计算使用 _build_signal_descriptions）"""
         descriptions = []
         
         if bool(row['buy_signal']):
@@ -202,71 +364,72 @@ class TradingSignalAnalyzer:
     
     def _calculate_risk_score(self, df: pd.DataFrame) -> pd.Series:
         """计算风险评分 (0-100, 越高越危险)"""
-        risk = pd.Series(0, index=df.index)
+        risk = np.zeros(len(df), dtype=np.float64)
         
         # 价格波动风险 (30分)
-        volatility_risk = np.clip(abs(df['price_change_percent_24h']) * 10, 0, 30)
+        volatility_risk = np.clip(np.abs(_float_values(df, 'price_change_percent_24h')) * 10, 0, 30)
         risk += volatility_risk
         
         # 资金费率风险 (20分)
-        funding_risk = np.clip(abs(df['funding_rate']) * 100000, 0, 20)
+        funding_risk = np.clip(np.abs(_float_values(df, 'funding_rate')) * 100000, 0, 20)
         risk += funding_risk
         
         # 流动性风险 (30分)
+        volume_market_cap_ratio = _float_values(df, 'volume_market_cap_ratio')
         liquidity_risk = np.where(
-            df['volume_market_cap_ratio'] < 0.05,
+            volume_market_cap_ratio < 0.05,
             30,
-            np.clip((0.1 - df['volume_market_cap_ratio']) * 300, 0, 30)
+            np.clip((0.1 - volume_market_cap_ratio) * 300, 0, 30)
         )
         risk += liquidity_risk
         
         # 市值风险 (20分)
         market_cap_risk = np.where(
-            df['market_cap_estimate'] < 100_000_000,  # 小于1亿市值
+            _float_values(df, 'market_cap_estimate') < 100_000_000,  # 小于1亿市值
             20, 10
         )
         risk += market_cap_risk
         
-        return risk
+        return _like(df, risk)
     
-    def get_top_signals(self, df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
-        """获取最强的交易信号"""
-        if df.empty:
+    def get_top_signals(self, df, top_n: int = 10) -> pd.DataFrame:
+        """获取最强的交易信号（df 可以是 DataFrame 或 SignalResult）"""
+        result = self._as_result(df)
+        if result.empty:
             return pd.DataFrame()
         
-        # 筛选买入信号
-        buy_signals = df[df['buy_signal']].copy()
+        # 筛选买入信号，按信号强度排序
+        buy_signals = result.select('buy_signal', sort_by='signal_strength', top_n=top_n)
         
         if buy_signals.empty:
             logger.info("没有找到买入信号")
             return pd.DataFrame()
         
-        # 按信号强度排序
-        buy_signals = buy_signals.sort_values(by='signal_strength', ascending=False)
-        
-        return buy_signals.head(top_n)
+        return buy_signals
     
-    def get_alert_signals(self, df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
-        """获取警报信号"""
-        if df.empty or not self.enable_new_alert_conditions:
+    def get_alert_signals(self, df, top_n: int = 10) -> pd.DataFrame:
+        """获取警报信号（df 可以是 DataFrame 或 SignalResult）"""
+        result = self._as_result(df)
+        if result.empty or not self.enable_new_alert_conditions:
             return pd.DataFrame()
         
-        # 筛选警报信号
-        alert_signals = df[df.get('alert_signal', False)].copy()
+        # 筛选警报信号，按资金费率绝对值排序
+        alert_signals = result.select('alert_signal', sort_by='funding_rate_abs', top_n=top_n)
         
         if alert_signals.empty:
             logger.info("没有找到警报信号")
             return pd.DataFrame()
         
-        # 按资金费率绝对值排序
-        alert_signals = alert_signals.sort_values(by='funding_rate_abs', ascending=False)
-        
-        return alert_signals.head(top_n)
+        return alert_signals
     
-    def generate_report(self, df: pd.DataFrame) -> dict:
-        """生成分析报告"""
-        if df.empty:
+    def generate_report(self, df) -> dict:
+        """生成分析报告（df 可以是 DataFrame 或 SignalResult）"""
+        result = self._as_result(df)
+        if result.empty:
             return {"error": "没有数据"}
+        if 'summary' in result.reports:
+            return copy.deepcopy(result.reports['summary'])
+        df = result.frame
         
         report = {
             "total_symbols": len(df),
@@ -275,7 +438,7 @@ class TradingSignalAnalyzer:
             "strong_signals": len(df[df['signal_strength'] > 80]),
             "average_signal_strength": df['signal_strength'].mean(),
             "average_risk_score": df['risk_score'].mean(),
-            "top_signals": self.get_top_signals(df, 5).to_dict('records'),
+            "top_signals": self.get_top_signals(result, 5).to_dict('records'),
             "summary_stats": {
                 "avg_oi_market_cap_ratio": df['oi_market_cap_ratio'].mean(),
                 "avg_funding_rate": df['funding_rate'].mean(),
@@ -285,23 +448,26 @@ class TradingSignalAnalyzer:
         
         # 添加新警报信号统计
         if self.enable_new_alert_conditions:
-            alert_signals = self.get_alert_signals(df, 5)
+            alert_signals = self.get_alert_signals(result, 5)
             report["alert_signals"] = len(df[df.get('alert_signal', False)])
             report["top_alert_signals"] = alert_signals.to_dict('records')
             
             # 添加新指标统计
-            if 'oi_surge_ratio' in df.columns:
+            if 'oi_surge_ratio' in df.columns and df['oi_surge_ratio'].notna().any():
                 report["summary_stats"]["avg_oi_surge_ratio"] = df['oi_surge_ratio'].mean()
             if 'funding_rate_abs' in df.columns:
                 report["summary_stats"]["avg_funding_rate_abs"] = df['funding_rate_abs'].mean()
         
+        result.reports['summary'] = copy.deepcopy(report)
         return report
     
-    def print_analysis(self, df: pd.DataFrame):
-        """打印分析结果"""
-        if df.empty:
+    def print_analysis(self, df):
+        """打印分析结果（df 可以是 DataFrame 或 SignalResult）"""
+        result = self._as_result(df)
+        if result.empty:
             print("没有数据可供分析")
             return
+        df = result.frame
         
         print("=" * 80)
         print("📊 币安永续合约交易信号分析报告")
@@ -325,7 +491,7 @@ class TradingSignalAnalyzer:
             alert_signals = len(df[df.get('alert_signal', False)])
             print(f"🚨 OI异常警报: {alert_signals}")
             
-            if 'oi_surge_ratio' in df.columns:
+            if 'oi_surge_ratio' in df.columns and df['oi_surge_ratio'].notna().any():
                 print(f"📈 平均OI激增比率: {df['oi_surge_ratio'].mean():.2f}")
             if 'funding_rate_abs' in df.columns:
                 print(f"💰 平均资金费率绝对值: {df['funding_rate_abs'].mean()*100:.3f}%")
@@ -333,11 +499,11 @@ class TradingSignalAnalyzer:
         print()
         
         # 推荐买入信号
-        buy_signals_df = df[df['buy_signal']].copy()
+        buy_signals_df = result.select('buy_signal', top_n=5)
         if not buy_signals_df.empty:
             print("\n🔥 推荐买入信号:")
             print("-" * 80)
-            for _, row in buy_signals_df.head(5).iterrows():
+            for _, row in buy_signals_df.iterrows():
                 # 格式化市值显示
                 market_cap = row['market_cap_estimate']
                 if market_cap >= 1e9:
@@ -361,7 +527,7 @@ class TradingSignalAnalyzer:
         
         # 新警报信号
         if self.enable_new_alert_conditions:
-            alert_signals_df = self.get_alert_signals(df, 5)
+            alert_signals_df = self.get_alert_signals(result, 5)
             if not alert_signals_df.empty:
                 print("\n🚨 OI异常警报信号:")
                 print("-" * 80)
@@ -387,11 +553,11 @@ class TradingSignalAnalyzer:
                 print("\n暂无OI异常警报信号\n")
         
         # 推荐卖出信号
-        sell_signals_df = df[df['sell_signal']].copy()
+        sell_signals_df = result.select('sell_signal', top_n=5)
         if not sell_signals_df.empty:
             print("\n🚨 推荐卖出信号:")
             print("-" * 80)
-            for _, row in sell_signals_df.head(5).iterrows():
+            for _, row in sell_signals_df.iterrows():
                 # 格式化市值显示
                 market_cap = row['market_cap_estimate']
                 if market_cap >= 1e9:
@@ -430,4 +596,27 @@ class TradingSignalAnalyzer:
                       f"价格: ${row['price']:>10,.2f} | "
                       f"24h变化: {row['price_change_percent_24h']:>6.2f}%")
         
-        print("\n" + "="*80) 
\ No newline at end of file
+        print("\n" + "="*80) 
+    
+    def print_preset_comparison(self, preset_signals: PresetSignals, top_n: int = 20):
+        """打印多个策略预设的信号对比：各预设的信号数，以及每个币种触发了哪些预设"""
+        if preset_signals.result.empty:
+            return
+        
+        print("\n🧭 策略预设对比:")
+        print("-" * 80)
+        for preset, counts in preset_signals.summary().items():
+            print(f"   {preset:>12} | 买入信号: {counts['buy_signals']:>3} | 警报信号: {counts['alert_signals']:>3}")
+        
+        fired = preset_signals.fired()
+        if fired.empty:
+            print("   没有币种触发任何预设的信号")
+            return
+        print()
+        for _, row in fired.head(top_n).iterrows():
+            buy_presets = ", ".join(row['buy_presets']) or "-"
+            alert_presets = ", ".join(row['alert_presets']) or "-"
+            print(f"   {row['symbol']:>10} | 信号强度: {row['signal_strength']:>5.1f} | "
+                  f"买入: {buy_presets:<34} | 警报: {alert_presets}")
+        if len(fired) > top_n:
+            print(f"   ... 另有 {len(fired) - top_n} 个币种")
@@ -11,6 +11,7 @@ import time
 import random
 from datetime import datetime
 from config import Config
+from http_client import http_get
 from local_supply import COIN_SUPPLY
 from manual_supply import MANUAL_SUPPLY
 
@@ -107,7 +108,7 @@ class SupplyUpdater:
                 self.check_rate_limit(api_type)
                 
                 # 发送请求
-                response = requests.get(url, headers=headers, params=params, timeout=timeout)
+                response = http_get(url, headers=headers, params=params, timeout=timeout)
                 
                 # 检查响应状态
                 if response.status_code == 200:
@@ -3,11 +3,11 @@
 企业微信通知模块
 用于发送交易信号分析结果到企业微信群
 """
-import requests
 import logging
 from datetime import datetime
 import pytz
 from config import Config
+from http_client import http_post
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +37,7 @@ class WeChatNotifier:
                     "content": content
                 }
             }
-            response = requests.post(
+            response = http_post(
                 self.webhook_url,
                 json=data,
                 timeout=10
@@ -69,7 +69,7 @@ class WeChatNotifier:
                     "content": content
                 }
             }
-            response = requests.post(
+            response = http_post(
                 self.webhook_url,
                 json=data,
                 timeout=10
@@ -121,6 +121,13 @@ class WeChatNotifier:
         else:
             message += f"🚨 OI异常警报: 0\n"
         
+        # 各策略预设的信号数量
+        if summary_stats.get('preset_signals'):
+            message += "策略预设(买入/警报): " + "，".join(
+                f"{preset} {counts['buy_signals']}/{counts['alert_signals']}"
+                for preset, counts in summary_stats['preset_signals'].items()
+            ) + "\n"
+        
         if not buy_signals.empty:
             message += "\n【OI/市值警报信号】\n"
             top_signals = buy_signals.nlargest(5, 'signal_strength')